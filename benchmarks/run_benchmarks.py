@@ -0,0 +1,324 @@
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "sentiment_analysis"))
+sys.path.insert(0, os.path.join(HERE, "..", "data_extraction"))
+
+from instrumentation import peak_rss_mb
+from synthetic_corpus import SyntheticCorpus
+
+# Benchmarks every pipeline stage on a seeded synthetic corpus:
+#
+#   scrape  - QuotesSpider.parse over saved HTML page fixtures
+#   score   - ProcessSentiment.analyze_sentiment, with each scorer in scorers.SCORERS
+#   store   - QuoteStore build + SentimentAggregates
+#   chart.* - prepare_data and figure rendering for every chart in build_charts.CHARTS
+#
+# Each stage runs in a fresh process so its peak RSS is its own. Results go to
+# a JSON file and are compared against a stored baseline.
+#
+#   python run_benchmarks.py                          # 10k quotes, compare to baseline.json
+#   python run_benchmarks.py --quotes 1000000 --authors 20000 --tags 50000 --score-limit 50000
+#   python run_benchmarks.py --save-baseline          # after an intended performance change
+
+DEFAULT_BASELINE_PATH = os.path.join(HERE, "baseline.json")
+DEFAULT_WORK_DIR = os.path.join(HERE, "work")
+
+# Charts whose data preparation is not done by the constructor
+PREPARE_METHODS = {
+    "pie_author": "prepare_all_authors",
+    "pie_tag": "prepare_all_tags",
+}
+
+
+def stage_result(seconds, items):
+    rss = peak_rss_mb()
+    return {
+        "seconds": round(seconds, 4),
+        "items": items,
+        "items_per_s": round(items / seconds, 1) if seconds else None,
+        "peak_rss_mb": round(rss, 1) if rss is not None else None,
+    }
+
+
+# ---- Stages (each runs in its own spawned process) ----
+
+def bench_scrape(corpus_dir, options):
+    from scrapy.http import HtmlResponse
+    from data_extraction.spiders.quotes import QuotesSpider
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "fixtures", "pages", "page_*.html"))):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+
+    spider = QuotesSpider(base_url="http://127.0.0.1")
+    responses = [
+        HtmlResponse(url=spider.page_url(n), body=body, encoding="utf-8")
+        for n, body in enumerate(pages, start=1)
+    ]
+
+    start = time.perf_counter()
+    items = sum(1 for response in responses for out in spider.parse(response) if isinstance(out, dict))
+    return {"scrape.parse": stage_result(time.perf_counter() - start, items)}
+
+
+def bench_score(corpus_dir, options, scorer):
+    from process_sentiment import ProcessSentiment
+
+    processor = ProcessSentiment(workers=options["workers"], scorer=scorer)
+    processor.show_progress = False
+
+    quotes = []
+    for q in processor.iter_jsonl(os.path.join(corpus_dir, "data_extraction", "quotes.jsonl")):
+        if options["score_limit"] and len(quotes) >= options["score_limit"]:
+            break
+        quotes.append(q)
+
+    start = time.perf_counter()
+    processed = processor.analyze_sentiment(quotes)
+    stage = "score.analyze_sentiment" if scorer == "vader" else f"score.analyze_sentiment.{scorer}"
+    return {stage: stage_result(time.perf_counter() - start, len(processed))}
+
+
+def bench_store(corpus_dir, options):
+    from aggregation import SentimentAggregates
+    from quote_store import QuoteStore
+
+    os.chdir(os.path.join(corpus_dir, "sentiment_analysis"))
+    store = QuoteStore("processed_quotes.jsonl")
+
+    start = time.perf_counter()
+    store.build()
+    store.load()
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    SentimentAggregates(store)
+    return {
+        "store.build": stage_result(build_seconds, len(store)),
+        "store.aggregate": stage_result(time.perf_counter() - start, len(store)),
+    }
+
+
+def bench_history(history_dir, aggregates):
+    """A fresh two-run history: the corpus, after a run with Positive and Negative swapped."""
+    import copy
+    import shutil
+    from run_history import RunHistory
+
+    shutil.rmtree(history_dir, ignore_errors=True)
+    history = RunHistory(history_dir)
+    previous = copy.copy(aggregates)
+    previous.author_sentiment = aggregates.author_sentiment[:, ::-1]
+    previous.tag_sentiment = aggregates.tag_sentiment[:, ::-1]
+    history.record(previous)
+    history.record(aggregates)
+    return history
+
+
+def bench_chart(corpus_dir, options, name):
+    import importlib
+    import chart_manifest
+    import chart_output
+    from aggregation import SentimentAggregates
+    from build_charts import CHARTS
+    from quote_store import QuoteStore
+
+    # Charts write to ../visualizations/, i.e. inside the work directory
+    os.chdir(os.path.join(corpus_dir, "sentiment_analysis"))
+    chart_output.PLOTLYJS_MODE = options["plotlyjs"]
+    chart_output.CONSOLIDATE_ENTITY_PAGES = options["consolidated"]
+    # Always render: the point is to time it
+    chart_manifest.FORCE_REBUILD = True
+    if options["plotlyjs"] == "shared":
+        chart_output.ensure_shared_plotlyjs()
+
+    module_name, class_name, method_name, source, _ = CHARTS[name]
+    chart_class = getattr(importlib.import_module(module_name), class_name)
+    store = QuoteStore("processed_quotes.jsonl").load()
+    aggregates = SentimentAggregates(store)
+    if source == "history":
+        history = bench_history(os.path.join(corpus_dir, "sentiment_analysis", "run_history"), aggregates)
+
+    start = time.perf_counter()
+    if source == "aggregates":
+        chart = chart_class(aggregates=aggregates)
+    elif source == "history":
+        chart = chart_class(history=history)
+    else:
+        chart = chart_class(store=store)
+    if name in PREPARE_METHODS:
+        getattr(chart, PREPARE_METHODS[name])()
+    prepare_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    getattr(chart, method_name)()
+    render_seconds = time.perf_counter() - start
+
+    return {
+        f"chart.{name}.prepare": stage_result(prepare_seconds, len(store)),
+        f"chart.{name}.render": stage_result(render_seconds, len(store)),
+    }
+
+
+def run_stage(func, *args):
+    # Quiet the chart scripts' progress prints; results are reported at the end
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            return func(*args)
+        finally:
+            sys.stdout = sys.__stdout__
+
+
+class BenchmarkSuite:
+
+    def __init__(self, corpus, work_dir=DEFAULT_WORK_DIR, pages=100, score_limit=10_000, workers=1,
+                 plotlyjs="shared", consolidated=True, charts=None):
+        self.corpus = corpus
+        self.pages = pages
+        self.CORPUS_DIR = os.path.abspath(os.path.join(
+            work_dir, "q{quotes}_a{authors}_t{tags}_s{seed}".format(**corpus.config())
+        ))
+        self.options = {
+            "score_limit": score_limit,
+            "workers": workers,
+            "plotlyjs": plotlyjs,
+            "consolidated": consolidated,
+        }
+        self.charts = charts
+
+    def ensure_corpus(self):
+        meta_path = os.path.join(self.CORPUS_DIR, "corpus.json")
+        if os.path.exists(meta_path):
+            print(f"Reusing synthetic corpus in {self.CORPUS_DIR}")
+            return
+        self.corpus.write(self.CORPUS_DIR, pages=self.pages)
+
+    def stages(self):
+        from build_charts import CHARTS
+        from scorers import SCORERS
+
+        yield "scrape", bench_scrape, ()
+        for scorer in SCORERS:
+            yield f"score.{scorer}", bench_score, (scorer,)
+        yield "store", bench_store, ()
+        for name in self.charts or CHARTS:
+            yield f"chart.{name}", bench_chart, (name,)
+
+    def run(self):
+        self.ensure_corpus()
+        stages = {}
+        for label, func, args in self.stages():
+            print(f"Running {label} ...")
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                stages.update(pool.submit(run_stage, func, self.CORPUS_DIR, self.options, *args).result())
+
+        return {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "config": {**self.corpus.config(), "pages": self.pages, **self.options},
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+            },
+            "stages": stages,
+        }
+
+
+def print_results(results):
+    print(f"\n{'stage':<28} {'seconds':>9} {'items/s':>12} {'peak RSS MB':>12}")
+    for stage, r in results["stages"].items():
+        rss = f"{r['peak_rss_mb']:.1f}" if r["peak_rss_mb"] is not None else "n/a"
+        print(f"{stage:<28} {r['seconds']:9.3f} {r['items_per_s'] or 0:12,.0f} {rss:>12}")
+
+
+def compare(results, baseline, tolerance):
+    """Print per-stage time ratios against the baseline; return the regressed stages."""
+    if baseline["config"] != results["config"]:
+        print("\nWarning: baseline was recorded with a different configuration:")
+        print(f"  baseline: {baseline['config']}")
+        print(f"  current:  {results['config']}")
+
+    regressions = []
+    print(f"\n{'stage':<28} {'baseline s':>10} {'current s':>10} {'ratio':>7}")
+    for stage, r in results["stages"].items():
+        base = baseline["stages"].get(stage)
+        if base is None or not base["seconds"]:
+            print(f"{stage:<28} {'-':>10} {r['seconds']:10.3f}")
+            continue
+
+        ratio = r["seconds"] / base["seconds"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(stage)
+        print(f"{stage:<28} {base['seconds']:10.3f} {r['seconds']:10.3f} {ratio:7.2f}{flag}")
+
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark scrape, score and render on a synthetic corpus.")
+    parser.add_argument("--quotes", type=int, default=10_000)
+    parser.add_argument("--authors", type=int, default=500)
+    parser.add_argument("--tags", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pages", type=int, default=100, help="HTML page fixtures parsed by the scrape stage")
+    parser.add_argument("--score-limit", type=int, default=10_000,
+                        help="Quotes scored by the score stage (0 = all)")
+    parser.add_argument("--workers", type=int, default=1, help="Scoring processes")
+    parser.add_argument("--plotlyjs", choices=["inline", "shared", "cdn"], default="shared")
+    parser.add_argument("--per-entity-pages", action="store_true",
+                        help="Write one pie chart file per author/tag instead of consolidated pages")
+    parser.add_argument("--charts", nargs="+", metavar="CHART", help="Charts to benchmark (default: all)")
+    parser.add_argument("--work-dir", default=DEFAULT_WORK_DIR, help="Where corpora and chart output go")
+    parser.add_argument("--results", default=os.path.join(HERE, "results.json"))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline before a stage is flagged")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    suite = BenchmarkSuite(
+        SyntheticCorpus(args.quotes, args.authors, args.tags, args.seed),
+        work_dir=args.work_dir,
+        pages=args.pages,
+        score_limit=args.score_limit,
+        workers=args.workers,
+        plotlyjs=args.plotlyjs,
+        consolidated=not args.per_entity_pages,
+        charts=args.charts,
+    )
+    results = suite.run()
+    print_results(results)
+
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"\nResults written to {args.results}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions and args.fail_on_regression:
+            sys.exit(f"{len(regressions)} stage(s) slower than baseline: {', '.join(regressions)}")
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
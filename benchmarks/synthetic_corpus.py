@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import sys
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "sentiment_analysis"))
+sys.path.insert(0, os.path.join(HERE, "..", "data_extraction"))
+
+from fixture_server import FixtureSite
+from process_sentiment import build_record
+
+# Seeded synthetic quotes for benchmarking, in the same shapes the pipeline
+# uses: raw quotes (quotes.jsonl), processed quotes (processed_quotes.jsonl)
+# and saved quotes.toscrape.com-style HTML pages for the spider.
+#
+#   python synthetic_corpus.py --quotes 1000000 --authors 20000 --tags 50000 --out work/1m
+
+POSITIVE_WORDS = [
+    "love", "hope", "joy", "happy", "kind", "beautiful", "brave", "wonderful", "friend", "smile",
+    "peace", "free", "best", "gift", "laugh", "wisdom", "trust", "dream", "inspire", "grateful",
+]
+NEGATIVE_WORDS = [
+    "fear", "hate", "sad", "pain", "lonely", "cruel", "lost", "war", "fail", "broken",
+    "anger", "doubt", "regret", "worst", "afraid", "evil", "death", "hurt", "shame", "tears",
+]
+NEUTRAL_WORDS = [
+    "the", "world", "is", "a", "of", "our", "time", "we", "have", "it", "that", "you", "what",
+    "are", "more", "than", "life", "people", "always", "never", "in", "book", "mind", "every",
+    "day", "when", "one", "thing", "way", "heart", "to", "be", "not", "only", "all", "who",
+    "read", "write", "know", "think", "change", "truth", "story", "words", "light", "night",
+    "road", "house", "river", "window", "question", "answer", "morning", "city", "letter",
+]
+WORDS = NEUTRAL_WORDS + POSITIVE_WORDS + NEGATIVE_WORDS
+POSITIVE_CODES = (len(NEUTRAL_WORDS), len(NEUTRAL_WORDS) + len(POSITIVE_WORDS))
+NEGATIVE_CODES = (POSITIVE_CODES[1], len(WORDS))
+
+
+def zipf_weights(n, exponent=1.1):
+    """A few very common authors/tags and a long tail, like the real site."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+class SyntheticCorpus:
+
+    def __init__(self, quotes=10_000, authors=500, tags=2_000, seed=0, chunk_size=100_000):
+        self.n_quotes = quotes
+        self.n_authors = authors
+        self.n_tags = tags
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+        self.authors = [f"Author {i:06d}" for i in range(authors)]
+        self.tags = [f"tag-{i:06d}" for i in range(tags)]
+
+    def config(self):
+        return {"quotes": self.n_quotes, "authors": self.n_authors, "tags": self.n_tags, "seed": self.seed}
+
+    def iter_quotes(self):
+        """Yield (quote, scores) pairs; vectorized draws, chunk by chunk."""
+        rng = np.random.default_rng(self.seed)
+        author_p = zipf_weights(self.n_authors)
+        tag_p = zipf_weights(self.n_tags)
+
+        for start in range(0, self.n_quotes, self.chunk_size):
+            n = min(self.chunk_size, self.n_quotes - start)
+            author_codes = rng.choice(self.n_authors, size=n, p=author_p)
+            word_counts = rng.integers(6, 40, size=n)
+            word_offsets = np.concatenate(([0], np.cumsum(word_counts)))
+            word_codes = rng.integers(0, len(WORDS), size=word_offsets[-1])
+            tag_counts = rng.integers(0, 6, size=n)
+            tag_offsets = np.concatenate(([0], np.cumsum(tag_counts)))
+            tag_codes = rng.choice(self.n_tags, size=tag_offsets[-1], p=tag_p)
+
+            is_pos = (word_codes >= POSITIVE_CODES[0]) & (word_codes < POSITIVE_CODES[1])
+            is_neg = word_codes >= NEGATIVE_CODES[0]
+
+            for i in range(n):
+                lo, hi = word_offsets[i], word_offsets[i + 1]
+                words = [WORDS[c] for c in word_codes[lo:hi]]
+                text = "“" + " ".join(words).capitalize() + ".”"
+                tags = sorted({self.tags[c] for c in tag_codes[tag_offsets[i]:tag_offsets[i + 1]]})
+
+                # Scores shaped like VADER's, derived from the sentiment words drawn
+                pos = int(is_pos[lo:hi].sum()) / len(words)
+                neg = int(is_neg[lo:hi].sum()) / len(words)
+                scores = {
+                    "neg": round(neg, 3),
+                    "neu": round(1.0 - pos - neg, 3),
+                    "pos": round(pos, 3),
+                    "compound": round(float(np.tanh(4 * (pos - neg))), 4),
+                }
+                yield {"text": text, "author": self.authors[author_codes[i]], "tags": tags}, scores
+
+    def write(self, out_dir, pages=100, quotes_per_page=10):
+        """Write raw and processed JSON Lines plus HTML page fixtures under out_dir."""
+        raw_dir = os.path.join(out_dir, "data_extraction")
+        processed_dir = os.path.join(out_dir, "sentiment_analysis")
+        pages_dir = os.path.join(out_dir, "fixtures", "pages")
+        for d in (raw_dir, processed_dir, pages_dir):
+            os.makedirs(d, exist_ok=True)
+
+        page_quotes = []
+        with open(os.path.join(raw_dir, "quotes.jsonl"), "w", encoding="utf-8") as raw, \
+                open(os.path.join(processed_dir, "processed_quotes.jsonl"), "w", encoding="utf-8") as processed:
+            for q, scores in self.iter_quotes():
+                raw.write(json.dumps(q, ensure_ascii=False) + "\n")
+                processed.write(json.dumps(build_record(q, scores), ensure_ascii=False) + "\n")
+                if len(page_quotes) < pages * quotes_per_page:
+                    page_quotes.append(q)
+
+        # Render the pages with the fixture server's markup
+        fixture_quotes_path = os.path.join(out_dir, "fixtures", "quotes.json")
+        with open(fixture_quotes_path, "w", encoding="utf-8") as f:
+            json.dump(page_quotes, f, ensure_ascii=False)
+
+        site = FixtureSite(fixture_quotes_path, quotes_per_page=quotes_per_page)
+        for n in range(1, site.page_count + 1):
+            with open(os.path.join(pages_dir, f"page_{n}.html"), "w", encoding="utf-8") as f:
+                f.write(site.render_page(n))
+
+        with open(os.path.join(out_dir, "corpus.json"), "w", encoding="utf-8") as f:
+            json.dump({**self.config(), "pages": site.page_count}, f, indent=4)
+
+        print(f"Wrote {self.n_quotes} synthetic quotes and {site.page_count} HTML pages to {out_dir}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic quote corpus for benchmarks.")
+    parser.add_argument("--quotes", type=int, default=10_000)
+    parser.add_argument("--authors", type=int, default=500)
+    parser.add_argument("--tags", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pages", type=int, default=100, help="HTML page fixtures to save")
+    parser.add_argument("--out", required=True, help="Output directory")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    SyntheticCorpus(args.quotes, args.authors, args.tags, args.seed).write(args.out, pages=args.pages)
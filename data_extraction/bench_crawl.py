@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+from fixture_server import FixtureSite, start_server
+
+# Offline crawl benchmark: runs the spider in each mode against the local
+# fixture server and reports pages, quotes, requests and wall time.
+#
+#   python bench_crawl.py --repeat 20 --latency 0.2
+#
+# With --authors each mode is also run with author enrichment, first with an
+# empty author cache and then with the cache that run left behind.
+
+
+def run_crawl(mode, base_url, output_path, extra_settings=(), spider_args=()):
+    cmd = [
+        "scrapy", "crawl", "quotes",
+        "-a", f"mode={mode}",
+        "-a", f"base_url={base_url}",
+        "-O", output_path,
+        "-s", "LOG_LEVEL=WARNING",
+    ]
+    for arg in spider_args:
+        cmd += ["-a", arg]
+    for setting in extra_settings:
+        cmd += ["-s", setting]
+
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True)
+    return time.perf_counter() - start
+
+
+def count_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return len(json.load(f))
+
+
+def count_enriched(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return sum("author_details" in item for item in json.load(f))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the quotes spider against a local fixture server.")
+    parser.add_argument("--modes", nargs="+", default=["follow", "fanout"])
+    parser.add_argument("--repeat", type=int, default=10, help="Repeat quotes.json to make more pages")
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds of delay per response")
+    parser.add_argument("--set", dest="settings", action="append", default=[],
+                        help="Extra Scrapy setting NAME=VALUE passed to every crawl")
+    parser.add_argument("--authors", action="store_true",
+                        help="Also benchmark author enrichment (cold and warm author cache)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    site = FixtureSite(repeat=args.repeat, latency=args.latency)
+    server, base_url = start_server(site)
+    print(f"Fixture server: {site.page_count} pages, {len(site.quotes)} quotes, {args.latency}s latency")
+    if args.authors:
+        # Following the "(about)" link of every quote would cost one request per quote
+        print(f"{len(site.authors)} authors; per-quote author requests would add {len(site.quotes)} requests")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            site.requests_served = 0
+            output_path = os.path.join(tmp, f"{mode}.json")
+            elapsed = run_crawl(mode, base_url, output_path, args.settings)
+            quotes = count_records(output_path)
+            print(
+                f"{mode:>8}: {elapsed:7.2f}s, {quotes} quotes, {site.requests_served} requests, "
+                f"{site.page_count / elapsed:.1f} pages/s"
+            )
+
+            if not args.authors:
+                continue
+
+            cache_path = os.path.join(tmp, f"{mode}_authors.jsonl")
+            for run in ("cold", "warm"):
+                site.requests_served = site.author_requests_served = 0
+                output_path = os.path.join(tmp, f"{mode}_{run}.json")
+                elapsed = run_crawl(mode, base_url, output_path,
+                                    [*args.settings, f"AUTHOR_CACHE_PATH={cache_path}"], ["authors=1"])
+                print(
+                    f"{'+authors':>8}: {elapsed:7.2f}s, {count_enriched(output_path)} quotes enriched, "
+                    f"{site.requests_served} requests ({site.author_requests_served} author pages), {run} cache"
+                )
+
+    server.shutdown()
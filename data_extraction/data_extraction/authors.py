@@ -0,0 +1,80 @@
+import json
+import os
+from twisted.internet import defer
+
+
+class AuthorDetails:
+    """Author details parsed from the "(about)" pages, cached across crawls.
+
+    Stored as one JSON object per line; details are appended as author pages
+    are parsed, so an interrupted crawl keeps everything fetched so far.
+    Also tracks which authors this crawl has requested and the items waiting
+    for them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.details = {}
+        self.requested = set()
+        self.failed = set()
+        self.waiting = {}
+        self.file = None
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.details[record.pop("author")] = record
+        return self
+
+    def open(self):
+        self.file = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def __contains__(self, author):
+        return author in self.details
+
+    def __len__(self):
+        return len(self.details)
+
+    def should_request(self, author):
+        """True the first time this crawl meets an author missing from the cache."""
+        if author in self.details or author in self.requested:
+            return False
+
+        self.requested.add(author)
+        return True
+
+    def when_known(self, author):
+        """Deferred firing with an author's details, or None if there are none."""
+        if author in self.details:
+            return defer.succeed(self.details[author])
+        if author not in self.requested or author in self.failed:
+            return defer.succeed(None)
+
+        d = defer.Deferred()
+        self.waiting.setdefault(author, []).append(d)
+        return d
+
+    def add(self, author, details):
+        self.details[author] = details
+        if self.file:
+            self.file.write(json.dumps({"author": author, **details}, ensure_ascii=False) + "\n")
+            self.file.flush()
+        self.release(author, details)
+
+    def fail(self, author):
+        # Not cached, so the next crawl tries the page again
+        self.failed.add(author)
+        self.release(author, None)
+
+    def release(self, author, details):
+        for d in self.waiting.pop(author, []):
+            d.callback(details)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
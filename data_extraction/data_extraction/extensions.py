@@ -0,0 +1,100 @@
+import cProfile
+import datetime
+import json
+import os
+import sys
+import time
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+# CPU and memory readings are shared with the sentiment pipeline's instrumentation
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "sentiment_analysis"))
+from instrumentation import cpu_seconds, peak_rss_mb
+
+
+class RunMetrics:
+    """Write a JSON metrics report for every crawl.
+
+    Uses the same report layout as sentiment_analysis/instrumentation.py:
+    a "crawl" stage with wall/CPU time, peak RSS, items and bytes
+    downloaded and requested, plus a "score" stage when SentimentScoringPipeline is on.
+    With METRICS_PROFILE the whole crawl is captured with cProfile.
+    """
+
+    def __init__(self, crawler, metrics_dir, profile):
+        self.crawler = crawler
+        self.metrics_dir = metrics_dir
+        self.profiler = cProfile.Profile() if profile else None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("METRICS_ENABLED"):
+            raise NotConfigured
+
+        ext = cls(crawler, crawler.settings.get("METRICS_DIR"), crawler.settings.getbool("METRICS_PROFILE"))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self.start_wall = time.perf_counter()
+        self.start_cpu = cpu_seconds()
+        if self.profiler:
+            self.profiler.enable()
+
+    def spider_closed(self, spider, reason):
+        if self.profiler:
+            self.profiler.disable()
+
+        stats = self.crawler.stats
+        wall = time.perf_counter() - self.start_wall
+        cpu = cpu_seconds() - self.start_cpu
+        rss = peak_rss_mb()
+        stem = f"crawl.{spider.name}_{self.started:%Y%m%d-%H%M%S}"
+        os.makedirs(self.metrics_dir, exist_ok=True)
+
+        profile_path = None
+        if self.profiler:
+            profile_path = os.path.join(self.metrics_dir, f"{stem}.crawl.prof")
+            self.profiler.dump_stats(profile_path)
+
+        stages = [{
+            "name": "crawl",
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "peak_rss_mb": round(rss, 1) if rss is not None else None,
+            "records": stats.get_value("item_scraped_count", 0),
+            "bytes_read": stats.get_value("downloader/response_bytes", 0),
+            # Outgoing request bytes; the feed exporter does not report what it writes
+            "request_bytes": stats.get_value("downloader/request_bytes", 0),
+            "profile": profile_path,
+        }]
+        if stats.get_value("sentiment/scored"):
+            stages.append({
+                "name": "score",
+                "wall_s": round(stats.get_value("sentiment/score_seconds"), 4),
+                "records": stats.get_value("sentiment/scored"),
+            })
+
+        report = {
+            "run": f"crawl.{spider.name}",
+            "started": self.started.isoformat(timespec="seconds"),
+            "status": reason,
+            "wall_s": round(wall, 4),
+            "cpu_s": round(cpu, 4),
+            "stages": stages,
+            "counts": {
+                "responses": stats.get_value("response_received_count", 0),
+                "items_dropped": stats.get_value("item_dropped_count", 0),
+                "dedup_new": stats.get_value("dedup/new", 0),
+                "dedup_dropped": stats.get_value("dedup/dropped", 0),
+                "authors_requested": stats.get_value("authors/requested", 0),
+                "authors_fetched": stats.get_value("authors/fetched", 0),
+            },
+        }
+
+        path = os.path.join(self.metrics_dir, f"{stem}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        spider.logger.info("Run metrics saved: %s", path)
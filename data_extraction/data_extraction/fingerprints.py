@@ -0,0 +1,51 @@
+import hashlib
+import os
+
+
+def quote_fingerprint(text, author):
+    payload = f"{(text or '').strip()}\0{(author or '').strip()}"
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class QuoteFingerprints:
+    """Persistent set of quote fingerprints (text + author).
+
+    Stored as one hex digest per line; new fingerprints are appended as they
+    are added, so an interrupted crawl keeps everything seen so far.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.seen = set()
+        self.file = None
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.seen = {line.strip() for line in f if line.strip()}
+        return self
+
+    def open(self):
+        self.file = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def __contains__(self, fingerprint):
+        return fingerprint in self.seen
+
+    def __len__(self):
+        return len(self.seen)
+
+    def add(self, fingerprint):
+        """Record a fingerprint; returns False if it was already known."""
+        if fingerprint in self.seen:
+            return False
+
+        self.seen.add(fingerprint)
+        if self.file:
+            self.file.write(fingerprint + "\n")
+        return True
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
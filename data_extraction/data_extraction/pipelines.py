@@ -4,10 +4,179 @@
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
 
+import time
+
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
+from scrapy.exceptions import DropItem, NotConfigured
+from twisted.internet import defer, reactor, threads
+from data_extraction.fingerprints import QuoteFingerprints, quote_fingerprint
 
 
 class DataExtractionPipeline:
     def process_item(self, item, spider):
         return item
+
+
+class DeduplicationPipeline:
+    """Drop quotes already emitted by this or any earlier crawl.
+
+    Each item is fingerprinted on text + author and checked against the
+    persistent set at DEDUP_FINGERPRINTS_PATH.
+    """
+
+    def __init__(self, path, stats):
+        self.path = path
+        self.stats = stats
+        self.fingerprints = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("DEDUP_ENABLED"):
+            raise NotConfigured
+        return cls(crawler.settings.get("DEDUP_FINGERPRINTS_PATH"), crawler.stats)
+
+    def open_spider(self, spider):
+        self.fingerprints = QuoteFingerprints(self.path).load().open()
+        spider.logger.info("Loaded %d known quote fingerprints", len(self.fingerprints))
+
+    def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        fingerprint = quote_fingerprint(adapter.get("text"), adapter.get("author"))
+
+        if not self.fingerprints.add(fingerprint):
+            self.stats.inc_value("dedup/dropped")
+            raise DropItem(f"Duplicate quote by {adapter.get('author')}", log_level="DEBUG")
+
+        self.stats.inc_value("dedup/new")
+        return item
+
+    def close_spider(self, spider):
+        self.fingerprints.close()
+
+
+class AuthorEnrichmentPipeline:
+    """Join author details from the "(about)" pages onto quote items.
+
+    The spider (-a authors=1) requests each author page once and records the
+    details in spider.author_details. Items whose author is already known are
+    enriched at once; the others wait on a Deferred for that one page, while
+    the rest of the crawl carries on.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("AUTHOR_ENRICHMENT_ENABLED"):
+            raise NotConfigured
+        return cls(crawler.stats)
+
+    def process_item(self, item, spider):
+        d = spider.author_details.when_known(ItemAdapter(item).get("author"))
+        d.addCallback(self.attach, item)
+        return d
+
+    def attach(self, details, item):
+        if details is None:
+            self.stats.inc_value("authors/missing")
+        else:
+            ItemAdapter(item)["author_details"] = details
+        return item
+
+
+def label_sentiment(compound):
+    # Same thresholds as sentiment_analysis/process_sentiment.py
+    if compound >= 0.05:
+        return "Positive"
+    elif compound <= -0.05:
+        return "Negative"
+    else:
+        return "Neutral"
+
+
+class SentimentScoringPipeline:
+    """Score items with VADER during the crawl.
+
+    Items are buffered into micro-batches that are scored in a worker
+    thread, off the reactor. A batch is flushed when it is full, after
+    SENTIMENT_FLUSH_INTERVAL seconds, or when the spider closes. Enriched
+    items carry the same compound/sentiment/scores fields as
+    processed_quotes.json.
+    """
+
+    def __init__(self, batch_size, flush_interval, stats):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = stats
+        self.sia = None
+        self.buffer = []
+        self.flush_call = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("SENTIMENT_SCORING_ENABLED"):
+            raise NotConfigured
+        return cls(
+            batch_size=crawler.settings.getint("SENTIMENT_BATCH_SIZE", 100),
+            flush_interval=crawler.settings.getfloat("SENTIMENT_FLUSH_INTERVAL", 2.0),
+            stats=crawler.stats,
+        )
+
+    def open_spider(self, spider):
+        # Imported here so the crawl does not need NLTK unless scoring is enabled
+        from nltk.sentiment import SentimentIntensityAnalyzer
+        self.sia = SentimentIntensityAnalyzer()
+
+    def process_item(self, item, spider):
+        d = defer.Deferred()
+        self.buffer.append((item, d))
+
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+        elif self.flush_call is None:
+            self.flush_call = reactor.callLater(self.flush_interval, self.flush)
+
+        return d
+
+    def flush(self):
+        if self.flush_call is not None and self.flush_call.active():
+            self.flush_call.cancel()
+        self.flush_call = None
+
+        batch, self.buffer = self.buffer, []
+        if not batch:
+            return defer.succeed(None)
+
+        items = [item for item, _ in batch]
+        scoring = threads.deferToThread(self.score_batch, items)
+        scoring.addCallbacks(self.release_batch, self.fail_batch,
+                             callbackArgs=(batch,), errbackArgs=(batch,))
+        return scoring
+
+    def score_batch(self, items):
+        start = time.perf_counter()
+        for item in items:
+            adapter = ItemAdapter(item)
+            scores = self.sia.polarity_scores(adapter.get("text") or "")
+            adapter["compound"] = scores["compound"]
+            adapter["sentiment"] = label_sentiment(scores["compound"])
+            adapter["scores"] = scores
+        return items, time.perf_counter() - start
+
+    def release_batch(self, result, batch):
+        # Stats are only touched here, on the reactor thread
+        items, seconds = result
+        self.stats.inc_value("sentiment/scored", len(items))
+        self.stats.inc_value("sentiment/score_seconds", seconds)
+
+        for item, (_, d) in zip(items, batch):
+            d.callback(item)
+
+    def fail_batch(self, failure, batch):
+        for _, d in batch:
+            d.errback(failure)
+
+    def close_spider(self, spider):
+        return self.flush()
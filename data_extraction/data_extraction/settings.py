@@ -26,6 +26,14 @@ ROBOTSTXT_OBEY = True
 CONCURRENT_REQUESTS_PER_DOMAIN = 1
 DOWNLOAD_DELAY = 1
 
+# Fan-out crawl mode (scrapy crawl quotes -a mode=fanout): pages are requested
+# concurrently and AutoThrottle adapts the delay to the server's latency.
+# These replace the two values above only for that mode.
+FANOUT_CONCURRENT_REQUESTS_PER_DOMAIN = 8
+FANOUT_DOWNLOAD_DELAY = 0.25
+FANOUT_TARGET_CONCURRENCY = 4.0
+FANOUT_WINDOW = 8
+
 # Disable cookies (enabled by default)
 #COOKIES_ENABLED = False
 
@@ -52,15 +60,47 @@ DOWNLOAD_DELAY = 1
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
+EXTENSIONS = {
 #    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+    "data_extraction.extensions.RunMetrics": 500,
+}
+
+# Per-crawl JSON metrics report (wall/CPU time, peak memory, items, bytes).
+# METRICS_PROFILE=1 also writes a cProfile dump of the crawl.
+METRICS_ENABLED = True
+METRICS_DIR = "metrics"
+METRICS_PROFILE = False
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
+ITEM_PIPELINES = {
 #    "data_extraction.pipelines.DataExtractionPipeline": 300,
-#}
+    "data_extraction.pipelines.DeduplicationPipeline": 200,
+    "data_extraction.pipelines.AuthorEnrichmentPipeline": 300,
+    "data_extraction.pipelines.SentimentScoringPipeline": 400,
+}
+
+# Incremental crawls (scrapy crawl quotes -a incremental=1 -o quotes.jsonl) drop
+# quotes seen by earlier runs and stop at the first page with nothing new.
+# The spider also turns on DEDUP_ENABLED and the HTTP cache below for that mode.
+DEDUP_ENABLED = False
+DEDUP_FINGERPRINTS_PATH = "seen_quotes.txt"
+
+# Author enrichment (scrapy crawl quotes -a authors=1): adds "author_details"
+# (born_date, born_location, bio) to every item. Author pages are cached in
+# AUTHOR_CACHE_PATH across crawls and use their own download slot, so they
+# are fetched alongside the quote pages rather than queued behind them.
+AUTHOR_ENRICHMENT_ENABLED = False
+AUTHOR_CACHE_PATH = "authors.jsonl"
+DOWNLOAD_SLOTS = {
+    "authors": {"concurrency": 4, "delay": 0.25},
+}
+
+# Inline VADER scoring during the crawl (disabled by default). Enable with
+# `scrapy crawl quotes -s SENTIMENT_SCORING_ENABLED=1 -O ../sentiment_analysis/processed_quotes.json`
+SENTIMENT_SCORING_ENABLED = False
+SENTIMENT_BATCH_SIZE = 100
+SENTIMENT_FLUSH_INTERVAL = 2.0
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -83,5 +123,17 @@ DOWNLOAD_DELAY = 1
 #HTTPCACHE_IGNORE_HTTP_CODES = []
 #HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
 
+# HTTP cache policy for incremental crawls: RFC2616Policy revalidates cached
+# pages with conditional requests (If-None-Match / If-Modified-Since)
+INCREMENTAL_HTTPCACHE_DIR = "httpcache"
+INCREMENTAL_HTTPCACHE_POLICY = "scrapy.extensions.httpcache.RFC2616Policy"
+
+# Streaming handoff to sentiment_analysis (process_sentiment.py --stream):
+# write one JSON object per line as items are scraped instead of a single array.
+# Equivalent to running `scrapy crawl quotes -O quotes.jsonl`.
+#FEEDS = {
+#    "quotes.jsonl": {"format": "jsonlines", "overwrite": True},
+#}
+
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
@@ -1,12 +1,109 @@
 import scrapy
+from urllib.parse import urlparse
+from data_extraction.authors import AuthorDetails
+from data_extraction.fingerprints import QuoteFingerprints, quote_fingerprint
 
 class QuotesSpider(scrapy.Spider):
     name = "quotes"
     allowed_domains = ["quotes.toscrape.com"]
     start_urls = ["https://quotes.toscrape.com/page/1/"]
 
-    def parse(self, response):
-        # Loop through each quote block
+    # Crawl modes:
+    #   follow - chase the li.next link one page at a time (default)
+    #   fanout - request /page/{n}/ directly, keeping `window` pages in flight
+    #            and stopping at the first page with no quotes
+    #
+    # e.g. scrapy crawl quotes -a mode=fanout -a base_url=http://127.0.0.1:8000 -O quotes.json
+    #
+    # With -a incremental=1 either mode also stops at the first page that is
+    # unchanged in the HTTP cache or holds only quotes seen by earlier crawls
+    # (new quotes are expected on the first pages). Append its output with -o.
+    #
+    # With -a authors=1 items also get the author's birth date, birthplace and
+    # bio from their "(about)" page. Each author page is requested once per
+    # crawl, and not at all once it is in AUTHOR_CACHE_PATH;
+    # AuthorEnrichmentPipeline joins the details onto the items.
+
+    def __init__(self, mode="follow", base_url=None, window=None, incremental=False, authors=False,
+                 *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mode = mode
+        self.window = int(window) if window else None
+        self.incremental = str(incremental).lower() in ("1", "true", "yes")
+        self.enrich_authors = str(authors).lower() in ("1", "true", "yes")
+        self.known = None
+        self.author_details = None
+
+        if base_url:
+            self.base_url = base_url.rstrip("/")
+            self.start_urls = [f"{self.base_url}/page/1/"]
+            self.allowed_domains = [urlparse(self.base_url).hostname]
+        else:
+            self.base_url = self.start_urls[0].rsplit("/page/", 1)[0]
+
+        self.highest_scheduled = 0
+        self.last_page = None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+
+        if spider.mode == "fanout":
+            # Concurrency comes from settings.py FANOUT_*; AutoThrottle keeps it polite.
+            # Command-line -s values still take precedence over these.
+            settings = crawler.settings
+            settings.set("AUTOTHROTTLE_ENABLED", True, priority="spider")
+            settings.set("CONCURRENT_REQUESTS_PER_DOMAIN",
+                         settings.getint("FANOUT_CONCURRENT_REQUESTS_PER_DOMAIN"), priority="spider")
+            settings.set("DOWNLOAD_DELAY", settings.getfloat("FANOUT_DOWNLOAD_DELAY"), priority="spider")
+            settings.set("AUTOTHROTTLE_START_DELAY", settings.getfloat("FANOUT_DOWNLOAD_DELAY"), priority="spider")
+            settings.set("AUTOTHROTTLE_TARGET_CONCURRENCY",
+                         settings.getfloat("FANOUT_TARGET_CONCURRENCY"), priority="spider")
+            spider.window = spider.window or settings.getint("FANOUT_WINDOW")
+
+        if spider.incremental:
+            settings = crawler.settings
+            settings.set("DEDUP_ENABLED", True, priority="spider")
+            settings.set("HTTPCACHE_ENABLED", True, priority="spider")
+            settings.set("HTTPCACHE_DIR", settings.get("INCREMENTAL_HTTPCACHE_DIR"), priority="spider")
+            settings.set("HTTPCACHE_POLICY", settings.get("INCREMENTAL_HTTPCACHE_POLICY"), priority="spider")
+
+            # Snapshot of earlier crawls; DeduplicationPipeline records this run's quotes
+            spider.known = QuoteFingerprints(settings.get("DEDUP_FINGERPRINTS_PATH")).load()
+
+        if spider.enrich_authors:
+            settings = crawler.settings
+            settings.set("AUTHOR_ENRICHMENT_ENABLED", True, priority="spider")
+            spider.author_details = AuthorDetails(settings.get("AUTHOR_CACHE_PATH")).load().open()
+            spider.logger.info("Loaded %d cached authors", len(spider.author_details))
+
+        return spider
+
+    def closed(self, reason):
+        if self.author_details:
+            self.author_details.close()
+
+    async def start(self):
+        if self.mode == "fanout":
+            for request in self.schedule_pages_up_to(self.window):
+                yield request
+        else:
+            async for item_or_request in super().start():
+                yield item_or_request
+
+    def page_url(self, n):
+        return f"{self.base_url}/page/{n}/"
+
+    def schedule_pages_up_to(self, n):
+        if self.last_page is not None:
+            n = min(n, self.last_page)
+
+        while self.highest_scheduled < n:
+            self.highest_scheduled += 1
+            page = self.highest_scheduled
+            yield scrapy.Request(self.page_url(page), callback=self.parse_page, cb_kwargs={"page": page})
+
+    def parse_quotes(self, response):
         for quote in response.css("div.quote"):
             yield {
                 "text": quote.css("span.text::text").get(),
@@ -14,7 +111,87 @@ class QuotesSpider(scrapy.Spider):
                 "tags": quote.css("div.tags a.tag::text").getall(),
             }
 
+    def author_requests(self, response):
+        if not self.enrich_authors:
+            return
+
+        for quote in response.css("div.quote"):
+            author = quote.css("small.author::text").get()
+            about = quote.css("small.author ~ a::attr(href)").get()
+            if about and self.author_details.should_request(author):
+                self.crawler.stats.inc_value("authors/requested")
+                # Own download slot (DOWNLOAD_SLOTS["authors"]), so author pages are
+                # fetched in parallel with pagination; dedupe is done above
+                yield scrapy.Request(
+                    response.urljoin(about), callback=self.parse_author, errback=self.author_failed,
+                    cb_kwargs={"author": author}, meta={"download_slot": "authors"},
+                    priority=1, dont_filter=True
+                )
+
+    def parse_author(self, response, author):
+        location = (response.css("span.author-born-location::text").get() or "").strip()
+        self.author_details.add(author, {
+            "born_date": (response.css("span.author-born-date::text").get() or "").strip(),
+            "born_location": location[3:] if location.startswith("in ") else location,
+            "bio": (response.css("div.author-description::text").get() or "").strip(),
+        })
+        self.crawler.stats.inc_value("authors/fetched")
+
+    def author_failed(self, failure):
+        author = failure.request.cb_kwargs["author"]
+        self.logger.warning("No details for author %s: %s", author, failure.value)
+        self.author_details.fail(author)
+
+    def is_unchanged(self, response):
+        # HttpCacheMiddleware flags both fresh hits and 304-revalidated pages
+        return self.incremental and "cached" in response.flags
+
+    def has_nothing_new(self, items):
+        return self.incremental and all(
+            quote_fingerprint(item["text"], item["author"]) in self.known for item in items
+        )
+
+    def parse(self, response):
+        if self.is_unchanged(response):
+            self.logger.info("Page unchanged since last crawl, stopping: %s", response.url)
+            return
+
+        # Loop through each quote block
+        items = list(self.parse_quotes(response))
+        yield from self.author_requests(response)
+        yield from items
+
+        if self.has_nothing_new(items):
+            self.logger.info("No new quotes, stopping: %s", response.url)
+            return
+
         # Follow the "Next" page link when available
         next_page = response.css("li.next a::attr(href)").get()
         if next_page:
             yield response.follow(next_page, callback=self.parse)
+
+    def stop_after(self, page):
+        if self.last_page is None or page < self.last_page:
+            self.last_page = page
+
+    def parse_page(self, response, page):
+        if self.is_unchanged(response):
+            self.stop_after(page)
+            return
+
+        items = list(self.parse_quotes(response))
+
+        if not items:
+            # Stop-on-empty: nothing past this page exists
+            self.stop_after(page - 1)
+            return
+
+        yield from self.author_requests(response)
+        yield from items
+
+        if self.has_nothing_new(items):
+            self.stop_after(page)
+            return
+
+        # Keep `window` pages in flight beyond the furthest page known to have quotes
+        yield from self.schedule_pages_up_to(page + self.window)
@@ -0,0 +1,162 @@
+import argparse
+import hashlib
+import html
+import json
+import re
+import threading
+import time
+import unicodedata
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for quotes.toscrape.com, used to benchmark the spider offline.
+# Pages are built from quotes.json with the same markup the spider parses;
+# pages past the end answer 200 with "No quotes found!" like the real site.
+# Pages carry an ETag and answer conditional requests with 304.
+# Every quote links to an /author/<slug> page; quotes.json has no author
+# details, so those pages hold deterministic placeholder ones.
+#
+#   python fixture_server.py --repeat 20 --latency 0.2
+#   scrapy crawl quotes -a base_url=http://127.0.0.1:8000 -O /tmp/quotes.json
+
+
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+PLACES = ["Ulm, Germany", "London, The United Kingdom", "Paris, France",
+          "Boston, Massachusetts, The United States", "Dublin, Ireland", "Rome, Italy"]
+
+
+def author_slug(name):
+    # Same shape as the real site: "André Gide" -> "Andre-Gide"
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^A-Za-z0-9]+", "-", ascii_name).strip("-")
+
+
+class FixtureSite:
+
+    def __init__(self, quotes_path="quotes.json", repeat=1, quotes_per_page=10, latency=0.0):
+        with open(quotes_path, "r", encoding="utf-8") as f:
+            quotes = json.load(f)
+
+        self.quotes = quotes * repeat
+        self.quotes_per_page = quotes_per_page
+        self.latency = latency
+        self.page_count = -(-len(self.quotes) // quotes_per_page)
+        self.requests_served = 0
+        self.author_requests_served = 0
+        self.lock = threading.Lock()
+        self.authors = {author_slug(q["author"]): q["author"] for q in quotes}
+
+    def render_quote(self, q):
+        tags = "".join(
+            f'<a class="tag" href="/tag/{html.escape(t)}/page/1/">{html.escape(t)}</a>'
+            for t in q.get("tags", [])
+        )
+        return (
+            '<div class="quote">'
+            f'<span class="text">{html.escape(q["text"])}</span>'
+            f'<span>by <small class="author">{html.escape(q["author"])}</small>'
+            f' <a href="/author/{author_slug(q["author"])}">(about)</a></span>'
+            f'<div class="tags">Tags: {tags}</div>'
+            '</div>'
+        )
+
+    def render_page(self, n):
+        start = (n - 1) * self.quotes_per_page
+        page_quotes = self.quotes[start:start + self.quotes_per_page] if n >= 1 else []
+
+        if not page_quotes:
+            body = '<div class="col-md-8">No quotes found!</div>'
+        else:
+            body = "".join(self.render_quote(q) for q in page_quotes)
+            if n < self.page_count:
+                body += f'<nav><ul class="pager"><li class="next"><a href="/page/{n + 1}/">Next</a></li></ul></nav>'
+
+        return f"<html><body>{body}</body></html>"
+
+    def render_author(self, name):
+        seed = int(hashlib.sha1(name.encode("utf-8")).hexdigest(), 16)
+        born = f"{MONTHS[seed % 12]} {seed % 28 + 1}, {1700 + seed % 300}"
+        return (
+            '<html><body><div class="author-details">'
+            f'<h3 class="author-title">{html.escape(name)}</h3>'
+            f'<p><strong>Born:</strong> <span class="author-born-date">{born}</span> '
+            f'<span class="author-born-location">in {PLACES[seed % len(PLACES)]}</span></p>'
+            f'<strong>Description:</strong><div class="author-description">\n'
+            f'        {html.escape(name)} is an author of quotes served by the fixture site.\n    </div>'
+            '</div></body></html>'
+        )
+
+    def handle(self, path, if_none_match=None):
+        """Return (status, content type, body, headers) for a request path."""
+        with self.lock:
+            self.requests_served += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        parts = [p for p in path.split("?")[0].split("/") if p]
+        if path == "/robots.txt":
+            return 200, "text/plain", "User-agent: *\nAllow: /\n", {}
+        if len(parts) == 2 and parts[0] == "page" and parts[1].isdigit():
+            return self.conditional(self.render_page(int(parts[1])), if_none_match)
+        if len(parts) == 2 and parts[0] == "author" and parts[1] in self.authors:
+            with self.lock:
+                self.author_requests_served += 1
+            return self.conditional(self.render_author(self.authors[parts[1]]), if_none_match)
+        return 404, "text/plain", "Not found", {}
+
+    def conditional(self, body, if_none_match):
+        etag = '"%s"' % hashlib.sha1(body.encode("utf-8")).hexdigest()
+        if if_none_match == etag:
+            return 304, "text/html", "", {"ETag": etag}
+        return 200, "text/html", body, {"ETag": etag}
+
+
+def make_handler(site):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            status, content_type, body, headers = site.handle(self.path, self.headers.get("If-None-Match"))
+            payload = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_server(site, host="127.0.0.1", port=0):
+    """Serve `site` on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), make_handler(site))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve a local quotes.toscrape.com stand-in.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--quotes", default="quotes.json", help="Source quotes (default: quotes.json)")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeat the quotes to make more pages")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay per response")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    site = FixtureSite(args.quotes, repeat=args.repeat, latency=args.latency)
+    server, base_url = start_server(site, port=args.port)
+    print(f"Serving {site.page_count} pages at {base_url} (Ctrl+C to stop)")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,244 @@
+import argparse
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from plotly.offline import get_plotlyjs
+from aggregation import SentimentAggregates
+from quote_store import QuoteStore, SENTIMENTS
+import sankey_diagram
+import scatter_plot
+
+# Optional local API for the dashboard: loads the processed quotes once and
+# serves chart-ready aggregate JSON instead of pre-rendered chart HTML.
+# Responses are cached in memory with ETags (conditional requests get 304)
+# and the cache is dropped when the data file changes.
+#
+#   python aggregate_server.py --port 8050
+#   curl http://127.0.0.1:8050/api/sankey?max_authors=20&max_tags=40
+#
+# Endpoints:
+#   /api/summary                          quote, author and tag counts
+#   /api/authors, /api/tags               {name: {sentiment: count}}
+#   /api/sankey?max_authors=&max_tags=    nodes and links
+#   /api/scatter                          length x compound density bins
+#   /                                     live dashboard page using the endpoints above
+
+LIVE_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Quotes: live aggregates</title>
+    <script src="/plotly.min.js"></script>
+    <style>
+        body { font-family: sans-serif; margin: 0 auto; max-width: 1200px; }
+        h1 { font-weight: normal; font-size: 1.4rem; margin: 1rem; }
+        .chart { height: 520px; }
+    </style>
+</head>
+<body>
+    <h1 id="summary">Quotes</h1>
+    <div id="tags" class="chart"></div>
+    <div id="sankey" class="chart"></div>
+    <div id="scatter" class="chart"></div>
+    <script>
+        var colors = {Positive: "#2ecc71", Neutral: "#3498db", Negative: "#e74c3c"};
+        function get(path) { return fetch(path).then(function (r) { return r.json(); }); }
+
+        get("/api/summary").then(function (s) {
+            document.getElementById("summary").textContent =
+                s.quotes + " quotes, " + s.authors + " authors, " + s.tags + " tags";
+        });
+
+        get("/api/tags").then(function (tags) {
+            var names = Object.keys(tags).sort();
+            var traces = Object.keys(colors).map(function (sentiment) {
+                return {type: "bar", name: sentiment, x: names, marker: {color: colors[sentiment]},
+                        y: names.map(function (t) { return tags[t][sentiment]; })};
+            });
+            Plotly.newPlot("tags", traces, {barmode: "stack", title: {text: "Sentiment by tag"}});
+        });
+
+        get("/api/sankey?max_authors=30&max_tags=40").then(function (s) {
+            Plotly.newPlot("sankey", [{
+                type: "sankey",
+                node: {label: s.nodes, pad: 15, thickness: 20},
+                link: {source: s.source, target: s.target, value: s.value, color: "rgba(0,0,255,0.2)"}
+            }], {title: {text: "Author \\u2192 Sentiment \\u2192 Tag"}});
+        });
+
+        get("/api/scatter").then(function (s) {
+            Plotly.newPlot("scatter", [{type: "heatmap", x: s.x_centers, y: s.y_centers, z: s.counts,
+                                        colorscale: "Greys"}],
+                           {title: {text: "Compound score vs quote length"},
+                            xaxis: {title: {text: "Quote length"}}, yaxis: {title: {text: "Compound"}}});
+        });
+    </script>
+</body>
+</html>
+"""
+
+
+class AggregateService:
+
+    # Rendered responses kept; least recently used ones are dropped beyond this
+    MAX_CACHED_RESPONSES = 256
+
+    def __init__(self, json_path="processed_quotes.json"):
+        self.INPUT_JSON_PATH = json_path
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.load()
+
+    def load(self):
+        self.store = QuoteStore(self.INPUT_JSON_PATH).load()
+        self.aggregates = SentimentAggregates(self.store)
+        self.signature = self.store.source_signature()
+        self.cache.clear()
+        print(f"Loaded {len(self.store)} quotes from {self.INPUT_JSON_PATH}")
+
+    def refresh(self):
+        # A changed data file invalidates every cached response
+        if self.store.source_signature() != self.signature:
+            self.load()
+
+    # ---- Payloads ----
+
+    def summary(self, params):
+        return {
+            "quotes": len(self.store),
+            "authors": len(self.aggregates.authors),
+            "tags": len(self.aggregates.tags),
+            "sentiments": dict(zip(SENTIMENTS, map(int, self.aggregates.author_sentiment.sum(axis=0)))),
+        }
+
+    def authors(self, params):
+        return self.aggregates.author_sentiment_counts()
+
+    def tags(self, params):
+        return self.aggregates.tag_sentiment_counts()
+
+    def sankey(self, params):
+        chart = sankey_diagram.DataVisualization(
+            self.aggregates,
+            max_authors=int(params.get("max_authors", 100)),
+            max_tags=int(params.get("max_tags", 200)),
+        )
+        return {
+            "nodes": chart.nodes,
+            "n_authors": len(chart.authors),
+            "n_tags": len(chart.tags),
+            "source": chart.source,
+            "target": chart.target,
+            "value": chart.value,
+        }
+
+    def scatter(self, params):
+        bins = scatter_plot.DataVisualization(self.store, large=True).plot_data
+        return {
+            "x_centers": bins["x_centers"].round(2).tolist(),
+            "y_centers": bins["y_centers"].round(4).tolist(),
+            "counts": bins["counts"].astype(int).tolist(),
+        }
+
+    ENDPOINTS = {
+        "/api/summary": summary,
+        "/api/authors": authors,
+        "/api/tags": tags,
+        "/api/sankey": sankey,
+        "/api/scatter": scatter,
+    }
+
+    # Query parameters each endpoint reads; all others are ignored, also in the cache key
+    ENDPOINT_PARAMS = {
+        "/api/sankey": ("max_authors", "max_tags"),
+    }
+
+    def render(self, path, params):
+        """(content type, body) for a path, or None if there is no such resource."""
+        if path == "/":
+            return "text/html", LIVE_PAGE.encode("utf-8")
+        if path == "/plotly.min.js":
+            return "application/javascript", get_plotlyjs().encode("utf-8")
+        if path in self.ENDPOINTS:
+            payload = self.ENDPOINTS[path](self, params)
+            return "application/json", json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return None
+
+    def handle(self, path, if_none_match=None):
+        """Return (status, content type, body bytes, headers) for a request path."""
+        url = urlsplit(path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        params = {key: query[key] for key in self.ENDPOINT_PARAMS.get(url.path, ()) if key in query}
+        key = (url.path, tuple(sorted(params.items())))
+
+        with self.lock:
+            self.refresh()
+            if key not in self.cache:
+                try:
+                    rendered = self.render(url.path, params)
+                except ValueError as e:
+                    return 400, "text/plain", str(e).encode("utf-8"), {}
+                if rendered is None:
+                    return 404, "text/plain", b"Not found", {}
+                content_type, body = rendered
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                self.cache[key] = (content_type, body, etag)
+                if len(self.cache) > self.MAX_CACHED_RESPONSES:
+                    self.cache.popitem(last=False)
+            self.cache.move_to_end(key)
+            content_type, body, etag = self.cache[key]
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Access-Control-Allow-Origin": "*"}
+        if if_none_match == etag:
+            return 304, content_type, b"", headers
+        return 200, content_type, body, headers
+
+
+def make_handler(service):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            status, content_type, body, headers = service.handle(self.path, self.headers.get("If-None-Match"))
+            self.send_response(status)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_server(service, host="127.0.0.1", port=0):
+    """Serve `service` on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve chart-ready aggregate JSON for the dashboard.")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--input", default="processed_quotes.json", help="Processed quotes (.json or .jsonl)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    service = AggregateService(args.input)
+    server, base_url = start_server(service, port=args.port)
+    print(f"Serving aggregates at {base_url} (Ctrl+C to stop)")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
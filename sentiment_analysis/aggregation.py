@@ -0,0 +1,197 @@
+import heapq
+import os
+import numpy as np
+from quote_store import QuoteStore, SENTIMENTS
+
+
+# Bucket names for entities folded away by the top-K limits
+OTHER_AUTHORS = "Other authors"
+OTHER_TAGS = "Other tags"
+
+
+def top_k_codes(counts, k):
+    """Codes of the k largest counts (all codes when k is None or not exceeded)."""
+    if k is None or len(counts) <= k:
+        return set(range(len(counts)))
+    return set(heapq.nlargest(k, range(len(counts)), key=counts.__getitem__))
+
+
+class SentimentAggregates:
+    """All chart group-bys, computed in one pass over a QuoteStore.
+
+    The quote columns are read once for author x sentiment, and the tag
+    columns once for a sparse author x tag x sentiment cube. Every other
+    view (tag x sentiment, sentiment -> tag links, per-author totals) is
+    derived from those two results, never from the raw quotes. The result
+    is cached next to the store, so it is recomputed only when the store is
+    rebuilt.
+    """
+
+    CACHE_FILE = "aggregates.npz"
+
+    def __init__(self, store):
+        self.authors = store.authors
+        self.tags = store.tags
+        self.CACHE_PATH = os.path.join(store.STORE_DIR, self.CACHE_FILE)
+
+        if os.path.exists(self.CACHE_PATH):
+            self.load_cache()
+        else:
+            self.compute(store)
+            self.save_cache()
+
+        self.derive()
+
+    @classmethod
+    def from_json(cls, json_path="processed_quotes.json"):
+        return cls(QuoteStore(json_path).load())
+
+    def compute(self, store):
+        n_sentiments = len(SENTIMENTS)
+        n_tags = len(self.tags)
+
+        self.author_sentiment = np.bincount(
+            store.author_codes * n_sentiments + store.sentiment_codes,
+            minlength=len(self.authors) * n_sentiments
+        ).reshape(-1, n_sentiments)
+
+        # Encode (author, tag, sentiment) as one integer per tag occurrence
+        rows = store.tag_quote_index()
+        keys = (
+            store.author_codes[rows].astype(np.int64) * n_tags + store.tag_codes
+        ) * n_sentiments + store.sentiment_codes[rows]
+        keys, self.cube_counts = np.unique(keys, return_counts=True)
+
+        author_tag, self.cube_sentiments = np.divmod(keys, n_sentiments)
+        self.cube_authors, self.cube_tags = np.divmod(author_tag, n_tags)
+
+    def derive(self):
+        n_sentiments = len(SENTIMENTS)
+
+        self.author_counts = self.author_sentiment.sum(axis=1)
+        self.tag_sentiment = np.bincount(
+            self.cube_tags * n_sentiments + self.cube_sentiments,
+            weights=self.cube_counts,
+            minlength=len(self.tags) * n_sentiments
+        ).astype(np.int64).reshape(-1, n_sentiments)
+
+    def save_cache(self):
+        np.savez(
+            self.CACHE_PATH,
+            author_sentiment=self.author_sentiment,
+            cube_authors=self.cube_authors,
+            cube_tags=self.cube_tags,
+            cube_sentiments=self.cube_sentiments,
+            cube_counts=self.cube_counts,
+        )
+
+    def load_cache(self):
+        with np.load(self.CACHE_PATH) as data:
+            self.author_sentiment = data["author_sentiment"]
+            self.cube_authors = data["cube_authors"]
+            self.cube_tags = data["cube_tags"]
+            self.cube_sentiments = data["cube_sentiments"]
+            self.cube_counts = data["cube_counts"]
+
+    # ---- Slices handed to the individual charts ----
+
+    def author_sentiment_counts(self):
+        return {
+            author: dict(zip(SENTIMENTS, map(int, counts)))
+            for author, counts in zip(self.authors, self.author_sentiment)
+        }
+
+    def tag_sentiment_counts(self):
+        return {
+            tag: dict(zip(SENTIMENTS, map(int, counts)))
+            for tag, counts in zip(self.tags, self.tag_sentiment)
+        }
+
+    def author_sentiment_records(self):
+        return [
+            {"author": author, "sentiment": sentiment, "count": count}
+            for author, counts in self.author_sentiment_counts().items()
+            for sentiment, count in counts.items()
+        ]
+
+    def tag_sentiment_records(self):
+        return [
+            {"tag": tag, "sentiment": sentiment, "count": count}
+            for tag, counts in self.tag_sentiment_counts().items()
+            for sentiment, count in counts.items()
+        ]
+
+    # The optional max_* limits keep the top K entities of a level by quote
+    # count and fold the rest into one "Other" node, so figure size stays
+    # bounded however many distinct authors and tags the data has.
+
+    def author_names(self, max_authors=None):
+        """Display name per author code, with non-top authors mapped to OTHER_AUTHORS."""
+        keep = top_k_codes(self.author_counts.tolist(), max_authors)
+        return [name if code in keep else OTHER_AUTHORS for code, name in enumerate(self.authors)]
+
+    def tag_names(self, max_tags=None):
+        """Display name per tag code, with non-top tags mapped to OTHER_TAGS."""
+        keep = top_k_codes(self.tag_sentiment.sum(axis=1).tolist(), max_tags)
+        return [name if code in keep else OTHER_TAGS for code, name in enumerate(self.tags)]
+
+    def author_tag_sentiment_records(self, max_authors=None, max_tags_per_author=None):
+        authors = self.author_names(max_authors)
+
+        # Fold authors first, then keep each author's top tags
+        cells = {}
+        for a, t, s, c in zip(
+            self.cube_authors.tolist(), self.cube_tags.tolist(),
+            self.cube_sentiments.tolist(), self.cube_counts.tolist()
+        ):
+            key = (authors[a], self.tags[t])
+            cells.setdefault(key, [0] * len(SENTIMENTS))[s] += c
+
+        if max_tags_per_author is not None:
+            tag_totals = {}
+            for (author, tag), counts in cells.items():
+                tag_totals.setdefault(author, {})[tag] = sum(counts)
+
+            folded = {}
+            for author, totals in tag_totals.items():
+                keep = set(heapq.nlargest(max_tags_per_author, totals, key=totals.__getitem__))
+                for tag in totals:
+                    target = (author, tag if tag in keep else OTHER_TAGS)
+                    counts = folded.setdefault(target, [0] * len(SENTIMENTS))
+                    for s, c in enumerate(cells[(author, tag)]):
+                        counts[s] += c
+            cells = folded
+
+        return [
+            {"author": author, "tag": tag, "sentiment": SENTIMENTS[s], "count": c}
+            for (author, tag), counts in cells.items()
+            for s, c in enumerate(counts)
+            if c
+        ]
+
+    def author_count_records(self, max_authors=None):
+        counts = {}
+        for author, count in zip(self.author_names(max_authors), self.author_counts.tolist()):
+            counts[author] = counts.get(author, 0) + count
+
+        return [{"author": author, "count": count} for author, count in counts.items()]
+
+    def sentiment_tag_links(self, max_tags=None):
+        """(sentiment, tag, count) for every non-empty sentiment -> tag link."""
+        tags = self.tag_names(max_tags)
+        links = {}
+        for t, s in zip(*np.nonzero(self.tag_sentiment)):
+            key = (SENTIMENTS[s], tags[t])
+            links[key] = links.get(key, 0) + int(self.tag_sentiment[t, s])
+
+        return [(sentiment, tag, count) for (sentiment, tag), count in links.items()]
+
+    def author_sentiment_links(self, max_authors=None):
+        """(author, sentiment, count) for every non-empty author -> sentiment link."""
+        authors = self.author_names(max_authors)
+        links = {}
+        for a, s in zip(*np.nonzero(self.author_sentiment)):
+            key = (authors[a], SENTIMENTS[s])
+            links[key] = links.get(key, 0) + int(self.author_sentiment[a, s])
+
+        return [(author, sentiment, count) for (author, sentiment), count in links.items()]
@@ -1,13 +1,13 @@
-import json
 import plotly.express as px
-from collections import defaultdict
-import os
+from aggregation import SentimentAggregates
+from chart_output import write_figure
+from instrumentation import RunMetrics
 
 class DataVisualization:
 
-    def __init__(self):
+    def __init__(self, aggregates=None):
         self.INPUT_JSON_PATH = "processed_quotes.json"
-        self.quotes = self.load_json()
+        self.aggregates = aggregates or self.load_aggregates()
         self.records = self.prepare_data()
 
         # Consistent sentiment colors
@@ -17,32 +17,11 @@ class DataVisualization:
             "Negative": "#e74c3c"   # red
         }
 
-    def load_json(self):
-        if not os.path.exists(self.INPUT_JSON_PATH):
-            print(f"Processed JSON file not found: {self.INPUT_JSON_PATH}")
-            exit()
-
-        with open(self.INPUT_JSON_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
+    def load_aggregates(self):
+        return SentimentAggregates.from_json(self.INPUT_JSON_PATH)
 
     def prepare_data(self):
-        author_sentiment = defaultdict(lambda: {"Positive": 0, "Neutral": 0, "Negative": 0})
-
-        for q in self.quotes:
-            author = q.get("author", "Unknown")
-            sentiment = q.get("sentiment", "Neutral")
-            author_sentiment[author][sentiment] += 1
-
-        records = []
-        for author, sent_counts in author_sentiment.items():
-            for sentiment, count in sent_counts.items():
-                records.append({
-                    "author": author,
-                    "sentiment": sentiment,
-                    "count": count
-                })
-        
-        return records
+        return self.aggregates.author_sentiment_records()
 
     def create_bar_chart(self):
         # Order authors alphabetically
@@ -66,10 +45,12 @@ class DataVisualization:
         )
 
         output_dir = "../visualizations/bar_charts/"
-        os.makedirs(output_dir, exist_ok=True)
-
-        fig.write_html(os.path.join(output_dir, "bar_chart_author.html"))
+        write_figure(fig, output_dir, "bar_chart_author.html")
         print("Bar chart saved as HTML!")
 
 if __name__ == '__main__':
-    DataVisualization().create_bar_chart()
+    with RunMetrics("bar_chart_author") as metrics:
+        with metrics.stage("prepare"):
+            chart = DataVisualization()
+        with metrics.stage("render"):
+            chart.create_bar_chart()
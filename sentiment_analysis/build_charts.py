@@ -0,0 +1,198 @@
+import argparse
+import importlib
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from aggregation import SentimentAggregates
+import chart_manifest
+import chart_output
+from chart_manifest import BuildManifest, source_digest
+from instrumentation import RunMetrics
+from quote_store import QuoteStore
+from quote_warehouse import WarehouseAggregates
+from run_history import RunHistory
+from streaming_stats import SketchAggregates
+
+# name: (module, class, render method, input, prepared attributes)
+# "aggregates" charts only need the shared SentimentAggregates;
+# "store" charts read individual quotes from the memory-mapped QuoteStore;
+# "history" charts read the run history the parent records (run_history.py).
+# The prepared attributes are hashed into the build manifest; a chart is only
+# re-rendered when they (or its code or render options) change. Pie charts
+# keep a manifest per author/tag themselves (None here).
+CHARTS = {
+    "bar_author": ("bar_chart_author", "DataVisualization", "create_bar_chart", "aggregates", ("records",)),
+    "bar_tag": ("bar_chart_tag", "DataVisualizationTags", "create_bar_chart", "aggregates", ("records",)),
+    "pie_author": ("pie_chart_author", "DataVisualizationAuthors", "generate_all_charts", "aggregates", None),
+    "pie_tag": ("pie_chart_tag", "DataVisualizationTags", "generate_all_charts", "aggregates", None),
+    "sankey": ("sankey_diagram", "DataVisualization", "create_sankey_diagram", "aggregates",
+               ("nodes", "source", "target", "value")),
+    "sunburst": ("sunburst_chart", "DataVisualization", "create_suburst_chart", "aggregates", ("plot_data",)),
+    "treemap": ("treemap", "DataVisualization", "create_treemap", "aggregates", ("plot_data",)),
+    "scatter": ("scatter_plot", "DataVisualization", "create_scatter_plot", "store", ("large", "plot_data")),
+    "word_cloud": ("word_cloud_viz", "DataVisualization", "create_word_cloud", "store", ("sentiment_frequencies",)),
+    "change": ("sentiment_change", "DataVisualization", "create_change_charts", "history", ("plot_data",)),
+}
+
+# Per-worker state, set once by _init_worker
+_aggregates = None
+_json_path = None
+_profile_stage = None
+
+
+def _init_worker(aggregates, json_path, plotlyjs_mode, consolidate, profile_stage, force):
+    global _aggregates, _json_path, _profile_stage
+    _aggregates = aggregates
+    _json_path = json_path
+    _profile_stage = profile_stage
+    chart_output.PLOTLYJS_MODE = plotlyjs_mode
+    chart_output.CONSOLIDATE_ENTITY_PAGES = consolidate
+    chart_manifest.FORCE_REBUILD = force
+
+
+def render_chart(name):
+    module_name, class_name, method_name, source, inputs = CHARTS[name]
+
+    # Measured here in the worker; the parent merges the stages into its report
+    metrics = RunMetrics(name, profile_stage=_profile_stage, save=False)
+    with metrics.stage(f"{name}.prepare"):
+        chart_class = getattr(importlib.import_module(module_name), class_name)
+        if source == "aggregates":
+            chart = chart_class(aggregates=_aggregates)
+        elif source == "history":
+            chart = chart_class()
+        else:
+            # Already built by the parent, so this only memory-maps the columns
+            chart = chart_class(store=QuoteStore(_json_path).load())
+    with metrics.stage(f"{name}.render"):
+        if inputs is None:
+            getattr(chart, method_name)()
+            manifest = chart.manifest
+        else:
+            manifest = BuildManifest(name, source_digest(chart_class, chart_output))
+            manifest.render(name, [getattr(chart, attr) for attr in inputs], getattr(chart, method_name))
+            manifest.save()
+
+    return name, metrics.stages, (manifest.rebuilt, manifest.skipped)
+
+
+class ChartBuilder:
+
+    def __init__(self, charts=None, workers=None, plotlyjs_mode=None, consolidate=None, profile_stage=None,
+                 force=None, sketch_path=None, warehouse_path=None, record_history=True):
+        self.INPUT_JSON_PATH = "processed_quotes.json"
+        # Aggregates from a saved streaming_stats.py sketch (approximate) or from GROUP BY queries on a
+        # quote_warehouse.py database; there is no quote store then, so charts reading it are excluded
+        self.SKETCH_PATH = sketch_path
+        self.WAREHOUSE_PATH = warehouse_path
+        if sketch_path or warehouse_path:
+            source = "a sketch" if sketch_path else "the warehouse"
+            store_charts = [name for name in charts or [] if CHARTS[name][3] == "store"]
+            if store_charts:
+                raise ValueError(
+                    f"Cannot build {', '.join(store_charts)} from {source}; these charts read the quote store"
+                )
+            charts = charts or [name for name, chart in CHARTS.items() if chart[3] != "store"]
+        self.charts = charts or list(CHARTS)
+        # Sketch counts are approximate, so only exact aggregates are recorded
+        self.record_history = record_history and not sketch_path
+        self.workers = workers
+        self.plotlyjs_mode = plotlyjs_mode or chart_output.PLOTLYJS_MODE
+        self.consolidate = chart_output.CONSOLIDATE_ENTITY_PAGES if consolidate is None else consolidate
+        self.profile_stage = profile_stage
+        self.force = chart_manifest.FORCE_REBUILD if force is None else force
+
+    def build(self):
+        start = time.perf_counter()
+        metrics = RunMetrics("build_charts", profile_stage=self.profile_stage)
+
+        # Load and aggregate once in the parent; workers reuse both
+        with metrics.stage("load") as stage:
+            if self.SKETCH_PATH:
+                aggregates = SketchAggregates.load(self.SKETCH_PATH)
+                stage.records = aggregates.stats.quotes
+            elif self.WAREHOUSE_PATH:
+                aggregates = WarehouseAggregates.from_path(self.WAREHOUSE_PATH)
+                stage.records = int(aggregates.author_counts.sum())
+            else:
+                store = QuoteStore(self.INPUT_JSON_PATH).load()
+                aggregates = SentimentAggregates(store)
+                stage.records = len(store)
+        print(f"Loaded {stage.records} quotes in {time.perf_counter() - start:.2f}s")
+
+        if self.record_history:
+            # Before rendering, so the change charts compare against this run
+            with metrics.stage("history"):
+                RunHistory().record(aggregates)
+
+        if self.plotlyjs_mode == "shared":
+            # Written once here rather than racing from every worker
+            chart_output.ensure_shared_plotlyjs()
+
+        timings = {}
+        outputs = {}
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(aggregates, self.INPUT_JSON_PATH, self.plotlyjs_mode, self.consolidate,
+                      metrics.profile_stage, self.force)
+        ) as pool:
+            futures = [pool.submit(render_chart, name) for name in self.charts]
+            for future in as_completed(futures):
+                name, stages, outputs[name] = future.result()
+                timings[name] = sum(stage["wall_s"] for stage in stages)
+                metrics.add_stages(stages)
+
+        self.report(timings, outputs, time.perf_counter() - start)
+        metrics.save()
+        return timings
+
+    def report(self, timings, outputs, total):
+        # outputs: (rebuilt, skipped) per chart, counted per author/tag for pie charts
+        print("\nChart build times:")
+        for name in self.charts:
+            rebuilt, skipped = outputs[name]
+            status = "rebuilt" if rebuilt and not skipped else "unchanged" if not rebuilt else f"{rebuilt} rebuilt, {skipped} unchanged"
+            print(f"  {name:<12} {timings[name]:8.2f}s  {status}")
+        print(f"  {'total':<12} {total:8.2f}s (wall)")
+
+        rebuilt = sum(r for r, _ in outputs.values())
+        skipped = sum(s for _, s in outputs.values())
+        print(f"\n{rebuilt} outputs rebuilt, {skipped} skipped as unchanged")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build all charts from one load of the processed quotes.")
+    parser.add_argument("--charts", nargs="+", choices=list(CHARTS), metavar="CHART",
+                        help=f"Charts to build (default: all). Choices: {', '.join(CHARTS)}")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Rendering processes (default: one per CPU)")
+    parser.add_argument("--plotlyjs", choices=["inline", "shared", "cdn"], default=None,
+                        help="Embed plotly.js in every file, reference one shared local copy, or use the CDN")
+    parser.add_argument("--consolidated", action="store_true", default=None,
+                        help="Write one selector page per pie chart family instead of one file per author/tag")
+    parser.add_argument("--profile-stage", metavar="STAGE",
+                        help="Capture a cProfile dump of one stage, e.g. load or sankey.render")
+    parser.add_argument("--force", action="store_true", default=None,
+                        help="Re-render every chart even if its inputs are unchanged")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Do not record this run's sentiment counts in the run history")
+    parser.add_argument("--sketch", metavar="PATH",
+                        help="Build the aggregate charts from a streaming_stats.py sketch (approximate, fixed memory)")
+    parser.add_argument("--warehouse", metavar="PATH",
+                        help="Build the aggregate charts from GROUP BY queries on a quote_warehouse.py database")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    ChartBuilder(
+        charts=args.charts,
+        workers=args.workers,
+        plotlyjs_mode=args.plotlyjs,
+        consolidate=args.consolidated,
+        profile_stage=args.profile_stage,
+        force=args.force,
+        sketch_path=args.sketch,
+        warehouse_path=args.warehouse,
+        record_history=not args.no_history
+    ).build()
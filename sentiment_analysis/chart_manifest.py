@@ -0,0 +1,100 @@
+import hashlib
+import inspect
+import json
+import os
+import chart_output
+
+MANIFEST_DIR = os.path.join(chart_output.VISUALIZATIONS_DIR, ".manifests")
+
+# Re-render everything, ignoring recorded digests (build_charts.py --force)
+FORCE_REBUILD = os.environ.get("FORCE_REBUILD", "") == "1"
+
+
+def source_digest(*objects):
+    """Hash of the source files defining objects, so code changes also rebuild."""
+    h = hashlib.sha256()
+    for obj in objects:
+        with open(inspect.getsourcefile(obj), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def input_digest(inputs, code_digest):
+    """Hash of a chart's prepared input, its render options and its code."""
+    options = {
+        "plotlyjs": chart_output.PLOTLYJS_MODE,
+        "consolidate": chart_output.CONSOLIDATE_ENTITY_PAGES,
+        "code": code_digest,
+    }
+    h = hashlib.sha256()
+    h.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+    h.update(json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=chart_output.json_default).encode("utf-8"))
+    return h.hexdigest()
+
+
+class BuildManifest:
+    """Record of what each output of one chart was last rendered from.
+
+    Every entry maps a key (the chart, or one entity of a per-entity chart
+    family) to the digest of its input and the files it wrote. One manifest
+    file per chart keeps concurrent chart builds from contending.
+    """
+
+    def __init__(self, chart_name, code_digest, manifest_dir=None):
+        self.MANIFEST_PATH = os.path.join(manifest_dir or MANIFEST_DIR, f"{chart_name}.json")
+        self.code_digest = code_digest
+        self.entries = {}
+        self.rebuilt = 0
+        self.skipped = 0
+
+        if os.path.exists(self.MANIFEST_PATH):
+            with open(self.MANIFEST_PATH, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def is_current(self, key, digest):
+        entry = self.entries.get(key)
+        return (
+            entry is not None
+            and entry["digest"] == digest
+            and all(os.path.exists(path) for path in entry["files"])
+        )
+
+    def render(self, key, inputs, render):
+        """Call render() unless key's inputs are unchanged; True if it rendered."""
+        digest = input_digest(inputs, self.code_digest)
+        if not FORCE_REBUILD and self.is_current(key, digest):
+            self.skipped += 1
+            return False
+
+        with chart_output.collect_outputs() as files:
+            render()
+
+        # Files the previous render wrote but this one did not are stale
+        old = self.entries.get(key, {"files": []})["files"]
+        self.delete_files(set(old) - set(files))
+
+        self.entries[key] = {"digest": digest, "files": sorted(set(files))}
+        self.rebuilt += 1
+        return True
+
+    def prune(self, keep):
+        """Drop entries not in keep and delete their files; returns how many."""
+        stale = [key for key in self.entries if key not in keep]
+        stale_files = {path for key in stale for path in self.entries.pop(key)["files"]}
+
+        # Entity names can share a file name; never delete a file a kept entry still owns
+        kept_files = {path for entry in self.entries.values() for path in entry["files"]}
+        self.delete_files(stale_files - kept_files)
+        return len(stale)
+
+    def delete_files(self, paths):
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.MANIFEST_PATH), exist_ok=True)
+        tmp_path = f"{self.MANIFEST_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, self.MANIFEST_PATH)
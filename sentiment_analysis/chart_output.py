@@ -0,0 +1,166 @@
+import html
+import json
+import os
+from contextlib import contextmanager
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+from instrumentation import record_written
+
+VISUALIZATIONS_DIR = os.path.join("..", "visualizations")
+SHARED_PLOTLYJS_PATH = os.path.join(VISUALIZATIONS_DIR, "assets", "plotly.min.js")
+
+# How chart HTML gets plotly.js:
+#   inline - embedded in every file (Plotly's default, self-contained)
+#   shared - written once to visualizations/assets/plotly.min.js and referenced
+#   cdn    - loaded from the Plotly CDN
+PLOTLYJS_MODE = os.environ.get("PLOTLYJS_MODE", "inline")
+
+# Per-entity chart families (pie charts per author/tag) write one selector
+# page backed by a JSON payload instead of one HTML file per entity
+CONSOLIDATE_ENTITY_PAGES = os.environ.get("CONSOLIDATE_ENTITY_PAGES", "") == "1"
+
+# Output lists of the open collect_outputs() blocks (see chart_manifest.py)
+_output_collectors = []
+
+
+def record_output(path):
+    """Note a file written by a chart, for run metrics and the build manifest."""
+    record_written(path)
+    for files in _output_collectors:
+        files.append(os.path.normpath(path))
+
+
+@contextmanager
+def collect_outputs():
+    """Collect the paths of all chart files written inside the block."""
+    files = []
+    _output_collectors.append(files)
+    try:
+        yield files
+    finally:
+        _output_collectors.remove(files)
+
+
+def ensure_shared_plotlyjs():
+    """Write the shared plotly.js asset unless an identical copy exists."""
+    source = get_plotlyjs().encode("utf-8")
+
+    if os.path.exists(SHARED_PLOTLYJS_PATH) and os.path.getsize(SHARED_PLOTLYJS_PATH) == len(source):
+        with open(SHARED_PLOTLYJS_PATH, "rb") as f:
+            if f.read() == source:
+                return SHARED_PLOTLYJS_PATH
+
+    os.makedirs(os.path.dirname(SHARED_PLOTLYJS_PATH), exist_ok=True)
+    tmp_path = f"{SHARED_PLOTLYJS_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(source)
+    os.replace(tmp_path, SHARED_PLOTLYJS_PATH)
+    return SHARED_PLOTLYJS_PATH
+
+
+def plotlyjs_include(output_dir):
+    """Value for write_html(include_plotlyjs=...) for a file in output_dir."""
+    if PLOTLYJS_MODE == "shared":
+        ensure_shared_plotlyjs()
+        return os.path.relpath(SHARED_PLOTLYJS_PATH, output_dir).replace(os.sep, "/")
+    if PLOTLYJS_MODE == "cdn":
+        return "cdn"
+    return True
+
+
+def plotlyjs_script_tag(output_dir):
+    include = plotlyjs_include(output_dir)
+    if include is True:
+        return f"<script>{get_plotlyjs()}</script>"
+    if include == "cdn":
+        return f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"></script>'
+    return f'<script src="{include}"></script>'
+
+
+def write_figure(fig, output_dir, filename, **write_html_kwargs):
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, filename)
+    fig.write_html(
+        path,
+        include_plotlyjs=plotlyjs_include(output_dir),
+        **write_html_kwargs
+    )
+    record_output(path)
+
+
+ENTITY_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>{title}</title>
+    {plotlyjs}
+    <style>
+        body {{ font-family: sans-serif; margin: 0; }}
+        #entity-select {{ display: block; margin: 1rem auto; padding: 0.4rem; min-width: 260px; }}
+        #chart {{ width: 100%; height: 85vh; }}
+    </style>
+</head>
+<body>
+    <select id="entity-select" aria-label="{select_label}"></select>
+    <div id="chart"></div>
+    <script id="chart-payload" type="application/json">{payload}</script>
+    <script>
+        var payload = JSON.parse(document.getElementById("chart-payload").textContent);
+        var select = document.getElementById("entity-select");
+
+        payload.names.forEach(function (name, i) {{
+            select.add(new Option(name, i));
+        }});
+
+        function show(i) {{
+            var fig = JSON.parse(JSON.stringify(payload.template));
+            fig.data[0].values = payload.values[i];
+            fig.layout.title = {{text: payload.titles[i]}};
+            Plotly.react("chart", fig.data, fig.layout, {{responsive: true}});
+        }}
+
+        // Allow linking straight to an entity: all_authors.html#Albert Einstein
+        var initial = payload.names.indexOf(decodeURIComponent(location.hash.slice(1)));
+        select.value = Math.max(initial, 0);
+        select.addEventListener("change", function () {{ show(select.value); }});
+        show(select.value);
+    </script>
+</body>
+</html>
+"""
+
+
+def write_entity_page(template_fig, entities, output_dir, filename, title, select_label):
+    """Write one selector page for a family of single-trace charts.
+
+    template_fig supplies the trace style and layout; entities maps each
+    entity name to (values, chart title) for the first trace.
+    """
+    payload = {
+        "template": template_fig.to_plotly_json(),
+        "names": list(entities),
+        "values": [values for values, _ in entities.values()],
+        "titles": [chart_title for _, chart_title in entities.values()],
+    }
+    payload_json = json.dumps(payload, separators=(",", ":"), default=json_default)
+
+    page = ENTITY_PAGE_TEMPLATE.format(
+        title=html.escape(title),
+        select_label=html.escape(select_label),
+        plotlyjs=plotlyjs_script_tag(output_dir),
+        # Keep the payload from closing its <script> element early
+        payload=payload_json.replace("</", "<\\/"),
+    )
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, filename)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(page)
+    record_output(path)
+
+
+def json_default(value):
+    """json.dumps default for NumPy values; also used to hash chart inputs (chart_manifest.py)."""
+    # Plotly figures may hold NumPy values
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,175 @@
+import cProfile
+import datetime
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then reported as None
+    resource = None
+
+# Lightweight per-stage run metrics.
+#
+#   with RunMetrics("process_sentiment") as metrics:
+#       with metrics.stage("score") as stage:
+#           ...
+#           stage.records = len(processed)
+#
+# Every stage records wall time, CPU time (including reaped child processes,
+# e.g. a scoring pool), peak RSS, record count and bytes read/written. On exit
+# the run is written as JSON to METRICS_DIR. Set PIPELINE_PROFILE_STAGE to a
+# stage name to capture a cProfile dump of that stage next to the report.
+
+METRICS_DIR = os.environ.get("PIPELINE_METRICS_DIR", "metrics")
+PROFILE_STAGE = os.environ.get("PIPELINE_PROFILE_STAGE")
+
+# Innermost open stage in this process; file writers report bytes to it
+_active_stages = []
+
+
+def cpu_seconds():
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def reset_peak_rss():
+    # Linux lets a process reset its high-water mark, making the peak per stage
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where it cannot be read."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return rss / 1024 ** 2 if sys.platform == "darwin" else rss / 1024
+
+
+def record_read(path):
+    """Count a file read by the current stage, if any."""
+    if _active_stages and os.path.exists(path):
+        _active_stages[-1].bytes_read += os.path.getsize(path)
+
+
+def record_written(path):
+    """Count a file written by the current stage, if any."""
+    if _active_stages and os.path.exists(path):
+        _active_stages[-1].bytes_written += os.path.getsize(path)
+
+
+class Stage:
+
+    def __init__(self, name):
+        self.name = name
+        self.records = None
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.profile_path = None
+
+        self.wall_s = None
+        self.cpu_s = None
+        self.peak_rss_mb = None
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "wall_s": round(self.wall_s, 4),
+            "cpu_s": round(self.cpu_s, 4),
+            "peak_rss_mb": round(self.peak_rss_mb, 1) if self.peak_rss_mb is not None else None,
+            "records": self.records,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "profile": self.profile_path,
+        }
+
+
+class RunMetrics:
+
+    def __init__(self, run_name, metrics_dir=None, profile_stage=None, save=True):
+        self.run_name = run_name
+        self.METRICS_DIR = metrics_dir or METRICS_DIR
+        self.profile_stage = profile_stage or PROFILE_STAGE
+        self.save_report = save
+
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self.stages = []
+        self.start_wall = time.perf_counter()
+        self.start_cpu = cpu_seconds()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.save_report:
+            self.save(failed=exc_type is not None)
+        return False
+
+    @contextmanager
+    def stage(self, name):
+        stage = Stage(name)
+        profiler = cProfile.Profile() if name == self.profile_stage else None
+
+        reset_peak_rss()
+        _active_stages.append(stage)
+        start_wall = time.perf_counter()
+        start_cpu = cpu_seconds()
+        if profiler:
+            profiler.enable()
+        try:
+            yield stage
+        finally:
+            if profiler:
+                profiler.disable()
+            stage.wall_s = time.perf_counter() - start_wall
+            stage.cpu_s = cpu_seconds() - start_cpu
+            stage.peak_rss_mb = peak_rss_mb()
+            _active_stages.remove(stage)
+
+            if profiler:
+                os.makedirs(self.METRICS_DIR, exist_ok=True)
+                stage.profile_path = os.path.join(self.METRICS_DIR, f"{self.file_stem()}.{name}.prof")
+                profiler.dump_stats(stage.profile_path)
+
+            self.stages.append(stage.to_dict())
+
+    def add_stages(self, stages):
+        """Merge stage dicts measured elsewhere, e.g. in worker processes."""
+        self.stages.extend(stages)
+
+    def file_stem(self):
+        return f"{self.run_name}_{self.started:%Y%m%d-%H%M%S}"
+
+    def report(self, failed=False):
+        return {
+            "run": self.run_name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "status": "failed" if failed else "ok",
+            "wall_s": round(time.perf_counter() - self.start_wall, 4),
+            "cpu_s": round(cpu_seconds() - self.start_cpu, 4),
+            "stages": self.stages,
+        }
+
+    def save(self, failed=False):
+        os.makedirs(self.METRICS_DIR, exist_ok=True)
+        path = os.path.join(self.METRICS_DIR, f"{self.file_stem()}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(failed), f, indent=4)
+        print(f"Run metrics saved: {path}")
+        return path
@@ -1,14 +1,16 @@
-import json
 import plotly.graph_objects as go
-from collections import defaultdict
-import os
 import re
+from aggregation import SentimentAggregates
+import chart_output
+from chart_manifest import BuildManifest, source_digest
+from instrumentation import RunMetrics
 
 class DataVisualizationAuthors:
 
-    def __init__(self):
+    def __init__(self, aggregates=None):
         self.INPUT_JSON_PATH = "processed_quotes.json"
-        self.quotes = self.load_json()
+        self.OUTPUT_DIR = "../visualizations/pie_chart_authors/"
+        self.aggregates = aggregates or self.load_aggregates()
 
         # Consistent color map
         self.color_map = {
@@ -21,30 +23,18 @@ class DataVisualizationAuthors:
         """Remove invalid filename characters."""
         return re.sub(r'[\\/*?:"<>|]', "_", name)
 
-    def load_json(self):
-        if not os.path.exists(self.INPUT_JSON_PATH):
-            print(f"Processed JSON file not found: {self.INPUT_JSON_PATH}")
-            exit()
-
-        with open(self.INPUT_JSON_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
+    def load_aggregates(self):
+        return SentimentAggregates.from_json(self.INPUT_JSON_PATH)
 
     def prepare_all_authors(self):
-        author_sentiment_counts = defaultdict(lambda: {"Positive": 0, "Neutral": 0, "Negative": 0})
-
-        for q in self.quotes:
-            author = q.get("author", "Unknown")
-            sentiment = q.get("sentiment", "Neutral")
-            author_sentiment_counts[author][sentiment] += 1
-
-        return author_sentiment_counts
+        return self.aggregates.author_sentiment_counts()
     
     def make_safe_filename(self, name):
         name = name.replace(" ", "_")
         name = re.sub(r"[^A-Za-z0-9_-]", "_", name)
         return name
 
-    def create_pie_chart(self, author, sentiment_dict):
+    def build_pie_chart(self, author, sentiment_dict):
 
         labels = ["Positive", "Neutral", "Negative"]
         values = [sentiment_dict[label] for label in labels]
@@ -59,23 +49,63 @@ class DataVisualizationAuthors:
         )])
 
         fig.update_traces(textinfo='percent+label')
-        fig.update_layout(title_text=f"Sentiment Distribution for Author: '{author}'")
+        fig.update_layout(title_text=self.chart_title(author))
+        return fig
 
-        output_dir = "../visualizations/pie_chart_authors/"
-        os.makedirs(output_dir, exist_ok=True)
+    def chart_title(self, author):
+        return f"Sentiment Distribution for Author: '{author}'"
+
+    def create_pie_chart(self, author, sentiment_dict):
+        fig = self.build_pie_chart(author, sentiment_dict)
 
         safe_name = self.make_safe_filename(author)
-        fig.write_html(os.path.join(output_dir, f"{safe_name}.html"))
+        chart_output.write_figure(fig, self.OUTPUT_DIR, f"{safe_name}.html")
+
+    def create_consolidated_page(self, author_data):
+        """One page for every author: a selector over a compact JSON payload."""
+        labels = ["Positive", "Neutral", "Negative"]
+        first = next(iter(author_data))
+        template = self.build_pie_chart(first, author_data[first])
+
+        entities = {
+            author: ([counts[label] for label in labels], self.chart_title(author))
+            for author, counts in author_data.items()
+        }
+        chart_output.write_entity_page(
+            template, entities, self.OUTPUT_DIR, "all_authors.html",
+            title="Sentiment by Author", select_label="Author"
+        )
 
     def generate_all_charts(self):
         author_data = self.prepare_all_authors()
+
+        # Only entities whose counts (or the chart code/options) changed are rewritten
+        self.manifest = BuildManifest("pie_author", source_digest(type(self), chart_output))
+
+        if chart_output.CONSOLIDATE_ENTITY_PAGES and author_data:
+            self.manifest.render("all_authors.html", author_data, lambda: self.create_consolidated_page(author_data))
+            self.manifest.prune(keep={"all_authors.html"})
+            self.manifest.save()
+            print(f"Consolidated page for {len(author_data)} authors generated successfully!")
+            return
+
         print("Generating charts for all authors...\n")
 
         for author, counts in author_data.items():
-            print(f"Creating chart for: {author}")
-            self.create_pie_chart(author, counts)
+            if self.manifest.render(author, counts, lambda: self.create_pie_chart(author, counts)):
+                print(f"Creating chart for: {author}")
+
+        removed = self.manifest.prune(keep=author_data)
+        self.manifest.save()
 
-        print("\nAll author charts generated successfully!")
+        print(
+            f"\nAll author charts up to date: {self.manifest.rebuilt} rebuilt, "
+            f"{self.manifest.skipped} unchanged, {removed} stale removed."
+        )
 
 if __name__ == '__main__':
-    DataVisualizationAuthors().generate_all_charts()
+    with RunMetrics("pie_chart_author") as metrics:
+        with metrics.stage("prepare"):
+            chart = DataVisualizationAuthors()
+        with metrics.stage("render"):
+            chart.generate_all_charts()
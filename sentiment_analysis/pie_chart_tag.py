@@ -1,14 +1,16 @@
-import json
 import plotly.graph_objects as go
-from collections import defaultdict
-import os
 import re
+from aggregation import SentimentAggregates
+import chart_output
+from chart_manifest import BuildManifest, source_digest
+from instrumentation import RunMetrics
 
 class DataVisualizationTags:
 
-    def __init__(self):
+    def __init__(self, aggregates=None):
         self.INPUT_JSON_PATH = "processed_quotes.json"
-        self.quotes = self.load_json()
+        self.OUTPUT_DIR = "../visualizations/pie_chart_tags/"
+        self.aggregates = aggregates or self.load_aggregates()
 
         # Consistent color map
         self.color_map = {
@@ -21,30 +23,18 @@ class DataVisualizationTags:
         """Remove invalid filename characters."""
         return re.sub(r'[\\/*?:"<>|]', "_", name)
 
-    def load_json(self):
-        if not os.path.exists(self.INPUT_JSON_PATH):
-            print(f"Processed JSON file not found: {self.INPUT_JSON_PATH}")
-            exit()
-
-        with open(self.INPUT_JSON_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
+    def load_aggregates(self):
+        return SentimentAggregates.from_json(self.INPUT_JSON_PATH)
 
     def prepare_all_tags(self):
-        tag_sentiment_counts = defaultdict(lambda: {"Positive": 0, "Neutral": 0, "Negative": 0})
-
-        for q in self.quotes:
-            sentiment = q.get("sentiment", "Neutral")
-            for tag in q.get("tags", []):
-                tag_sentiment_counts[tag][sentiment] += 1
-
-        return tag_sentiment_counts
+        return self.aggregates.tag_sentiment_counts()
     
     def make_safe_filename(self, name):
         name = name.replace(" ", "_")
         name = re.sub(r"[^A-Za-z0-9_-]", "_", name)
         return name
 
-    def create_pie_chart(self, tag, sentiment_dict):
+    def build_pie_chart(self, tag, sentiment_dict):
 
         labels = ["Positive", "Neutral", "Negative"]
         values = [sentiment_dict[label] for label in labels]
@@ -59,23 +49,63 @@ class DataVisualizationTags:
         )])
 
         fig.update_traces(textinfo='percent+label')
-        fig.update_layout(title_text=f"Sentiment Distribution for Tag: '{tag}'")
+        fig.update_layout(title_text=self.chart_title(tag))
+        return fig
 
-        output_dir = "../visualizations/pie_chart_tags/"
-        os.makedirs(output_dir, exist_ok=True)
+    def chart_title(self, tag):
+        return f"Sentiment Distribution for Tag: '{tag}'"
+
+    def create_pie_chart(self, tag, sentiment_dict):
+        fig = self.build_pie_chart(tag, sentiment_dict)
 
         safe_name = self.make_safe_filename(tag)
-        fig.write_html(os.path.join(output_dir, f"{safe_name}.html"))
+        chart_output.write_figure(fig, self.OUTPUT_DIR, f"{safe_name}.html")
+
+    def create_consolidated_page(self, tag_data):
+        """One page for every tag: a selector over a compact JSON payload."""
+        labels = ["Positive", "Neutral", "Negative"]
+        first = next(iter(tag_data))
+        template = self.build_pie_chart(first, tag_data[first])
+
+        entities = {
+            tag: ([counts[label] for label in labels], self.chart_title(tag))
+            for tag, counts in tag_data.items()
+        }
+        chart_output.write_entity_page(
+            template, entities, self.OUTPUT_DIR, "all_tags.html",
+            title="Sentiment by Tag", select_label="Tag"
+        )
 
     def generate_all_charts(self):
         tag_data = self.prepare_all_tags()
+
+        # Only entities whose counts (or the chart code/options) changed are rewritten
+        self.manifest = BuildManifest("pie_tag", source_digest(type(self), chart_output))
+
+        if chart_output.CONSOLIDATE_ENTITY_PAGES and tag_data:
+            self.manifest.render("all_tags.html", tag_data, lambda: self.create_consolidated_page(tag_data))
+            self.manifest.prune(keep={"all_tags.html"})
+            self.manifest.save()
+            print(f"Consolidated page for {len(tag_data)} tags generated successfully!")
+            return
+
         print("Generating charts for all tags...\n")
 
         for tag, counts in tag_data.items():
-            print(f"Creating chart for tag: {tag}")
-            self.create_pie_chart(tag, counts)
+            if self.manifest.render(tag, counts, lambda: self.create_pie_chart(tag, counts)):
+                print(f"Creating chart for tag: {tag}")
+
+        removed = self.manifest.prune(keep=tag_data)
+        self.manifest.save()
 
-        print("\nAll tag charts generated successfully!")
+        print(
+            f"\nAll tag charts up to date: {self.manifest.rebuilt} rebuilt, "
+            f"{self.manifest.skipped} unchanged, {removed} stale removed."
+        )
 
 if __name__ == '__main__':
-    DataVisualizationTags().generate_all_charts()
+    with RunMetrics("pie_chart_tag") as metrics:
+        with metrics.stage("prepare"):
+            chart = DataVisualizationTags()
+        with metrics.stage("render"):
+            chart.generate_all_charts()
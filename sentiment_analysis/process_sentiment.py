@@ -1,67 +1,388 @@
+import argparse
 import json
 import os
-from nltk.sentiment import SentimentIntensityAnalyzer
-from tqdm import tqdm  
+from contextlib import nullcontext
+from itertools import islice
+from multiprocessing import Pool
+import numpy as np
+from tqdm import tqdm
+from instrumentation import RunMetrics, record_read, record_written
+from quote_record import Quote, SCHEMAS
+from scorers import SCORERS
+from quote_warehouse import QuoteWarehouse
+from sentiment_cache import SentimentCache
+from streaming_stats import StreamingStats
+from text_dedup import NearDuplicateDetector, describe_clusters, group_duplicates, scoring_key
+
+# Scorer owned by each pool worker, built once in _init_worker
+_worker_scorer = None
+
+
+def build_record(q, scores):
+    """Processed record dict in the full schema."""
+    return Quote.from_scores(q, scores).to_dict()
+
+
+def score_quotes(scorer, quotes):
+    scores = scorer.score_batch([q.get("text", "") for q in quotes])
+    return [Quote.from_scores(q, s) for q, s in zip(quotes, scores)]
+
+
+def _init_worker(scorer_name):
+    global _worker_scorer
+    _worker_scorer = SCORERS[scorer_name]()
+
+
+def _score_chunk(chunk):
+    return score_quotes(_worker_scorer, chunk)
+
 
 class ProcessSentiment:
 
-    def __init__(self):
+    def __init__(self, workers=1, chunk_size=1000, use_cache=True, cache_max_entries=1_000_000,
+                 batch_size=10_000, profile_stage=None, schema="full", scorer="vader", dedup=False,
+                 near_duplicate_threshold=None, sketch_path=None, warehouse_path=None):
         self.INPUT_JSON_PATH = "../data_extraction/quotes.json"
         self.OUTPUT_JSON_PATH = "processed_quotes.json"
+        self.INPUT_JSONL_PATH = "../data_extraction/quotes.jsonl"
+        self.OUTPUT_JSONL_PATH = "processed_quotes.jsonl"
+        self.CACHE_PATH = "sentiment_cache.sqlite"
+        self.NEAR_DUPLICATES_PATH = "near_duplicates.json"
+        # Streaming mode only: also keep fixed-memory statistics of the output (see streaming_stats.py)
+        self.SKETCH_PATH = sketch_path
+        # Optional SQLite sink, loaded alongside the JSON output (see quote_warehouse.py)
+        self.WAREHOUSE_PATH = warehouse_path
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.use_cache = use_cache
+        self.cache_max_entries = cache_max_entries
+        self.batch_size = batch_size
+        self.profile_stage = profile_stage
+        # Output layout of processed records, see quote_record.SCHEMAS
+        self.to_record = SCHEMAS[schema]
+        # Sentiment scorer, see scorers.SCORERS; built on first use
+        self.scorer_name = scorer
+        self.scorer = None
+        # Score each distinct text once (see text_dedup.py); near duplicates too with a threshold
+        self.dedup = dedup or near_duplicate_threshold is not None
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.near_duplicate_clusters = []
+        self.quotes_seen = 0
+
+        # Streaming mode scores many small batches; keep one pool and skip per-batch progress bars
+        self.pool = None
+        self.show_progress = True
 
     def load_json(self, path):
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
         return data
 
+    def iter_jsonl(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_batches(self, records):
+        records = iter(records)
+        while batch := list(islice(records, self.batch_size)):
+            yield batch
+
+    def get_scorer(self):
+        if self.scorer is None:
+            self.scorer = SCORERS[self.scorer_name]()
+        return self.scorer
+
     def analyze_sentiment(self, quotes):
-        sia = SentimentIntensityAnalyzer()
+        if self.workers > 1:
+            return self.analyze_sentiment_parallel(quotes)
+
+        scorer = self.get_scorer()
         processed = []
 
-        for q in tqdm(quotes, desc="Analyzing Sentiment"):
-            text = q.get("text", "")
-            author = q.get("author", "")
-            tags = q.get("tags", [])
+        with tqdm(total=len(quotes), desc="Analyzing Sentiment", disable=not self.show_progress) as progress:
+            for i in range(0, len(quotes), self.chunk_size):
+                scored = score_quotes(scorer, quotes[i:i + self.chunk_size])
+                processed.extend(scored)
+                progress.update(len(scored))
 
-            scores = sia.polarity_scores(text)
-            compound = scores["compound"]
+        return processed
 
-            # Determine sentiment label
-            if compound >= 0.05:
-                sentiment = "Positive"
-            elif compound <= -0.05:
-                sentiment = "Negative"
+    def analyze_sentiment_parallel(self, quotes):
+        chunks = [
+            quotes[i:i + self.chunk_size]
+            for i in range(0, len(quotes), self.chunk_size)
+        ]
+        processed = []
+
+        # imap yields chunks in submission order, so the output matches the serial path
+        pool_context = nullcontext(self.pool) if self.pool else self.make_pool()
+        with pool_context as pool, \
+                tqdm(total=len(quotes), desc=f"Analyzing Sentiment ({self.workers} workers)",
+                     disable=not self.show_progress) as progress:
+            for scored in pool.imap(_score_chunk, chunks):
+                processed.extend(scored)
+                progress.update(len(scored))
+
+        return processed
+
+    def make_pool(self):
+        return Pool(self.workers, initializer=_init_worker, initargs=(self.scorer_name,))
+
+    def open_cache(self):
+        return SentimentCache(
+            self.CACHE_PATH,
+            self.get_scorer().version(),
+            max_entries=self.cache_max_entries
+        )
+
+    def analyze_sentiment_cached(self, quotes, cache):
+        """Score only quotes missing from the cache and merge with cached results."""
+        texts = [q.get("text", "") for q in quotes]
+        cached_scores = cache.lookup(texts)
+
+        misses = [q for q, scores in zip(quotes, cached_scores) if scores is None]
+        scored = iter(self.analyze_sentiment(misses))
+
+        processed = []
+        new_entries = []
+        for q, scores in zip(quotes, cached_scores):
+            if scores is None:
+                record = next(scored)
+                new_entries.append((record.text, record.scores))
             else:
-                sentiment = "Neutral"
-
-            # Store processed record
-            processed.append({
-                "text": text,
-                "author": author,
-                "tags": tags,
-                "compound": compound,
-                "sentiment": sentiment,
-                "scores": scores
-            })
+                record = Quote.from_scores(q, scores)
+            processed.append(record)
 
+        cache.put_many(new_entries)
         return processed
 
-    def save_json(self, data, path):
+    def analyze_sentiment_deduplicated(self, quotes, cache=None):
+        """Score each distinct text once and copy its scores to the quotes repeating it."""
+        texts = [q.get("text", "") for q in quotes]
+        # Not dedup_key: case and quote marks change VADER's scores, so only exact repeats share them
+        owner, firsts = group_duplicates(texts, key=scoring_key)
+
+        if self.near_duplicate_threshold is not None:
+            # Near-duplicate clusters of distinct texts share the scores of their first text
+            detector = NearDuplicateDetector(threshold=self.near_duplicate_threshold)
+            clusters = detector.clusters([texts[i] for i in firsts.tolist()])
+            self.near_duplicate_clusters += describe_clusters(texts, owner, firsts, clusters, self.quotes_seen)
+            leader = np.arange(len(firsts))
+            for members in clusters:
+                leader[members] = members[0]
+            owner = leader[owner]
+        self.quotes_seen += len(quotes)
+
+        scored_groups = np.unique(owner)
+        unique = [quotes[i] for i in firsts[scored_groups].tolist()]
+        scored = self.analyze_sentiment_cached(unique, cache) if cache else self.analyze_sentiment(unique)
+        print(f"Scored {len(unique)} distinct texts for {len(quotes)} quotes")
+
+        by_group = dict(zip(scored_groups.tolist(), scored))
+        processed = []
+        for i, (q, group) in enumerate(zip(quotes, owner.tolist())):
+            record = by_group[group]
+            processed.append(record if firsts[group] == i else Quote.from_scores(q, record.scores))
+        return processed
+
+    def save_near_duplicates(self):
+        """Write the clusters found while scoring; rows are input positions."""
+        if self.near_duplicate_threshold is None:
+            return
+
+        report = {
+            "threshold": self.near_duplicate_threshold,
+            "quotes": self.quotes_seen,
+            "near_duplicate_clusters": sorted(self.near_duplicate_clusters, key=lambda c: -c["size"]),
+        }
+        with open(self.NEAR_DUPLICATES_PATH, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+        print(f"{len(self.near_duplicate_clusters)} near-duplicate clusters reported in {self.NEAR_DUPLICATES_PATH}")
+
+    def score(self, quotes, cache=None):
+        if self.dedup:
+            return self.analyze_sentiment_deduplicated(quotes, cache)
+        if cache:
+            return self.analyze_sentiment_cached(quotes, cache)
+        return self.analyze_sentiment(quotes)
+
+    def save_json(self, quotes, path):
         with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+            self.write_json_array((self.to_record(q) for q in quotes), f)
+
+    def write_json_array(self, records, out):
+        """Write records as an indented JSON array, one record in memory at a time."""
+        first = True
+        for record in records:
+            # Matches json.dump(data, indent=4) byte for byte
+            body = json.dumps(record, indent=4, ensure_ascii=False).replace("\n", "\n    ")
+            out.write(("[\n    " if first else ",\n    ") + body)
+            first = False
+        out.write("[]" if first else "\n]")
+
+    def append_jsonl(self, quotes, f):
+        for q in quotes:
+            f.write(json.dumps(self.to_record(q), ensure_ascii=False))
+            f.write("\n")
+
+    def convert_jsonl_to_array(self, jsonl_path, json_path):
+        """Rewrite JSONL as the legacy indented array."""
+        with open(json_path, "w", encoding="utf-8") as out:
+            self.write_json_array(self.iter_jsonl(jsonl_path), out)
 
     def run(self):
         if not os.path.exists(self.INPUT_JSON_PATH):
             print(f"Input JSON file not found: {self.INPUT_JSON_PATH}")
             return
 
-        quotes = self.load_json(self.INPUT_JSON_PATH)
-        print(f"Loaded {len(quotes)} quotes.")
+        with RunMetrics("process_sentiment", profile_stage=self.profile_stage) as metrics:
+            with metrics.stage("load") as stage:
+                quotes = self.load_json(self.INPUT_JSON_PATH)
+                record_read(self.INPUT_JSON_PATH)
+                stage.records = len(quotes)
+            print(f"Loaded {len(quotes)} quotes.")
+
+            with metrics.stage("score") as stage:
+                if self.use_cache:
+                    cache = self.open_cache()
+                    processed_quotes = self.score(quotes, cache)
+                    cache.report()
+                    cache.close()
+                else:
+                    processed_quotes = self.score(quotes)
+                self.save_near_duplicates()
+                stage.records = len(processed_quotes)
 
-        processed_quotes = self.analyze_sentiment(quotes)
-        self.save_json(processed_quotes, self.OUTPUT_JSON_PATH)
+            with metrics.stage("save") as stage:
+                self.save_json(processed_quotes, self.OUTPUT_JSON_PATH)
+                record_written(self.OUTPUT_JSON_PATH)
+                stage.records = len(processed_quotes)
+
+            print(f"Processed quotes saved to: {self.OUTPUT_JSON_PATH}")
+
+            if self.WAREHOUSE_PATH:
+                with metrics.stage("warehouse") as stage:
+                    warehouse = QuoteWarehouse(self.WAREHOUSE_PATH)
+                    for batch in self.iter_batches(processed_quotes):
+                        warehouse.add(batch)
+                    pruned = warehouse.prune()
+                    stage.records = len(processed_quotes)
+                    warehouse.close()
+                print(f"Processed quotes loaded into: {self.WAREHOUSE_PATH} ({pruned} no longer in the input pruned)")
+
+    def run_stream(self, to_array=False):
+        """Score JSON Lines input in bounded batches, appending JSON Lines output."""
+        if not os.path.exists(self.INPUT_JSONL_PATH):
+            print(f"Input JSONL file not found: {self.INPUT_JSONL_PATH}")
+            return
+
+        with RunMetrics("process_sentiment_stream", profile_stage=self.profile_stage) as metrics:
+            # Reading, scoring and writing are interleaved per batch, so they form one stage
+            with metrics.stage("stream") as stage:
+                cache = self.open_cache() if self.use_cache else None
+                pool_context = self.make_pool() if self.workers > 1 else nullcontext()
+                self.show_progress = False
+                stats = StreamingStats() if self.SKETCH_PATH else None
+                warehouse = QuoteWarehouse(self.WAREHOUSE_PATH) if self.WAREHOUSE_PATH else None
+                total = 0
+
+                with pool_context as self.pool, \
+                        open(self.OUTPUT_JSONL_PATH, "w", encoding="utf-8") as out, \
+                        tqdm(desc="Analyzing Sentiment (streaming)", unit=" quotes") as progress:
+                    for batch in self.iter_batches(self.iter_jsonl(self.INPUT_JSONL_PATH)):
+                        processed = self.score(batch, cache)
+                        self.append_jsonl(processed, out)
+                        if stats:
+                            stats.update(processed)
+                        if warehouse:
+                            warehouse.add(processed)
+                        total += len(processed)
+                        progress.update(len(processed))
+
+                self.pool = None
+                self.show_progress = True
+                self.save_near_duplicates()
+                if cache:
+                    cache.report()
+                    cache.close()
+                if stats:
+                    stats.save(self.SKETCH_PATH)
+                    print(f"Streaming statistics saved to {self.SKETCH_PATH}")
+                if warehouse:
+                    pruned = warehouse.prune()
+                    warehouse.close()
+                    print(f"Processed quotes loaded into: {self.WAREHOUSE_PATH} ({pruned} no longer in the input pruned)")
+
+                record_read(self.INPUT_JSONL_PATH)
+                record_written(self.OUTPUT_JSONL_PATH)
+                stage.records = total
+
+            print(f"Streamed {total} processed quotes to: {self.OUTPUT_JSONL_PATH}")
+
+            if to_array:
+                with metrics.stage("convert") as stage:
+                    self.convert_jsonl_to_array(self.OUTPUT_JSONL_PATH, self.OUTPUT_JSON_PATH)
+                    record_read(self.OUTPUT_JSONL_PATH)
+                    record_written(self.OUTPUT_JSON_PATH)
+                    stage.records = total
+                print(f"Converted to legacy JSON array: {self.OUTPUT_JSON_PATH}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score quote sentiment with VADER.")
+    parser.add_argument("--scorer", choices=list(SCORERS), default="vader",
+                        help="vader (NLTK, reference) or lexicon (vectorized, same scores); see scorers.py")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of scoring processes (default: 1, serial)")
+    parser.add_argument("--chunk-size", type=int, default=1000,
+                        help="Quotes sent to a worker at a time (default: 1000)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Rescore every quote instead of reusing cached scores")
+    parser.add_argument("--cache-max-entries", type=int, default=1_000_000,
+                        help="Evict least recently used cache entries beyond this count")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read quotes.jsonl and append processed_quotes.jsonl in bounded batches")
+    parser.add_argument("--batch-size", type=int, default=10_000,
+                        help="Quotes held in memory at a time in streaming mode (default: 10000)")
+    parser.add_argument("--to-array", action="store_true",
+                        help="After streaming, also write the legacy processed_quotes.json array")
+    parser.add_argument("--schema", choices=list(SCHEMAS), default="full",
+                        help="Output layout: full (legacy) or slim (no sentiment label or nested scores)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Score each distinct text once (ignoring Unicode composition and spacing); "
+                             "with --stream, only within each batch")
+    parser.add_argument("--near-duplicates", type=float, metavar="THRESHOLD",
+                        help="Also collapse MinHash near duplicates at this similarity and report the clusters; "
+                             "with --stream, only within each batch")
+    parser.add_argument("--sketch", metavar="PATH",
+                        help="With --stream, also save fixed-memory sketches of the output (see streaming_stats.py)")
+    parser.add_argument("--warehouse", metavar="PATH",
+                        help="Also upsert the processed quotes into this SQLite database (see quote_warehouse.py)")
+    parser.add_argument("--profile-stage", metavar="STAGE",
+                        help="Capture a cProfile dump of this stage (load, score, save, warehouse, stream, convert)")
+    return parser.parse_args()
 
-        print(f"Processed quotes saved to: {self.OUTPUT_JSON_PATH}")
 
 if __name__ == "__main__":
-    ProcessSentiment().run()
+    args = parse_args()
+    processor = ProcessSentiment(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        use_cache=not args.no_cache,
+        cache_max_entries=args.cache_max_entries,
+        batch_size=args.batch_size,
+        profile_stage=args.profile_stage,
+        schema=args.schema,
+        scorer=args.scorer,
+        dedup=args.dedup,
+        near_duplicate_threshold=args.near_duplicates,
+        sketch_path=args.sketch,
+        warehouse_path=args.warehouse
+    )
+
+    if args.stream:
+        processor.run_stream(to_array=args.to_array)
+    else:
+        processor.run()
@@ -0,0 +1,191 @@
+import argparse
+import os
+import numpy as np
+from quote_store import QuoteStore, SENTIMENTS
+from word_frequencies import TokenizedCorpus, tokenize
+
+
+def build_postings(keys, rows, n_keys):
+    """CSR posting lists: rows grouped by key, ascending within each key."""
+    order = np.argsort(keys, kind="stable")
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(keys, minlength=n_keys))))
+    return offsets.astype(np.int64), rows[order].astype(np.int32)
+
+
+class QuoteIndex:
+    """Persisted inverted indexes over a QuoteStore.
+
+    tag, author and token posting lists map each key to the sorted ids
+    (store rows) of its quotes, and the quotes are also kept sorted by
+    compound score for range queries. Everything is saved as .npy files
+    next to the store and memory-mapped, so a query reads only the
+    posting lists it touches. The index is rebuilt together with the store.
+    """
+
+    POSTINGS = ("tag", "author", "token")
+
+    def __init__(self, store):
+        self.store = store
+        self.INDEX_DIR = os.path.join(store.STORE_DIR, "index")
+        self.tokens = TokenizedCorpus(store)
+
+        if not os.path.exists(os.path.join(self.INDEX_DIR, "compound_sorted.npy")):
+            self.build()
+
+        for name in self.POSTINGS:
+            setattr(self, f"{name}_offsets", self.load_array(f"{name}_offsets"))
+            setattr(self, f"{name}_postings", self.load_array(f"{name}_postings"))
+        self.compound_order = self.load_array("compound_order")
+        self.compound_sorted = self.load_array("compound_sorted")
+
+        self.tag_codes = {tag: code for code, tag in enumerate(store.tags)}
+        self.author_codes = {author: code for code, author in enumerate(store.authors)}
+        self.token_codes = {token: code for code, token in enumerate(self.tokens.vocab)}
+
+    def load_array(self, name):
+        return np.load(os.path.join(self.INDEX_DIR, f"{name}.npy"), mmap_mode="r")
+
+    def build(self):
+        store = self.store
+        n = len(store)
+        os.makedirs(self.INDEX_DIR, exist_ok=True)
+
+        # A quote lists each tag once, but may repeat a token
+        token_rows = np.repeat(np.arange(n), np.diff(self.tokens.token_offsets))
+        pairs = np.unique(token_rows.astype(np.int64) * len(self.tokens.vocab) + self.tokens.token_codes)
+        token_rows, token_keys = np.divmod(pairs, len(self.tokens.vocab))
+
+        arrays = {}
+        for name, keys, rows, n_keys in (
+            ("tag", np.asarray(store.tag_codes), store.tag_quote_index(), len(store.tags)),
+            ("author", np.asarray(store.author_codes), np.arange(n), len(store.authors)),
+            ("token", token_keys, token_rows, len(self.tokens.vocab)),
+        ):
+            arrays[f"{name}_offsets"], arrays[f"{name}_postings"] = build_postings(keys, rows, n_keys)
+
+        order = np.argsort(store.compound, kind="stable")
+        arrays["compound_order"] = order.astype(np.int32)
+        # Sorted scores last: their presence marks a complete index
+        arrays["compound_sorted"] = np.asarray(store.compound)[order]
+
+        for name, values in arrays.items():
+            np.save(os.path.join(self.INDEX_DIR, f"{name}.npy"), values)
+        print(f"Built quote index for {n} quotes: {self.INDEX_DIR}")
+
+    # ---- Single-key lookups, each returning sorted quote ids ----
+
+    def postings(self, name, code):
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        offsets = getattr(self, f"{name}_offsets")
+        return np.asarray(getattr(self, f"{name}_postings")[offsets[code]:offsets[code + 1]])
+
+    def with_tag(self, tag):
+        return self.postings("tag", self.tag_codes.get(tag))
+
+    def by_author(self, author):
+        return self.postings("author", self.author_codes.get(author))
+
+    def indexed_word(self, word):
+        """word as an index token, or None for stopwords and several words, which are not indexed."""
+        tokens = list(tokenize(word))
+        return tokens[0] if len(tokens) == 1 else None
+
+    def containing(self, word):
+        """Quotes containing word, tokenized the same way as the quote texts; empty if not indexed."""
+        return self.postings("token", self.token_codes.get(self.indexed_word(word)))
+
+    def compound_between(self, low=None, high=None, include_low=True, include_high=True):
+        """Quotes with low <= compound <= high (either bound optional)."""
+        start, end = 0, len(self.compound_sorted)
+        if low is not None:
+            start = np.searchsorted(self.compound_sorted, low, side="left" if include_low else "right")
+        if high is not None:
+            end = np.searchsorted(self.compound_sorted, high, side="right" if include_high else "left")
+        return np.sort(self.compound_order[start:end])
+
+    def with_sentiment(self, sentiment):
+        # Same thresholds as quote_record.label_sentiment
+        if sentiment == "Positive":
+            return self.compound_between(low=0.05)
+        if sentiment == "Negative":
+            return self.compound_between(high=-0.05)
+        return self.compound_between(-0.05, 0.05, include_low=False, include_high=False)
+
+    # ---- Conjunctive queries ----
+
+    def query(self, tags=(), authors=(), words=(), compound_min=None, compound_max=None, sentiment=None):
+        """Sorted ids of quotes matching every given filter.
+
+        authors is a disjunction (a quote has one author); all other
+        filters must hold together. Words that are not indexed (stopwords,
+        several words) cannot be filtered on and are skipped. Posting lists are intersected smallest
+        first, so the work is bounded by the most selective filter.
+        """
+        # intersect1d(assume_unique=True) needs every candidate list free of repeats:
+        # repeated filter values, the author union and a tag listed twice on a quote would add them
+        candidates = [np.unique(self.with_tag(t)) for t in dict.fromkeys(tags)]
+        candidates += [self.containing(w) for w in dict.fromkeys(words) if self.indexed_word(w) is not None]
+        if authors:
+            candidates.append(np.unique(np.concatenate([self.by_author(a) for a in authors])))
+
+        if compound_min is not None or compound_max is not None:
+            candidates.append(self.compound_between(compound_min, compound_max))
+        if sentiment is not None:
+            candidates.append(self.with_sentiment(sentiment))
+
+        if not candidates:
+            return np.arange(len(self.store), dtype=np.int32)
+
+        candidates.sort(key=len)
+        ids = candidates[0]
+        for other in candidates[1:]:
+            if not len(ids):
+                break
+            ids = np.intersect1d(ids, other, assume_unique=True)
+        return ids
+
+    def quotes(self, ids):
+        """Quote records for ids, read from the store one by one."""
+        return [self.store.quote(i) for i in ids]
+
+    def top_authors(self, ids, n=10):
+        """[(author, count)] of the authors with most quotes among ids."""
+        counts = np.bincount(np.asarray(self.store.author_codes)[ids], minlength=len(self.store.authors))
+        top = np.argsort(-counts, kind="stable")[:n]
+        return [(self.store.authors[code], int(counts[code])) for code in top if counts[code]]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query processed quotes through the inverted indexes.")
+    parser.add_argument("--input", default="processed_quotes.json")
+    parser.add_argument("--tag", action="append", default=[], help="Required tag (repeatable)")
+    parser.add_argument("--author", action="append", default=[], help="Allowed author (repeatable)")
+    parser.add_argument("--word", action="append", default=[], help="Required word (repeatable)")
+    parser.add_argument("--min-compound", type=float)
+    parser.add_argument("--max-compound", type=float)
+    parser.add_argument("--sentiment", choices=SENTIMENTS)
+    parser.add_argument("--limit", type=int, default=10, help="Quotes to print")
+    parser.add_argument("--top-authors", type=int, default=0, help="Also list the N most frequent authors")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    index = QuoteIndex(QuoteStore(args.input).load())
+    for word in args.word:
+        if index.indexed_word(word) is None:
+            print(f"Ignoring --word {word!r}: stopwords and several words are not indexed")
+    ids = index.query(
+        tags=args.tag, authors=args.author, words=args.word,
+        compound_min=args.min_compound, compound_max=args.max_compound, sentiment=args.sentiment
+    )
+
+    print(f"{len(ids)} matching quotes")
+    for q in index.quotes(ids[:args.limit]):
+        print(f"  [{q.compound:+.3f}] {q.author}: {q.text}")
+
+    if args.top_authors:
+        print("Top authors:")
+        for author, count in index.top_authors(ids, args.top_authors):
+            print(f"  {count:6d}  {author}")
@@ -0,0 +1,90 @@
+import sys
+
+
+def label_sentiment(compound):
+    if compound >= 0.05:
+        return "Positive"
+    elif compound <= -0.05:
+        return "Negative"
+    else:
+        return "Neutral"
+
+
+class Quote:
+    """One scored quote: three strings and four floats, nothing else.
+
+    Authors and tags are interned, so the thousands of quotes sharing an
+    author or tag share one string object. The sentiment label and the
+    nested "scores" dict of the full schema are derived on demand rather
+    than stored.
+    """
+
+    __slots__ = ("text", "author", "tags", "compound", "pos", "neg", "neu")
+
+    def __init__(self, text, author, tags, compound, pos, neg, neu):
+        self.text = text
+        self.author = sys.intern(author)
+        self.tags = tuple(sys.intern(t) for t in tags)
+        self.compound = compound
+        self.pos = pos
+        self.neg = neg
+        self.neu = neu
+
+    def __reduce__(self):
+        # Cheaper to pickle to and from pool workers than the slot-by-slot default
+        return Quote, (self.text, self.author, self.tags, self.compound, self.pos, self.neg, self.neu)
+
+    @classmethod
+    def from_scores(cls, q, scores):
+        """Build from a raw quote dict and VADER polarity scores."""
+        return cls(
+            q.get("text", ""), q.get("author", ""), q.get("tags", []),
+            scores["compound"], scores["pos"], scores["neg"], scores["neu"]
+        )
+
+    @classmethod
+    def from_dict(cls, d):
+        """Build from a processed record in either the full or the slim schema."""
+        scores = d.get("scores", d)
+        return cls(
+            d.get("text", ""), d.get("author", "Unknown"), d.get("tags", []),
+            d.get("compound", 0.0), scores.get("pos", 0.0), scores.get("neg", 0.0), scores.get("neu", 0.0)
+        )
+
+    @property
+    def sentiment(self):
+        return label_sentiment(self.compound)
+
+    @property
+    def scores(self):
+        # Same key order as SentimentIntensityAnalyzer.polarity_scores
+        return {"neg": self.neg, "neu": self.neu, "pos": self.pos, "compound": self.compound}
+
+    def to_dict(self):
+        """Full schema, as in the original processed_quotes.json."""
+        return {
+            "text": self.text,
+            "author": self.author,
+            "tags": list(self.tags),
+            "compound": self.compound,
+            "sentiment": self.sentiment,
+            "scores": self.scores
+        }
+
+    def to_slim_dict(self):
+        """Slim schema: no sentiment label (derived from compound) and no nested copy of the scores."""
+        return {
+            "text": self.text,
+            "author": self.author,
+            "tags": list(self.tags),
+            "compound": self.compound,
+            "pos": self.pos,
+            "neg": self.neg,
+            "neu": self.neu
+        }
+
+
+SCHEMAS = {
+    "full": Quote.to_dict,
+    "slim": Quote.to_slim_dict,
+}
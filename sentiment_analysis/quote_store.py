@@ -0,0 +1,190 @@
+import array
+import json
+import os
+import shutil
+import numpy as np
+from quote_record import Quote
+
+# Fixed sentiment order shared by every chart (code = index)
+SENTIMENTS = ["Positive", "Neutral", "Negative"]
+
+
+class QuoteStore:
+    """Columnar, dictionary-encoded copy of processed_quotes.json.
+
+    The JSON is parsed once into flat NumPy arrays (author/tag codes,
+    sentiment codes, score columns, tags and texts as offset arrays) that
+    are memory-mapped on load. The store is rebuilt automatically whenever
+    the source JSON changes.
+    """
+
+    STORE_VERSION = 1
+
+    COLUMNS = [
+        "author_codes", "sentiment_codes",
+        "compound", "pos", "neg", "neu",
+        "tag_offsets", "tag_codes",
+        "text_offsets", "text_bytes", "text_lengths",
+    ]
+
+    def __init__(self, json_path="processed_quotes.json", store_dir=None):
+        self.INPUT_JSON_PATH = json_path
+        self.STORE_DIR = store_dir or os.path.splitext(json_path)[0] + ".store"
+        self.META_PATH = os.path.join(self.STORE_DIR, "meta.json")
+
+        self.authors = []
+        self.tags = []
+
+    def source_signature(self):
+        stat = os.stat(self.INPUT_JSON_PATH)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def is_stale(self):
+        if not os.path.exists(self.META_PATH):
+            return True
+
+        with open(self.META_PATH, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        return (
+            meta.get("version") != self.STORE_VERSION
+            or meta.get("source") != self.source_signature()
+        )
+
+    def load(self):
+        if not os.path.exists(self.INPUT_JSON_PATH):
+            print(f"Processed JSON file not found: {self.INPUT_JSON_PATH}")
+            exit()
+
+        if self.is_stale():
+            self.build()
+
+        with open(self.META_PATH, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        self.authors = meta["authors"]
+        self.tags = meta["tags"]
+
+        for column in self.COLUMNS:
+            path = os.path.join(self.STORE_DIR, f"{column}.npy")
+            setattr(self, column, np.load(path, mmap_mode="r"))
+
+        return self
+
+    def read_source(self):
+        # JSON Lines sources (see process_sentiment.py --stream) are read one record at a time
+        with open(self.INPUT_JSON_PATH, "r", encoding="utf-8") as f:
+            if self.INPUT_JSON_PATH.endswith(".jsonl"):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                yield from json.load(f)
+
+    def build(self):
+        signature = self.source_signature()
+        quotes = self.read_source()
+
+        author_index = {}
+        tag_index = {}
+        sentiment_index = {s: i for i, s in enumerate(SENTIMENTS)}
+
+        # Typed arrays hold unboxed values, a few bytes per quote however many are read
+        author_codes = array.array("i")
+        sentiment_codes = array.array("b")
+        scores = {key: array.array("d") for key in ("compound", "pos", "neg", "neu")}
+        tag_offsets = array.array("q", [0])
+        text_offsets = array.array("q", [0])
+        text_lengths = array.array("i")
+
+        tag_codes = array.array("i")
+        text_bytes = bytearray()
+
+        for q in map(Quote.from_dict, quotes):
+            author_codes.append(author_index.setdefault(q.author, len(author_index)))
+            sentiment_codes.append(sentiment_index[q.sentiment])
+
+            for key in ("compound", "pos", "neg", "neu"):
+                scores[key].append(getattr(q, key))
+
+            for tag in q.tags:
+                tag_codes.append(tag_index.setdefault(tag, len(tag_index)))
+            tag_offsets.append(len(tag_codes))
+
+            text = q.text
+            text_bytes += text.encode("utf-8")
+            text_lengths.append(len(text))
+            text_offsets.append(len(text_bytes))
+
+        def column(values, dtype):
+            return np.frombuffer(values, dtype=values.typecode).astype(dtype, copy=False)
+
+        n = len(author_codes)
+        columns = {
+            "author_codes": column(author_codes, np.int32),
+            "sentiment_codes": column(sentiment_codes, np.int8),
+            "tag_offsets": column(tag_offsets, np.int64),
+            "tag_codes": column(tag_codes, np.int32),
+            "text_offsets": column(text_offsets, np.int64),
+            "text_bytes": np.frombuffer(text_bytes, dtype=np.uint8),
+            "text_lengths": column(text_lengths, np.int32),
+            **{key: column(values, np.float64) for key, values in scores.items()},
+        }
+
+        # Write into a scratch directory and swap it in, so readers never see a half-built store
+        tmp_dir = self.STORE_DIR + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        for column, values in columns.items():
+            np.save(os.path.join(tmp_dir, f"{column}.npy"), values)
+
+        meta = {
+            "version": self.STORE_VERSION,
+            "source": signature,
+            "count": n,
+            "authors": list(author_index),
+            "tags": list(tag_index),
+        }
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        shutil.rmtree(self.STORE_DIR, ignore_errors=True)
+        os.replace(tmp_dir, self.STORE_DIR)
+        print(f"Built quote store for {n} quotes: {self.STORE_DIR}")
+
+    def __len__(self):
+        return len(self.author_codes)
+
+    def text(self, i):
+        start, end = self.text_offsets[i], self.text_offsets[i + 1]
+        return bytes(self.text_bytes[start:end]).decode("utf-8")
+
+    def texts(self):
+        for i in range(len(self)):
+            yield self.text(i)
+
+    def author(self, i):
+        return self.authors[self.author_codes[i]]
+
+    def sentiment(self, i):
+        return SENTIMENTS[self.sentiment_codes[i]]
+
+    def quote_tags(self, i):
+        start, end = self.tag_offsets[i], self.tag_offsets[i + 1]
+        return [self.tags[code] for code in self.tag_codes[start:end]]
+
+    def tag_quote_index(self):
+        """Quote row for every entry of tag_codes."""
+        return np.repeat(np.arange(len(self)), np.diff(self.tag_offsets))
+
+    def quote(self, i):
+        return Quote(
+            self.text(i), self.author(i), self.quote_tags(i), float(self.compound[i]),
+            float(self.pos[i]), float(self.neg[i]), float(self.neu[i])
+        )
+
+    def iter_quotes(self):
+        """Yield every quote as a Quote record."""
+        for i in range(len(self)):
+            yield self.quote(i)
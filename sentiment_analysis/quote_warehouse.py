@@ -0,0 +1,244 @@
+import argparse
+import os
+import sqlite3
+import sys
+import numpy as np
+from aggregation import SentimentAggregates
+from quote_record import Quote
+from quote_store import QuoteStore, SENTIMENTS
+
+# Quotes are keyed by the crawler's own fingerprint, so both sides agree on what one quote is
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data_extraction"))
+from data_extraction.fingerprints import quote_fingerprint
+
+# Optional SQLite sink for scored quotes. process_sentiment.py --warehouse
+# loads every batch it scores; re-scored quotes are updated in place, keyed
+# by the crawler's text + author fingerprint, and quotes no longer in the
+# source are pruned after a full load. The charts can then take their
+# aggregates from indexed GROUP BY queries instead of the JSON file:
+#
+#   python process_sentiment.py --warehouse processed_quotes.sqlite
+#   python quote_warehouse.py --input processed_quotes.json      # load an existing file
+#   python build_charts.py --warehouse processed_quotes.sqlite
+
+SENTIMENT_CODES = {s: i for i, s in enumerate(SENTIMENTS)}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS quotes (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    author_id INTEGER NOT NULL REFERENCES authors (id),
+    sentiment INTEGER NOT NULL,
+    compound REAL NOT NULL,
+    pos REAL NOT NULL,
+    neg REAL NOT NULL,
+    neu REAL NOT NULL,
+    load_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quote_tags (
+    quote_id INTEGER NOT NULL REFERENCES quotes (id),
+    position INTEGER NOT NULL,
+    tag_id INTEGER NOT NULL REFERENCES tags (id),
+    PRIMARY KEY (quote_id, position)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_quotes_author ON quotes (author_id, sentiment);
+CREATE INDEX IF NOT EXISTS idx_quotes_sentiment ON quotes (sentiment, compound);
+CREATE INDEX IF NOT EXISTS idx_quotes_compound ON quotes (compound);
+CREATE INDEX IF NOT EXISTS idx_quotes_load ON quotes (load_id);
+CREATE INDEX IF NOT EXISTS idx_quote_tags_tag ON quote_tags (tag_id, quote_id);
+"""
+
+
+def chunks(values, size):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+class QuoteWarehouse:
+    """Scored quotes in SQLite, with normalized author and tag tables.
+
+    Each add() is one transaction. A quote whose fingerprint is already
+    stored has its author, scores and tags replaced, so reloading a run
+    never duplicates quotes. Every quote added through this object is
+    stamped with a new load id; after a full load, prune() deletes the
+    quotes the load did not touch.
+
+    Tags are stored per position, so a tag repeated on a quote counts
+    twice, as in the quote store. A quote repeated in the source, however,
+    is one row here but one row per copy in the quote store.
+    """
+
+    # Host parameters per IN (...) list, well below SQLite's limit
+    BATCH_SIZE = 500
+
+    def __init__(self, path="processed_quotes.sqlite"):
+        self.DB_PATH = path
+        self.conn = sqlite3.connect(self.DB_PATH)
+        # Bulk loads: one WAL append per transaction instead of a rollback journal
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.load_id = self.conn.execute("SELECT COALESCE(MAX(load_id), 0) + 1 FROM quotes").fetchone()[0]
+
+        # Dimension ids seen so far, looked up once per name
+        self.ids = {"authors": {}, "tags": {}}
+
+    def dimension_ids(self, table, names):
+        """Ids for names in authors or tags, inserting the new ones."""
+        known = self.ids[table]
+        missing = [name for name in dict.fromkeys(names) if name not in known]
+        if missing:
+            self.conn.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", ((n,) for n in missing))
+            for batch in chunks(missing, self.BATCH_SIZE):
+                rows = self.conn.execute(
+                    f"SELECT name, id FROM {table} WHERE name IN ({','.join('?' * len(batch))})", batch
+                )
+                known.update(rows)
+        return [known[name] for name in names]
+
+    def add(self, quotes):
+        """Upsert Quote records in one transaction; returns how many."""
+        quotes = list(quotes)
+        # A quote repeated within the batch keeps its last version
+        latest = {quote_fingerprint(q.text, q.author): q for q in quotes}
+        if not latest:
+            return 0
+
+        with self.conn:
+            author_ids = self.dimension_ids("authors", [q.author for q in latest.values()])
+            self.conn.executemany(
+                """INSERT INTO quotes (fingerprint, text, author_id, sentiment, compound, pos, neg, neu, load_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (fingerprint) DO UPDATE SET
+                       text = excluded.text, author_id = excluded.author_id, sentiment = excluded.sentiment,
+                       compound = excluded.compound, pos = excluded.pos, neg = excluded.neg, neu = excluded.neu,
+                       load_id = excluded.load_id""",
+                (
+                    (f, q.text, a, SENTIMENT_CODES[q.sentiment], q.compound, q.pos, q.neg, q.neu, self.load_id)
+                    for (f, q), a in zip(latest.items(), author_ids)
+                )
+            )
+
+            quote_ids = {}
+            for batch in chunks(list(latest), self.BATCH_SIZE):
+                rows = self.conn.execute(
+                    f"SELECT fingerprint, id FROM quotes WHERE fingerprint IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                quote_ids.update(rows)
+                # Tags of upserted quotes are replaced, not merged
+                self.conn.execute(
+                    f"DELETE FROM quote_tags WHERE quote_id IN ({','.join('?' * len(rows))})", [i for _, i in rows]
+                )
+
+            tag_ids = iter(self.dimension_ids("tags", [tag for q in latest.values() for tag in q.tags]))
+            links = [
+                (quote_ids[f], position, next(tag_ids))
+                for f, q in latest.items()
+                for position in range(len(q.tags))
+            ]
+            self.conn.executemany("INSERT INTO quote_tags (quote_id, position, tag_id) VALUES (?, ?, ?)", links)
+        return len(quotes)
+
+    def prune(self):
+        """Delete the quotes not added through this object, i.e. gone from the source just loaded.
+
+        Returns how many. Only call it after loading the whole source.
+        """
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM quote_tags WHERE quote_id IN (SELECT id FROM quotes WHERE load_id != ?)", (self.load_id,)
+            )
+            return self.conn.execute("DELETE FROM quotes WHERE load_id != ?", (self.load_id,)).rowcount
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM quotes").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class WarehouseAggregates(SentimentAggregates):
+    """The SentimentAggregates chart slices, computed by GROUP BY queries on a QuoteWarehouse.
+
+    Only the grouped counts reach Python: author x sentiment from the
+    (author_id, sentiment) index, and the author x tag x sentiment cube
+    from quote_tags joined to quotes. Every other slice is derived from
+    those two, as for the quote store.
+    """
+
+    def __init__(self, warehouse):
+        conn = warehouse.conn
+        author_rows = conn.execute(
+            "SELECT author_id, sentiment, COUNT(*) FROM quotes GROUP BY author_id, sentiment"
+        ).fetchall()
+        cube_rows = conn.execute(
+            """SELECT q.author_id, qt.tag_id, q.sentiment, COUNT(*)
+               FROM quote_tags qt JOIN quotes q ON q.id = qt.quote_id
+               GROUP BY q.author_id, qt.tag_id, q.sentiment"""
+        ).fetchall()
+
+        # Codes are positions among the authors and tags that still have quotes
+        author_ids = sorted({row[0] for row in author_rows})
+        tag_ids = sorted({row[1] for row in cube_rows})
+        self.authors = self.names(conn, "authors", author_ids)
+        self.tags = self.names(conn, "tags", tag_ids)
+        author_codes = {author_id: code for code, author_id in enumerate(author_ids)}
+        tag_codes = {tag_id: code for code, tag_id in enumerate(tag_ids)}
+
+        self.author_sentiment = np.zeros((len(self.authors), len(SENTIMENTS)), dtype=np.int64)
+        for author_id, sentiment, count in author_rows:
+            self.author_sentiment[author_codes[author_id], sentiment] = count
+
+        self.cube_authors = np.array([author_codes[row[0]] for row in cube_rows], dtype=np.int64)
+        self.cube_tags = np.array([tag_codes[row[1]] for row in cube_rows], dtype=np.int64)
+        self.cube_sentiments = np.array([row[2] for row in cube_rows], dtype=np.int64)
+        self.cube_counts = np.array([row[3] for row in cube_rows], dtype=np.int64)
+
+        self.derive()
+
+    @classmethod
+    def from_path(cls, path="processed_quotes.sqlite"):
+        return cls(QuoteWarehouse(path))
+
+    def names(self, conn, table, ids):
+        names = {}
+        for batch in chunks(ids, QuoteWarehouse.BATCH_SIZE):
+            names.update(conn.execute(f"SELECT id, name FROM {table} WHERE id IN ({','.join('?' * len(batch))})", batch))
+        return [names[i] for i in ids]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load processed quotes into the SQLite quote warehouse.")
+    parser.add_argument("--input", default="processed_quotes.json", help="Processed quotes (.json or .jsonl)")
+    parser.add_argument("--output", default="processed_quotes.sqlite", help="Warehouse database")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Quotes per transaction")
+    parser.add_argument("--keep-missing", action="store_true",
+                        help="Keep stored quotes that are not in --input (e.g. when loading several files)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    warehouse = QuoteWarehouse(args.output)
+    batch = []
+    loaded = 0
+    for record in QuoteStore(args.input).read_source():
+        batch.append(Quote.from_dict(record))
+        if len(batch) >= args.batch_size:
+            loaded += warehouse.add(batch)
+            batch = []
+    loaded += warehouse.add(batch)
+    if not args.keep_missing:
+        print(f"Pruned {warehouse.prune()} quotes no longer in {args.input}")
+    print(f"Loaded {loaded} quotes into {args.output} ({warehouse.count()} stored)")
+    warehouse.close()
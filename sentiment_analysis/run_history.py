@@ -0,0 +1,272 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import numpy as np
+from aggregation import SentimentAggregates
+from quote_store import SENTIMENTS
+
+# Append-only history of the per-author and per-tag sentiment counts of each
+# run, so sentiment can be compared across crawls without keeping copies of
+# processed_quotes.json. build_charts.py records a run whenever the counts
+# changed; sentiment_change.py draws the change since the previous run.
+#
+#   python run_history.py list
+#   python run_history.py diff --kind tag --top 20          # last two runs
+#   python run_history.py diff 20260101-120000 latest --kind author
+#   python run_history.py prune --keep-last 30 --max-age-days 365
+#
+# Layout of HISTORY_DIR:
+#   runs.jsonl        one line per run (id, time, totals, digest)
+#   authors.txt       append-only name dictionaries; line number = code, shared by all runs
+#   tags.txt
+#   runs/<id>.npz     codes and sentiment counts of the non-empty authors and tags of a run
+
+HISTORY_DIR = "run_history"
+
+KINDS = ("author", "tag")
+
+
+class RunHistory:
+    """Per-run author and tag sentiment counts, stored as codes into shared name dictionaries.
+
+    A run stores only the non-empty rows of its author x sentiment and
+    tag x sentiment counts. As every run encodes names with the same
+    dictionaries, two runs are compared by scattering their rows into
+    arrays indexed by code, without looking at any quotes.
+    """
+
+    def __init__(self, history_dir=HISTORY_DIR):
+        self.HISTORY_DIR = history_dir
+        self.INDEX_PATH = os.path.join(history_dir, "runs.jsonl")
+        self.RUNS_DIR = os.path.join(history_dir, "runs")
+        self.NAMES_PATHS = {kind: os.path.join(history_dir, f"{kind}s.txt") for kind in KINDS}
+
+        self.runs = []
+        self.names = {kind: [] for kind in KINDS}
+        self.codes = {kind: {} for kind in KINDS}
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.INDEX_PATH):
+            with open(self.INDEX_PATH, "r", encoding="utf-8") as f:
+                self.runs = [json.loads(line) for line in f if line.strip()]
+
+        for kind, path in self.NAMES_PATHS.items():
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    self.names[kind] = [json.loads(line) for line in f if line.strip()]
+            self.codes[kind] = {name: code for code, name in enumerate(self.names[kind])}
+
+    def encode(self, kind, names):
+        """Codes for names, appending names not seen in any earlier run to the dictionary."""
+        new = [name for name in dict.fromkeys(names) if name not in self.codes[kind]]
+        if new:
+            # One JSON string per line, as names may contain anything
+            with open(self.NAMES_PATHS[kind], "a", encoding="utf-8") as f:
+                for name in new:
+                    self.codes[kind][name] = len(self.names[kind])
+                    self.names[kind].append(name)
+                    f.write(json.dumps(name, ensure_ascii=False) + "\n")
+        return np.array([self.codes[kind][name] for name in names], dtype=np.int32)
+
+    def record(self, aggregates, label=None):
+        """Append a run from a SentimentAggregates, unless its counts equal the latest run's.
+
+        Returns the run's index entry.
+        """
+        rows = {
+            "author": (aggregates.authors, aggregates.author_sentiment),
+            "tag": (aggregates.tags, aggregates.tag_sentiment),
+        }
+        # Sorted by name, so a store rebuilt in another row order hashes the same
+        digest = hashlib.sha256()
+        for kind, (names, counts) in rows.items():
+            digest.update(json.dumps(sorted(zip(names, counts.tolist())), ensure_ascii=False).encode("utf-8"))
+        digest = digest.hexdigest()
+
+        if self.runs and self.runs[-1]["digest"] == digest:
+            print(f"Sentiment counts unchanged since run {self.runs[-1]['id']}; not recorded")
+            return self.runs[-1]
+
+        os.makedirs(self.RUNS_DIR, exist_ok=True)
+        columns = {}
+        for kind, (names, counts) in rows.items():
+            present = np.flatnonzero(counts.sum(axis=1))
+            columns[f"{kind}_codes"] = self.encode(kind, [names[i] for i in present.tolist()])
+            columns[f"{kind}_counts"] = counts[present].astype(np.int32)
+
+        recorded = datetime.datetime.now(datetime.timezone.utc)
+        run_id = f"{recorded:%Y%m%d-%H%M%S}"
+        taken = {run["id"] for run in self.runs}
+        suffix = 1
+        while run_id in taken:
+            run_id = f"{recorded:%Y%m%d-%H%M%S}.{suffix}"
+            suffix += 1
+
+        # Written aside and renamed, so the index never lists a partial file
+        path = self.run_path(run_id)
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez_compressed(f, **columns)
+        os.replace(f"{path}.tmp", path)
+
+        entry = {
+            "id": run_id,
+            "recorded": recorded.isoformat(timespec="seconds"),
+            "label": label,
+            "quotes": int(aggregates.author_sentiment.sum()),
+            "sentiments": dict(zip(SENTIMENTS, map(int, aggregates.author_sentiment.sum(axis=0)))),
+            "authors": len(columns["author_codes"]),
+            "tags": len(columns["tag_codes"]),
+            "digest": digest,
+        }
+        with open(self.INDEX_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.runs.append(entry)
+        print(f"Recorded run {run_id} in {self.HISTORY_DIR}")
+        return entry
+
+    def run_path(self, run_id):
+        return os.path.join(self.RUNS_DIR, f"{run_id}.npz")
+
+    def resolve(self, run):
+        """Index entry for a run id, "latest", or a position such as -2 (the run before the latest)."""
+        if run in (None, "latest"):
+            run = -1
+        if isinstance(run, int) or run.lstrip("-").isdigit():
+            run = int(run)
+            if not -len(self.runs) <= run < len(self.runs):
+                raise ValueError(f"No run at position {run}: {len(self.runs)} runs recorded")
+            return self.runs[run]
+        for entry in self.runs:
+            if entry["id"] == run:
+                return entry
+        raise ValueError(f"No recorded run {run!r}")
+
+    def counts(self, run, kind):
+        """(len(names[kind]), sentiments) counts of one run, zero for names it does not have."""
+        entry = self.resolve(run)
+        with np.load(self.run_path(entry["id"])) as data:
+            codes, counts = data[f"{kind}_codes"], data[f"{kind}_counts"]
+
+        dense = np.zeros((len(self.names[kind]), len(SENTIMENTS)), dtype=np.int64)
+        dense[codes] = counts
+        return dense
+
+    def delta(self, kind, old=-2, new=-1):
+        """(names, before, after) for the authors or tags present in either run."""
+        before = self.counts(old, kind)
+        after = self.counts(new, kind)
+        present = np.flatnonzero(before.any(axis=1) | after.any(axis=1))
+        return [self.names[kind][i] for i in present.tolist()], before[present], after[present]
+
+    def delta_records(self, kind, old=-2, new=-1, top=None):
+        """Per-sentiment change records for the `top` authors or tags that changed most."""
+        names, before, after = self.delta(kind, old, new)
+        change = after - before
+        moved = np.abs(change).sum(axis=1)
+        order = [i for i in np.argsort(-moved, kind="stable")[:top].tolist() if moved[i]]
+
+        return [
+            {
+                kind: names[i],
+                "sentiment": sentiment,
+                "before": int(before[i, s]),
+                "after": int(after[i, s]),
+                "change": int(change[i, s]),
+            }
+            for i in order
+            for s, sentiment in enumerate(SENTIMENTS)
+        ]
+
+    def prune(self, keep_last=None, max_age_days=None):
+        """Drop runs beyond the latest keep_last or older than max_age_days; returns how many.
+
+        The latest run is always kept. Name dictionaries are never pruned,
+        so the codes of the remaining runs stay valid.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        keep = []
+        for position, entry in enumerate(self.runs):
+            from_end = len(self.runs) - position
+            age = now - datetime.datetime.fromisoformat(entry["recorded"])
+            if from_end == 1 or (
+                (keep_last is None or from_end <= keep_last)
+                and (max_age_days is None or age <= datetime.timedelta(days=max_age_days))
+            ):
+                keep.append(entry)
+        if len(keep) == len(self.runs):
+            return 0
+
+        # The one rewrite of the index: written aside and renamed
+        tmp_path = f"{self.INDEX_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in keep:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.INDEX_PATH)
+
+        dropped = [entry for entry in self.runs if entry not in keep]
+        for entry in dropped:
+            if os.path.exists(self.run_path(entry["id"])):
+                os.remove(self.run_path(entry["id"]))
+        self.runs = keep
+        return len(dropped)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Record and compare per-run author and tag sentiment counts.")
+    parser.add_argument("--history-dir", default=HISTORY_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="List recorded runs")
+
+    record = commands.add_parser("record", help="Record the current processed quotes as a run")
+    record.add_argument("--input", default="processed_quotes.json", help="Processed quotes (.json or .jsonl)")
+    record.add_argument("--label", help="Free-form note stored with the run")
+
+    diff = commands.add_parser("diff", help="Sentiment change between two runs (default: the last two)")
+    diff.add_argument("old", nargs="?", default="-2", help="Run id, latest, or position (-2 = previous run)")
+    diff.add_argument("new", nargs="?", default="latest")
+    diff.add_argument("--kind", choices=KINDS, default="tag")
+    diff.add_argument("--top", type=int, default=20, help="Authors or tags with the largest change to show")
+
+    prune = commands.add_parser("prune", help="Apply a retention policy")
+    prune.add_argument("--keep-last", type=int, help="Keep at most this many most recent runs")
+    prune.add_argument("--max-age-days", type=float, help="Drop runs recorded longer ago than this")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    history = RunHistory(args.history_dir)
+
+    if args.command == "list":
+        for run in history.runs:
+            sentiments = ", ".join(f"{s} {n}" for s, n in run["sentiments"].items())
+            print(f"{run['id']}  {run['quotes']:>8} quotes  {run['authors']:>6} authors  {run['tags']:>6} tags  "
+                  f"({sentiments}){'  ' + run['label'] if run['label'] else ''}")
+        print(f"{len(history.runs)} runs recorded in {history.HISTORY_DIR}")
+
+    elif args.command == "record":
+        history.record(SentimentAggregates.from_json(args.input), label=args.label)
+
+    elif args.command == "diff":
+        try:
+            old, new = history.resolve(args.old), history.resolve(args.new)
+        except ValueError as e:
+            # E.g. right after the first build, with a single run recorded
+            print(e)
+        else:
+            print(f"{args.kind.capitalize()} sentiment change from run {old['id']} to {new['id']}:")
+            records = history.delta_records(args.kind, old["id"], new["id"], top=args.top)
+            for i in range(0, len(records), len(SENTIMENTS)):
+                changes = "  ".join(f"{r['sentiment']} {r['before']}->{r['after']} ({r['change']:+d})"
+                                    for r in records[i:i + len(SENTIMENTS)])
+                print(f"  {records[i][args.kind]:<30} {changes}")
+            if not records:
+                print("  no changes")
+
+    elif args.command == "prune":
+        dropped = history.prune(args.keep_last, args.max_age_days)
+        print(f"Pruned {dropped} runs, {len(history.runs)} kept")
@@ -1,49 +1,41 @@
-import json
-import os
-from collections import defaultdict
 import plotly.graph_objects as go
+from aggregation import SentimentAggregates, OTHER_AUTHORS, OTHER_TAGS
+from chart_output import write_figure
+from quote_store import SENTIMENTS
+from instrumentation import RunMetrics
 
 class DataVisualization:
 
-    def __init__(self):
+    def __init__(self, aggregates=None, max_authors=100, max_tags=200):
         self.INPUT_JSON_PATH = "processed_quotes.json"
-        self.quotes = self.load_json()
+        # Nodes beyond these limits are folded into "Other authors" / "Other tags"
+        self.MAX_AUTHORS = max_authors
+        self.MAX_TAGS = max_tags
+        self.aggregates = aggregates or self.load_aggregates()
         self.nodes, self.authors, self.tags, self.source, self.target, self.value, self.source = self.prepare_data()
 
-    def load_json(self):
-        if not os.path.exists(self.INPUT_JSON_PATH):
-            print(f"Processed JSON file not found: {self.INPUT_JSON_PATH}")
-            exit()
-
-        with open(self.INPUT_JSON_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)        
-        return data
+    def load_aggregates(self):
+        return SentimentAggregates.from_json(self.INPUT_JSON_PATH)
 
     def prepare_data(self):
-        authors = sorted({q.get("author", "Unknown") for q in self.quotes})
-        sentiments = ["Positive", "Neutral", "Negative"]
-        tags = sorted({tag for q in self.quotes for tag in q.get("tags", [])})
+        author_links = self.aggregates.author_sentiment_links(self.MAX_AUTHORS)
+        tag_links = self.aggregates.sentiment_tag_links(self.MAX_TAGS)
+
+        # Nodes come from the pruned links; the "Other" node goes last in its column
+        authors = sorted({src for src, _, _ in author_links}, key=lambda a: (a == OTHER_AUTHORS, a))
+        sentiments = list(SENTIMENTS)
+        tags = sorted({tgt for _, tgt, _ in tag_links}, key=lambda t: (t == OTHER_TAGS, t))
 
         nodes = authors + sentiments + tags
         node_indices = {node: i for i, node in enumerate(nodes)}
 
-        link_counts = defaultdict(int)
-
-        for q in self.quotes:
-            author = q.get("author", "Unknown")
-            sentiment = q.get("sentiment", "Neutral")
-            link_counts[(author, sentiment)] += 1
-
-        for q in self.quotes:
-            sentiment = q.get("sentiment", "Neutral")
-            for tag in q.get("tags", []):
-                link_counts[(sentiment, tag)] += 1
+        links = author_links + tag_links
 
         source = []
         target = []
         value = []
 
-        for (src, tgt), cnt in link_counts.items():
+        for src, tgt, cnt in links:
             source.append(node_indices[src])
             target.append(node_indices[tgt])
             value.append(cnt)
@@ -73,10 +65,12 @@ class DataVisualization:
         )
 
         output_dir = "../visualizations/exploratory_charts/"
-        os.makedirs(output_dir, exist_ok=True)
-
-        fig.write_html(os.path.join(output_dir, "sankey_diagram.html"))        
+        write_figure(fig, output_dir, "sankey_diagram.html")
         print("Sankey diagram saved as HTML!")
 
 if __name__ == '__main__':
-    DataVisualization().create_sankey_diagram()
+    with RunMetrics("sankey_diagram") as metrics:
+        with metrics.stage("prepare"):
+            chart = DataVisualization()
+        with metrics.stage("render"):
+            chart.create_sankey_diagram()
@@ -1,37 +1,98 @@
+import html
 import json
 import os
+import shutil
+import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
 import textwrap
+from functools import lru_cache
+from quote_store import QuoteStore, SENTIMENTS
+from chart_output import record_output, write_figure
+from instrumentation import RunMetrics
+from text_dedup import distinct_text_rows
+
+# Above this many quotes the plot switches to large-data mode: a binned
+# density layer plus WebGL points for sparse cells only, with quote text
+# loaded from sidecar script shards when a point is hovered or clicked.
+LARGE_DATA_THRESHOLD = 20_000
+
+
+@lru_cache(maxsize=65_536)
+def wrap_text(text, width=80):
+    return "<br>".join(textwrap.wrap(text, width=width))
+
+
+LOAD_QUOTE_SCRIPT = """
+var gd = document.getElementById('{plot_id}');
+var panel = document.createElement('div');
+panel.style.cssText = 'max-width: 900px; margin: 0.5rem auto; font-family: sans-serif; min-height: 4em;';
+panel.innerHTML = '<i>Hover or click a point to load its quote.</i>';
+gd.parentNode.appendChild(panel);
+
+// Shards are plain scripts rather than fetched JSON, so the page also works opened from disk (file://)
+window.SCATTER_QUOTES = window.SCATTER_QUOTES || {};
+var shards = {};
+function loadShard(shard) {
+    if (!shards[shard]) {
+        shards[shard] = new Promise(function (resolve, reject) {
+            var script = document.createElement('script');
+            script.src = QUOTE_DIR + '/' + shard + '.js';
+            script.onload = function () { resolve(window.SCATTER_QUOTES[shard]); };
+            script.onerror = function () { delete shards[shard]; reject(new Error(script.src)); };
+            document.head.appendChild(script);
+        });
+    }
+    return shards[shard];
+}
+function showQuote(event) {
+    var point = event.points[0];
+    if (point.customdata === undefined) { return; }
+    var idx = point.customdata;
+    loadShard(Math.floor(idx / SHARD_SIZE)).then(function (quotes) {
+        var q = quotes[idx];
+        panel.innerHTML = '<b>' + q.author + '</b> (' + q.sentiment + ', ' + point.y + ')<br>' + q.quote;
+    }).catch(function (error) {
+        panel.innerHTML = '<i>Could not load the quote text from ' + error.message
+            + '; keep the ' + QUOTE_DIR + ' folder next to this page.</i>';
+    });
+}
+gd.on('plotly_hover', showQuote);
+gd.on('plotly_click', showQuote);
+"""
 
 class DataVisualization:
 
-    def __init__(self):
+    def __init__(self, store=None, large=None, distinct=True):
         self.INPUT_JSON_PATH = "processed_quotes.json"
-        self.quotes = self.load_json()
-        self.plot_data = self.prepare_data()
-        
-    def load_json(self):
-        if not os.path.exists(self.INPUT_JSON_PATH):
-            print(f"Processed JSON file not found: {self.INPUT_JSON_PATH}")
-            exit()
-
-        with open(self.INPUT_JSON_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data
-
-    
+        self.OUTPUT_DIR = "../visualizations/exploratory_charts/"
+        self.QUOTE_DIR_NAME = "scatter_plot_quotes"
+        self.SHARD_SIZE = 1000
+        self.BINS = (60, 40)        # length x compound cells in large-data mode
+        self.SPARSE_CELL_MAX = 5    # cells with more quotes than this are drawn as density only
+
+        self.store = store if store is not None else self.load_store()
+        # Reposts of a quote would stack identical points; plot each distinct text once
+        self.rows = np.asarray(distinct_text_rows(self.store)) if distinct else np.arange(len(self.store))
+        self.large = len(self.rows) > LARGE_DATA_THRESHOLD if large is None else large
+        self.plot_data = self.prepare_density_data() if self.large else self.prepare_data()
+
+    def load_store(self):
+        return QuoteStore(self.INPUT_JSON_PATH).load()
+
+
     def wrap_text(self, text, width=80):
-        return "<br>".join(textwrap.wrap(text, width=width))
+        return wrap_text(text, width)
 
     def prepare_data(self):
         plot_data = []
 
-        for q in self.quotes:
-            author = q.get("author", "Unknown")
-            text = q.get("text", "")
-            length = len(text)
-            compound = q.get("compound", 0.0)
-            sentiment = q.get("sentiment", "Neutral")
+        for i in self.rows.tolist():
+            text = self.store.text(i)
+            author = self.store.author(i)
+            length = int(self.store.text_lengths[i])
+            compound = float(self.store.compound[i])
+            sentiment = self.store.sentiment(i)
 
             wrapped = self.wrap_text(text, width=80)
 
@@ -42,10 +103,34 @@ class DataVisualization:
                 "sentiment": sentiment,
                 "quote_wrapped": wrapped,  # formatted for tooltip
             })
-        
+
         return plot_data
 
+    def prepare_density_data(self):
+        """Bin the length/compound plane and keep individual points only in sparse cells."""
+        lengths = np.asarray(self.store.text_lengths)[self.rows]
+        compound = np.asarray(self.store.compound)[self.rows]
+
+        counts, x_edges, y_edges = np.histogram2d(
+            lengths, compound, bins=self.BINS,
+            range=[[0, max(int(lengths.max(initial=0)), 1)], [-1, 1]]
+        )
+
+        x_cell = np.clip(np.digitize(lengths, x_edges) - 1, 0, len(x_edges) - 2)
+        y_cell = np.clip(np.digitize(compound, y_edges) - 1, 0, len(y_edges) - 2)
+        sparse = self.rows[counts[x_cell, y_cell] <= self.SPARSE_CELL_MAX]
+
+        return {
+            "counts": counts.T,  # heatmap rows are y
+            "x_centers": (x_edges[:-1] + x_edges[1:]) / 2,
+            "y_centers": (y_edges[:-1] + y_edges[1:]) / 2,
+            "sparse_indices": sparse,
+        }
+
     def create_scatter_plot(self):
+        if self.large:
+            return self.create_density_plot()
+
         fig = px.scatter(
             self.plot_data,
             x="length",
@@ -68,11 +153,80 @@ class DataVisualization:
             "<b>Quote:</b><br>%{customdata[1]}"              # 1 = wrapped quote
         )
 
-        output_dir = "../visualizations/exploratory_charts/"
-        os.makedirs(output_dir, exist_ok=True)
-
-        fig.write_html(os.path.join(output_dir, "scatter_plot.html"))        
+        write_figure(fig, self.OUTPUT_DIR, "scatter_plot.html")
         print("Scatter plot saved as HTML!")
 
+    def create_density_plot(self):
+        data = self.plot_data
+        sparse = data["sparse_indices"]
+        colors = {"Positive": "#2ecc71", "Neutral": "#3498db", "Negative": "#e74c3c"}
+
+        fig = go.Figure(go.Heatmap(
+            x=data["x_centers"],
+            y=data["y_centers"],
+            z=np.where(data["counts"] > 0, data["counts"], np.nan),
+            colorscale="Greys",
+            colorbar=dict(title="Quotes"),
+            hovertemplate="<b>Length:</b> ~%{x:.0f}<br><b>Compound:</b> ~%{y:.2f}<br><b>Quotes:</b> %{z}<extra></extra>"
+        ))
+
+        # Points in sparse cells stay individually hoverable; each carries only its row index
+        sentiment_codes = np.asarray(self.store.sentiment_codes)[sparse]
+        for code, sentiment in enumerate(SENTIMENTS):
+            rows = sparse[sentiment_codes == code]
+            fig.add_trace(go.Scattergl(
+                x=np.asarray(self.store.text_lengths)[rows],
+                y=np.asarray(self.store.compound)[rows],
+                customdata=rows,
+                mode="markers",
+                name=sentiment,
+                marker=dict(color=colors[sentiment], size=5, opacity=0.7),
+                hovertemplate="<b>Length:</b> %{x}<br><b>Compound Score:</b> %{y}<extra></extra>"
+            ))
+
+        fig.update_layout(
+            title=f"Scatter Plot: Compound Sentiment Score vs Quote Length ({len(self.rows):,} quotes)",
+            xaxis_title="Quote Length (characters)",
+            yaxis_title="Compound Sentiment Score",
+            template="plotly_white"
+        )
+
+        self.write_quote_shards(sparse)
+        script = (
+            f"var SHARD_SIZE = {self.SHARD_SIZE}; var QUOTE_DIR = '{self.QUOTE_DIR_NAME}';"
+            + LOAD_QUOTE_SCRIPT
+        )
+        write_figure(fig, self.OUTPUT_DIR, "scatter_plot.html", post_script=script)
+        print(f"Scatter plot saved as HTML! ({len(sparse):,} points, rest binned)")
+
+    def write_quote_shards(self, indices):
+        """Write tooltip text for the plotted points, grouped by row index into shards.
+
+        Each shard is a script assigning its quotes to window.SCATTER_QUOTES,
+        loaded with a <script> tag: browsers block fetch() on file:// pages.
+        """
+        quote_dir = os.path.join(self.OUTPUT_DIR, self.QUOTE_DIR_NAME)
+        shutil.rmtree(quote_dir, ignore_errors=True)
+        os.makedirs(quote_dir)
+
+        shards = {}
+        for i in indices.tolist():
+            shards.setdefault(i // self.SHARD_SIZE, {})[i] = {
+                "author": html.escape(self.store.author(i)),
+                "sentiment": self.store.sentiment(i),
+                "quote": self.wrap_text(html.escape(self.store.text(i)), width=80),
+            }
+
+        for shard, quotes in shards.items():
+            path = os.path.join(quote_dir, f"{shard}.js")
+            payload = json.dumps(quotes, ensure_ascii=False, separators=(",", ":"))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"window.SCATTER_QUOTES[{shard}] = {payload};\n")
+            record_output(path)
+
 if __name__ == '__main__':
-    DataVisualization().create_scatter_plot()
\ No newline at end of file
+    with RunMetrics("scatter_plot") as metrics:
+        with metrics.stage("prepare"):
+            chart = DataVisualization()
+        with metrics.stage("render"):
+            chart.create_scatter_plot()
@@ -0,0 +1,410 @@
+import argparse
+import json
+import re
+import string
+import time
+import numpy as np
+from nltk.sentiment import SentimentIntensityAnalyzer
+from nltk.sentiment.vader import VaderConstants
+from quote_record import label_sentiment
+from sentiment_cache import SCORE_KEYS, analyzer_version
+
+# Sentiment scorers for process_sentiment.py. Every scorer has a batch API,
+# score_batch(texts) -> [polarity scores dict], and a version() string that
+# keys its entries in the sentiment cache.
+#
+#   vader    - NLTK's SentimentIntensityAnalyzer, one quote at a time (reference)
+#   lexicon  - the VADER lexicon and rules compiled to integer token ids and
+#              applied to whole batches with NumPy
+#
+# Parity report and throughput of the lexicon scorer against VADER:
+#
+#   python scorers.py --input ../benchmarks/work/q10000_a500_t2000_s0/data_extraction/quotes.jsonl
+
+PUNCTUATION = set(string.punctuation)
+REGEX_REMOVE_PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]")
+
+
+class VaderScorer:
+
+    def __init__(self):
+        self.sia = SentimentIntensityAnalyzer()
+
+    def version(self):
+        return analyzer_version(self.sia)
+
+    def score_batch(self, texts):
+        return [self.sia.polarity_scores(text) for text in texts]
+
+
+class LexiconScorer:
+    """VADER's scoring rules applied to a whole batch of texts at once.
+
+    Texts are split into tokens the way VADER's SentiText does it, and each
+    lowercased token is mapped to an integer id once. Lexicon valence,
+    booster scalars and negation flags are lookups into arrays indexed by
+    that id, and the rules that look back up to three tokens (boosters,
+    negation, "never so", "least", "kind of") are evaluated as three shifted
+    array passes over every token of the batch, as are the special-case
+    idioms ("the bomb", "kiss of death"). VADER's quirks are kept: a repeated
+    word is scored in the context of its first occurrence, and tokens with
+    leftover punctuation (e.g. a leading curly quote) miss the lexicon.
+    """
+
+    VERSION = 1
+
+    # Word codes for the rules that test specific words
+    RULE_WORDS = ("never", "so", "this", "least", "at", "very", "but", "kind", "of", "just", "enough", "sort")
+
+    # Token offsets (relative to the scored word) _idioms_check compares with the
+    # idioms: the first match before the word wins, matches after it override
+    IDIOM_WINDOWS_BEFORE = ((-1, 0), (-2, -1, 0), (-2, -1), (-3, -2, -1), (-3, -2))
+    IDIOM_WINDOWS_AFTER = ((0, 1), (0, 1, 2))
+
+    def __init__(self):
+        self.sia = SentimentIntensityAnalyzer()
+        self.constants = VaderConstants()
+        self.compile()
+
+    def version(self):
+        return analyzer_version(self.sia).replace("vader", f"lexicon{self.VERSION}", 1)
+
+    def compile(self):
+        """Integer token ids and per-id lookup arrays for the lexicon and rules."""
+        c = self.constants
+        self.idioms = [(tuple(idiom.split()), value) for idiom, value in c.SPECIAL_CASE_IDIOMS.items()]
+        idiom_words = sorted({word for idiom, _ in self.idioms for word in idiom} - set(self.RULE_WORDS))
+        self.WORDS = self.RULE_WORDS + tuple(idiom_words)
+
+        words = set(self.sia.lexicon) | set(c.BOOSTER_DICT) | c.NEGATE | set(self.WORDS)
+        # Id 0: any other word; id 1: other words containing "n't", which count as negations
+        self.vocab = {word: i for i, word in enumerate(sorted(words), start=2)}
+        size = len(self.vocab) + 2
+
+        self.valence = np.zeros(size)
+        self.in_lexicon = np.zeros(size, dtype=bool)
+        self.booster = np.zeros(size)
+        self.negation = np.zeros(size, dtype=bool)
+        self.word_code = np.full(size, -1, dtype=np.int8)
+
+        self.negation[1] = True
+        for word, i in self.vocab.items():
+            if word in self.sia.lexicon:
+                self.valence[i] = self.sia.lexicon[word]
+                self.in_lexicon[i] = True
+            self.booster[i] = c.BOOSTER_DICT.get(word, 0.0)
+            self.negation[i] = word in c.NEGATE or "n't" in word
+            if word in self.WORDS:
+                self.word_code[i] = self.WORDS.index(word)
+
+    def words_and_emoticons(self, text):
+        """Same tokens as VADER's SentiText: one punctuation run stripped if what remains is a word."""
+        words = {w for w in REGEX_REMOVE_PUNCTUATION.sub("", text).split() if len(w) > 1}
+        tokens = []
+        for token in text.split():
+            if len(token) < 2:
+                continue
+            if token not in words and (token[0] in PUNCTUATION or token[-1] in PUNCTUATION):
+                token = self.strip_punctuation(token, words)
+            tokens.append(token)
+        return tokens
+
+    def strip_punctuation(self, token, words):
+        # "word" + punctuation takes precedence over punctuation + "word", as in SentiText
+        for p in self.constants.PUNC_LIST:
+            if token.endswith(p) and token[:-len(p)] in words:
+                return token[:-len(p)]
+        for p in self.constants.PUNC_LIST:
+            if token.startswith(p) and token[len(p):] in words:
+                return token[len(p):]
+        return token
+
+    def tokenize_batch(self, texts):
+        ids, upper, exact, first, lengths, emphasis = [], [], [], [], [], []
+        vocab = self.vocab
+
+        for text in texts:
+            tokens = self.words_and_emoticons(text)
+            seen = {}
+            for pos, token in enumerate(tokens):
+                lower = token.lower()
+                i = vocab.get(lower, 0)
+                if i == 0 and "n't" in lower:
+                    i = 1
+                ids.append(i)
+                upper.append(token.isupper())
+                exact.append(token == lower)
+                # VADER looks tokens up with list.index(), i.e. at their first occurrence
+                first.append(seen.setdefault(token, pos))
+            lengths.append(len(tokens))
+            emphasis.append(self.punctuation_emphasis(text))
+
+        return (
+            np.array(ids, dtype=np.int32), np.array(upper, dtype=bool), np.array(exact, dtype=bool),
+            np.array(first, dtype=np.int64), np.array(lengths, dtype=np.int64), np.array(emphasis)
+        )
+
+    def punctuation_emphasis(self, text):
+        ep_count = min(text.count("!"), 4)
+        qm_count = text.count("?")
+        qm_amplifier = 0.0
+        if qm_count > 1:
+            qm_amplifier = qm_count * 0.18 if qm_count <= 3 else 0.96
+        return ep_count * 0.292 + qm_amplifier
+
+    def score_batch(self, texts):
+        c = self.constants
+        ids, upper, exact, first, lengths, emphasis = self.tokenize_batch(texts)
+        n_texts, n_tokens = len(lengths), len(ids)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        quote = np.repeat(np.arange(n_texts), lengths)
+        pos = np.arange(n_tokens) - starts[quote]
+
+        code = self.word_code[ids]
+        # Case-sensitive word tests, like VADER's == comparisons
+        exact_code = np.where(exact, code, -1)
+        in_lexicon = self.in_lexicon[ids]
+
+        # Some but not all tokens of the text are ALL CAPS
+        n_upper = np.bincount(quote, weights=upper, minlength=n_texts)
+        cap_diff = ((n_upper > 0) & (n_upper < lengths))[quote]
+        caps = upper & cap_diff
+
+        def back(values, k, fill):
+            """values of the token k places earlier (k < 0: later) in the same text, else fill."""
+            out = np.full_like(values, fill)
+            if k == 0:
+                return values
+            if 0 < k < n_tokens:
+                out[k:] = values[:-k]
+            elif -n_tokens < k < 0:
+                out[:k] = values[-k:]
+            out[(pos < k) | (pos - k >= lengths[quote])] = fill
+            return out
+
+        valence = self.valence[ids].copy()
+        valence = np.where(in_lexicon & caps, np.where(valence > 0, valence + c.C_INCR, valence - c.C_INCR), valence)
+
+        prev_code = [back(exact_code, k, -1) for k in (1, 2, 3)]
+        for k, damping in enumerate((1.0, 0.95, 0.9)):
+            j_ids = back(ids, k + 1, 0)
+            applies = in_lexicon & (pos > k) & ~self.in_lexicon[j_ids]
+
+            # Booster or dampener k+1 tokens back (scalar_inc_dec)
+            scalar = self.booster[j_ids]
+            scalar = np.where(valence < 0, -scalar, scalar)
+            capped = (scalar != 0) & back(caps, k + 1, False)
+            scalar = np.where(capped, np.where(valence > 0, scalar + c.C_INCR, scalar - c.C_INCR), scalar)
+            if damping != 1.0:
+                scalar = np.where(scalar != 0, scalar * damping, scalar)
+            valence = np.where(applies, valence + scalar, valence)
+
+            # Negation k+1 tokens back, or "never so/this" intensification (_never_check)
+            negated = self.negation[j_ids]
+            never = prev_code[k] == self.WORDS.index("never")
+            so_this = np.isin(prev_code[k - 1], (self.WORDS.index("so"), self.WORDS.index("this")))
+            if k == 0:
+                factor = np.where(negated, c.N_SCALAR, 1.0)
+            elif k == 1:
+                factor = np.where(never & so_this, 1.5, np.where(negated, c.N_SCALAR, 1.0))
+            else:
+                so_this_last = np.isin(prev_code[0], (self.WORDS.index("so"), self.WORDS.index("this")))
+                factor = np.where((never & so_this) | so_this_last, 1.25, np.where(negated, c.N_SCALAR, 1.0))
+            valence = np.where(applies, valence * factor, valence)
+
+            if k == 2:
+                valence = np.where(applies, self.idiom_valence(exact_code, back, valence), valence)
+
+                # Multi-word dampeners just before the word ("kind of", "sort of", "just enough")
+                pairs = [(self.WORDS.index(a), self.WORDS.index(b))
+                         for a, b in (("kind", "of"), ("sort", "of"), ("just", "enough"))]
+                dampened = np.zeros(n_tokens, dtype=bool)
+                for a, b in pairs:
+                    dampened |= (prev_code[2] == a) & (prev_code[1] == b)
+                    dampened |= (prev_code[1] == a) & (prev_code[0] == b)
+                valence = np.where(applies & dampened, valence + c.B_DECR, valence)
+
+        # "least" one token back negates, unless it reads "at least" / "very least" (_least_check)
+        least = (back(code, 1, -1) == self.WORDS.index("least")) & ~self.in_lexicon[back(ids, 1, 0)]
+        not_at_very = ~np.isin(back(code, 2, -1), (self.WORDS.index("at"), self.WORDS.index("very")))
+        least_negates = least & (((pos > 1) & not_at_very) | (pos == 1))
+        valence = np.where(in_lexicon & least_negates, valence * c.N_SCALAR, valence)
+
+        # Boosters and the "kind" of "kind of" score nothing themselves
+        next_code = np.full(n_tokens, -1, dtype=np.int8)
+        next_code[:-1] = code[1:]
+        next_code[pos == lengths[quote] - 1] = -1
+        skipped = (self.booster[ids] != 0) | ((code == self.WORDS.index("kind")) & (next_code == self.WORDS.index("of")))
+        valence = np.where(skipped, 0.0, valence)
+
+        # Each token is scored in the context of its first occurrence
+        valence = valence[starts[quote] + first]
+
+        # Halve the sentiment before the first "but" and raise it by half after (_but_check)
+        no_but = np.iinfo(np.int64).max
+        first_but = np.full(n_texts, no_but)
+        is_but = code == self.WORDS.index("but")
+        np.minimum.at(first_but, quote[is_but], pos[is_but])
+        but = first_but[quote]
+        valence = np.where(but == no_but, valence,
+                           np.where(pos < but, valence * 0.5, np.where(pos > but, valence * 1.5, valence)))
+
+        return self.score_valence(valence, quote, lengths, emphasis)
+
+    def idiom_valence(self, exact_code, back, valence):
+        """valence, replaced by the idiom's value where the word is part of one (_idioms_check)."""
+        window_codes = {}
+
+        def matches(window):
+            found = np.zeros(len(exact_code), dtype=bool)
+            for idiom, value in self.idioms:
+                if len(idiom) != len(window):
+                    continue
+                match = np.ones(len(exact_code), dtype=bool)
+                for offset, word in zip(window, idiom):
+                    if offset not in window_codes:
+                        window_codes[offset] = back(exact_code, -offset, -1)
+                    match &= window_codes[offset] == self.WORDS.index(word)
+                yield match & ~found, value
+                found |= match
+
+        # Earlier windows take precedence before the word, so apply them last
+        idiom = np.full(len(exact_code), np.nan)
+        for window in reversed(self.IDIOM_WINDOWS_BEFORE):
+            matched = np.zeros(len(exact_code), dtype=bool)
+            values = np.full(len(exact_code), np.nan)
+            for match, value in matches(window):
+                values[match] = value
+                matched |= match
+            idiom = np.where(matched, values, idiom)
+        for window in self.IDIOM_WINDOWS_AFTER:
+            for match, value in matches(window):
+                idiom[match] = value
+
+        return np.where(np.isnan(idiom), valence, idiom)
+
+    def score_valence(self, valence, quote, lengths, emphasis):
+        n_texts = len(lengths)
+        total = np.bincount(quote, weights=valence, minlength=n_texts)
+        total = np.where(total > 0, total + emphasis, np.where(total < 0, total - emphasis, total))
+        compound = total / np.sqrt(total * total + 15)
+
+        pos_sum = np.bincount(quote, weights=np.where(valence > 0, valence + 1, 0.0), minlength=n_texts)
+        neg_sum = np.bincount(quote, weights=np.where(valence < 0, valence - 1, 0.0), minlength=n_texts)
+        neu_count = np.bincount(quote, weights=valence == 0, minlength=n_texts)
+        pos_sum = np.where(pos_sum > -neg_sum, pos_sum + emphasis, pos_sum)
+        neg_sum = np.where(pos_sum < -neg_sum, neg_sum - emphasis, neg_sum)
+
+        denominator = pos_sum - neg_sum + neu_count
+        empty = lengths == 0
+        denominator[empty] = 1.0
+        scores = np.column_stack((-neg_sum, neu_count, pos_sum)) / denominator[:, None]
+        scores = np.column_stack((np.abs(scores), compound))
+        scores[empty] = 0.0
+
+        # Python's round, so values match polarity_scores exactly when the sums do
+        return [
+            {"neg": round(neg, 3), "neu": round(neu, 3), "pos": round(pos, 3), "compound": round(comp, 4)}
+            for neg, neu, pos, comp in scores.tolist()
+        ]
+
+
+SCORERS = {
+    "vader": VaderScorer,
+    "lexicon": LexiconScorer,
+}
+
+
+def load_texts(path, limit=None):
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = iter(json.load(f))
+        texts = []
+        for q in records:
+            if limit and len(texts) >= limit:
+                break
+            texts.append(q.get("text", ""))
+    return texts
+
+
+def timed_scores(scorer, texts, batch_size):
+    start = time.perf_counter()
+    scores = []
+    for i in range(0, len(texts), batch_size):
+        scores.extend(scorer.score_batch(texts[i:i + batch_size]))
+    return scores, time.perf_counter() - start
+
+
+def parity_report(texts, reference, candidate):
+    """Agreement of candidate scores with the reference, as a dict."""
+    ref = np.array([[s[key] for key in SCORE_KEYS] for s in reference]).reshape(-1, len(SCORE_KEYS))
+    cand = np.array([[s[key] for key in SCORE_KEYS] for s in candidate]).reshape(-1, len(SCORE_KEYS))
+    ref_labels = [label_sentiment(s["compound"]) for s in reference]
+    cand_labels = [label_sentiment(s["compound"]) for s in candidate]
+    error = np.abs(cand - ref)
+
+    confusion = {}
+    for r, c in zip(ref_labels, cand_labels):
+        confusion.setdefault(r, {}).setdefault(c, 0)
+        confusion[r][c] += 1
+
+    worst = int(np.argmax(error[:, 3])) if len(texts) else None
+    return {
+        "quotes": len(texts),
+        "label_agreement": sum(r == c for r, c in zip(ref_labels, cand_labels)) / max(len(texts), 1),
+        "scores_identical": float(np.mean(np.all(error == 0, axis=1))) if len(texts) else 1.0,
+        "compound_mae": float(error[:, 3].mean()) if len(texts) else 0.0,
+        "compound_max_error": float(error[:, 3].max()) if len(texts) else 0.0,
+        "pos_neg_neu_mae": float(error[:, :3].mean()) if len(texts) else 0.0,
+        "confusion": confusion,
+        "worst": None if worst is None else {
+            "text": texts[worst], "reference": reference[worst], "candidate": candidate[worst]
+        },
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare a scorer with VADER: parity and throughput.")
+    parser.add_argument("--input", default="../data_extraction/quotes.json", help="Quotes (.json or .jsonl)")
+    parser.add_argument("--scorer", choices=[name for name in SCORERS if name != "vader"], default="lexicon")
+    parser.add_argument("--limit", type=int, default=0, help="Score only the first N quotes (0 = all)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--output", help="Also write the report as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    texts = load_texts(args.input, args.limit)
+    print(f"Scoring {len(texts)} quotes from {args.input}")
+
+    reference, vader_seconds = timed_scores(VaderScorer(), texts, args.batch_size)
+    candidate, seconds = timed_scores(SCORERS[args.scorer](), texts, args.batch_size)
+    report = parity_report(texts, reference, candidate)
+    report["throughput"] = {
+        "vader": round(len(texts) / vader_seconds, 1),
+        args.scorer: round(len(texts) / seconds, 1),
+    }
+
+    print(f"Throughput: vader {report['throughput']['vader']:,.0f} quotes/s, "
+          f"{args.scorer} {report['throughput'][args.scorer]:,.0f} quotes/s "
+          f"({vader_seconds / seconds:.1f}x)")
+    print(f"Label agreement: {report['label_agreement']:.2%}")
+    print(f"Identical scores: {report['scores_identical']:.2%}")
+    print(f"Compound MAE: {report['compound_mae']:.5f} (max {report['compound_max_error']:.4f})")
+    print(f"pos/neg/neu MAE: {report['pos_neg_neu_mae']:.5f}")
+    print("Labels (rows: vader, columns: " + args.scorer + "):")
+    labels = ["Positive", "Neutral", "Negative"]
+    for r in labels:
+        row = report["confusion"].get(r, {})
+        print(f"  {r:<9}" + "".join(f"{row.get(c, 0):>9}" for c in labels))
+    if report["worst"] and report["compound_max_error"]:
+        print(f"Largest compound difference: {report['worst']['text']!r}")
+        print(f"  vader {report['worst']['reference']}  {args.scorer} {report['worst']['candidate']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+        print(f"Report saved to {args.output}")
@@ -0,0 +1,109 @@
+import hashlib
+import sqlite3
+import time
+import unicodedata
+import nltk
+
+SCORE_KEYS = ("neg", "neu", "pos", "compound")
+
+
+def analyzer_version(sia):
+    """Identify the scorer: NLTK release plus a digest of the loaded lexicon."""
+    lexicon_digest = hashlib.sha256(sia.lexicon_file.encode("utf-8")).hexdigest()[:16]
+    return f"nltk-{nltk.__version__}-vader-{lexicon_digest}"
+
+
+def normalize_text(text):
+    # Only changes VADER cannot see: Unicode composition and surrounding whitespace
+    return unicodedata.normalize("NFC", text).strip()
+
+
+class SentimentCache:
+    """Persistent polarity-score cache keyed by text and analyzer version.
+
+    Entries live in a small SQLite file. Every lookup refreshes an entry's
+    last-used time, and once the cache grows past max_entries the least
+    recently used entries are evicted.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self, path, version, max_entries=1_000_000):
+        self.CACHE_PATH = path
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(self.CACHE_PATH)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS scores (
+                key TEXT PRIMARY KEY,
+                neg REAL, neu REAL, pos REAL, compound REAL,
+                last_used REAL
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON scores (last_used)")
+
+    def key(self, text):
+        payload = f"{self.version}\0{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, texts):
+        """Return cached scores aligned with texts (None for a miss)."""
+        keys = [self.key(t) for t in texts]
+        unique_keys = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time()
+
+        with self.conn:
+            for i in range(0, len(unique_keys), self.BATCH_SIZE):
+                batch = unique_keys[i:i + self.BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT key, neg, neu, pos, compound FROM scores WHERE key IN ({placeholders})",
+                    batch
+                )
+                for key, *values in rows:
+                    found[key] = dict(zip(SCORE_KEYS, values))
+
+                self.conn.execute(
+                    f"UPDATE scores SET last_used = ? WHERE key IN ({placeholders})",
+                    [now, *batch]
+                )
+
+        results = [found.get(key) for key in keys]
+        self.misses += results.count(None)
+        self.hits += len(results) - results.count(None)
+        return results
+
+    def put_many(self, items):
+        """Store (text, scores) pairs, then evict down to max_entries."""
+        now = time.time()
+        rows = [
+            (self.key(text), *(scores[k] for k in SCORE_KEYS), now)
+            for text, scores in items
+        ]
+
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.evict()
+
+    def evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM scores WHERE key IN "
+                "(SELECT key FROM scores ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+        return max(excess, 0)
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        print(f"Sentiment cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate)")
+
+    def close(self):
+        self.conn.close()
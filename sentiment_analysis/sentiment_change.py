@@ -0,0 +1,73 @@
+import plotly.express as px
+from chart_output import write_figure
+from instrumentation import RunMetrics
+from run_history import RunHistory
+
+class DataVisualization:
+
+    def __init__(self, history=None, max_entities=30):
+        # Per-sentiment change between the last two runs recorded by build_charts.py (see run_history.py)
+        self.history = history or RunHistory()
+        # Only the authors/tags whose counts moved most are drawn
+        self.MAX_ENTITIES = max_entities
+        self.plot_data = self.prepare_data()
+
+        # Consistent sentiment colors
+        self.color_map = {
+            "Positive": "#2ecc71",  # green
+            "Neutral":  "#3498db",  # blue
+            "Negative": "#e74c3c"   # red
+        }
+
+    def prepare_data(self):
+        if len(self.history.runs) < 2:
+            return None
+
+        old, new = self.history.runs[-2]["id"], self.history.runs[-1]["id"]
+        return {
+            "runs": [old, new],
+            "author": self.history.delta_records("author", old, new, top=self.MAX_ENTITIES),
+            "tag": self.history.delta_records("tag", old, new, top=self.MAX_ENTITIES),
+        }
+
+    def create_change_charts(self):
+        if self.plot_data is None:
+            print("Sentiment change charts need at least two recorded runs; skipped")
+            return
+
+        old, new = self.plot_data["runs"]
+        output_dir = "../visualizations/exploratory_charts/"
+        for kind in ("author", "tag"):
+            records = self.plot_data[kind]
+            if not records:
+                # px.bar needs at least one row to find its columns
+                print(f"No {kind} sentiment changed since the previous run; {kind} change chart skipped")
+                continue
+
+            fig = px.bar(
+                records,
+                x=kind,
+                y="change",
+                color="sentiment",
+                color_discrete_map=self.color_map,
+                barmode="relative",
+                hover_data=["before", "after"],
+                title=f"Sentiment change per {kind} since the previous run ({old} → {new})",
+                category_orders={kind: list(dict.fromkeys(r[kind] for r in records))}
+            )
+
+            fig.update_layout(
+                xaxis_tickangle=-45,
+                yaxis_title="Change in quotes",
+                template="plotly_white"
+            )
+
+            write_figure(fig, output_dir, f"sentiment_change_{kind}s.html")
+        print("Sentiment change charts saved as HTML!")
+
+if __name__ == '__main__':
+    with RunMetrics("sentiment_change") as metrics:
+        with metrics.stage("prepare"):
+            chart = DataVisualization()
+        with metrics.stage("render"):
+            chart.create_change_charts()
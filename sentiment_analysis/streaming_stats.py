@@ -0,0 +1,434 @@
+import argparse
+import hashlib
+import heapq
+import json
+import os
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+from aggregation import OTHER_AUTHORS, OTHER_TAGS, SentimentAggregates
+from quote_record import Quote
+from quote_store import QuoteStore, SENTIMENTS
+
+# Fixed-memory statistics over an unbounded stream of processed quotes:
+# heavy-hitter authors, tags and author/tag pairs with per-sentiment counts,
+# distinct author and tag counts, and compound score quantiles. Summaries of
+# separate shards merge into the summary of their union, and SketchAggregates
+# hands a summary to the charts in place of the exact SentimentAggregates.
+#
+#   python streaming_stats.py --input processed_quotes.jsonl --output quote_stats.npz
+#   python streaming_stats.py --merge shard_1.npz shard_2.npz --output quote_stats.npz
+#   python build_charts.py --sketch quote_stats.npz
+
+SENTIMENT_CODES = {s: i for i, s in enumerate(SENTIMENTS)}
+
+# Joins the parts of composite keys; never part of an author or tag name
+KEY_SEPARATOR = "\x1f"
+
+
+@lru_cache(maxsize=1 << 16)
+def key_hash(key):
+    """64-bit hash of a string key, stable across processes and runs."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def key_hashes(keys):
+    return np.fromiter((key_hash(key) for key in keys), dtype=np.uint64, count=len(keys))
+
+
+class CountMinSketch:
+    """Approximate counts of arbitrarily many keys in a depth x width table.
+
+    Each key increments one cell per row; its estimate is the smallest of
+    those cells, which never undercounts and overcounts by at most
+    e * total / width with probability 1 - exp(-depth). Row positions come
+    from two halves of one 64-bit hash (h1 + i * h2).
+    """
+
+    def __init__(self, width=1 << 16, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def positions(self, hashes):
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1 + rows * h2) % np.uint64(self.width)).astype(np.int64)
+
+    def add(self, keys, counts=1):
+        positions = self.positions(key_hashes(keys))
+        counts = np.broadcast_to(np.asarray(counts, dtype=np.int64), (len(keys),))
+        for row in range(self.depth):
+            np.add.at(self.table[row], positions[row], counts)
+
+    def estimate(self, keys):
+        if not len(keys):
+            return np.zeros(0, dtype=np.int64)
+        positions = self.positions(key_hashes(keys))
+        return self.table[np.arange(self.depth)[:, None], positions].min(axis=0)
+
+    def merge(self, other):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError(f"Cannot merge a {other.depth}x{other.width} Count-Min sketch "
+                             f"into a {self.depth}x{self.width} one")
+        self.table += other.table
+        return self
+
+
+class SpaceSaving:
+    """The `capacity` most frequent keys of a stream, with overestimated counts.
+
+    A key's count exceeds its true count by at most its recorded error, and
+    any key with more than total / capacity occurrences is kept. Updates
+    are applied a batch at a time, as a merge of the batch's exact counts.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+
+    def floor(self):
+        # What a key missing from a full summary may have had
+        if self.capacity is None or len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def update(self, keys):
+        batch = SpaceSaving(capacity=None)
+        batch.counts = Counter(keys)
+        return self.merge(batch)
+
+    def merge(self, other):
+        floor, other_floor = self.floor(), other.floor()
+        counts = {}
+        errors = {}
+        for key in self.counts.keys() | other.counts.keys():
+            counts[key] = self.counts.get(key, floor) + other.counts.get(key, other_floor)
+            errors[key] = self.errors.get(key, floor) + other.errors.get(key, other_floor)
+
+        keep = heapq.nlargest(self.capacity, counts, key=counts.__getitem__)
+        self.counts = {key: counts[key] for key in keep}
+        self.errors = {key: errors[key] for key in keep}
+        return self
+
+    def top(self, k=None):
+        """Keys by descending count (all kept keys when k is None)."""
+        return sorted(self.counts, key=lambda key: (-self.counts[key], key))[:k]
+
+
+class HyperLogLog:
+    """Approximate number of distinct keys in 2**precision one-byte registers.
+
+    Standard error is about 1.04 / sqrt(2**precision), 0.8% at the default.
+    """
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, keys):
+        if not len(keys):
+            return
+        hashes = key_hashes(keys)
+        suffix_bits = 64 - self.precision
+        buckets = (hashes >> np.uint64(suffix_bits)).astype(np.int64)
+        # Below 2**53, so exact as floats; frexp gives the bit length
+        suffixes = (hashes & np.uint64((1 << suffix_bits) - 1)).astype(np.float64)
+        ranks = (suffix_bits - np.frexp(suffixes)[1] + 1).astype(np.uint8)
+        np.maximum.at(self.registers, buckets, ranks)
+
+    def count(self):
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.ldexp(1.0, -self.registers.astype(np.int64)).sum()
+        zeros = int((self.registers == 0).sum())
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while few registers are set
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def merge(self, other):
+        if self.precision != other.precision:
+            raise ValueError(f"Cannot merge HyperLogLog precision {other.precision} into {self.precision}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+
+class ScoreQuantiles:
+    """Quantiles of compound scores from a fixed-width histogram over [-1, 1].
+
+    VADER rounds compound scores to four decimals, so at the default
+    resolution every score has its own bin and the quantiles are exact;
+    the histogram stays 20001 counts however many scores are added.
+    """
+
+    def __init__(self, resolution=1e-4):
+        self.resolution = resolution
+        self.counts = np.zeros(int(round(2 / resolution)) + 1, dtype=np.int64)
+
+    def add(self, scores):
+        bins = np.rint((np.asarray(scores, dtype=np.float64) + 1) / self.resolution).astype(np.int64)
+        self.counts += np.bincount(np.clip(bins, 0, len(self.counts) - 1), minlength=len(self.counts))
+
+    def quantile(self, q):
+        total = self.counts.sum()
+        if not total:
+            return None
+        b = int(np.searchsorted(np.cumsum(self.counts), q * total))
+        return round(b * self.resolution - 1, 4)
+
+    def merge(self, other):
+        if len(self.counts) != len(other.counts):
+            raise ValueError(f"Cannot merge quantiles at resolution {other.resolution} into {self.resolution}")
+        self.counts += other.counts
+        return self
+
+
+class StreamingStats:
+    """Bounded-memory summary of a stream of processed quotes.
+
+    Memory is fixed by the constructor arguments, not by the number of
+    quotes, authors or tags seen. Quote and sentiment totals are exact;
+    per-entity counts come from the Count-Min sketch for the entities the
+    Space-Saving summaries keep, and distinct counts from HyperLogLog.
+    """
+
+    def __init__(self, heavy_hitters=1000, pair_heavy_hitters=5000, width=1 << 16, depth=4, precision=14):
+        self.quotes = 0
+        self.sentiment_totals = np.zeros(len(SENTIMENTS), dtype=np.int64)
+        self.tag_totals = np.zeros(len(SENTIMENTS), dtype=np.int64)
+        self.authors = SpaceSaving(heavy_hitters)
+        self.tags = SpaceSaving(heavy_hitters)
+        self.pairs = SpaceSaving(pair_heavy_hitters)
+        # (kind, name, sentiment) -> count, for authors, tags and author/tag pairs
+        self.sentiment_counts = CountMinSketch(width, depth)
+        self.distinct_authors = HyperLogLog(precision)
+        self.distinct_tags = HyperLogLog(precision)
+        self.compound = ScoreQuantiles()
+
+    @classmethod
+    def from_source(cls, json_path, batch_size=10_000, **options):
+        """Summary of processed quotes (.json or .jsonl), read a batch at a time."""
+        stats = cls(**options)
+        batch = []
+        for record in QuoteStore(json_path).read_source():
+            batch.append(Quote.from_dict(record))
+            if len(batch) >= batch_size:
+                stats.update(batch)
+                batch = []
+        stats.update(batch)
+        return stats
+
+    def update(self, quotes):
+        authors = []
+        tags = []
+        pairs = []
+        keys = []
+        sentiments = []
+        tag_sentiments = []
+        compounds = []
+        for q in quotes:
+            s = SENTIMENT_CODES[q.sentiment]
+            authors.append(q.author)
+            sentiments.append(s)
+            compounds.append(q.compound)
+            keys.append(KEY_SEPARATOR.join(("author", q.author, str(s))))
+            for tag in q.tags:
+                pair = q.author + KEY_SEPARATOR + tag
+                tags.append(tag)
+                pairs.append(pair)
+                tag_sentiments.append(s)
+                keys.append(KEY_SEPARATOR.join(("tag", tag, str(s))))
+                keys.append(KEY_SEPARATOR.join(("pair", pair, str(s))))
+        if not authors:
+            return self
+
+        self.quotes += len(authors)
+        self.sentiment_totals += np.bincount(sentiments, minlength=len(SENTIMENTS))
+        self.tag_totals += np.bincount(tag_sentiments, minlength=len(SENTIMENTS))
+        self.authors.update(authors)
+        self.tags.update(tags)
+        self.pairs.update(pairs)
+        self.sentiment_counts.add(keys)
+        self.distinct_authors.add(authors)
+        self.distinct_tags.add(tags)
+        self.compound.add(compounds)
+        return self
+
+    def merge(self, other):
+        """Fold in the summary of another shard built with the same options."""
+        self.quotes += other.quotes
+        self.sentiment_totals += other.sentiment_totals
+        self.tag_totals += other.tag_totals
+        self.authors.merge(other.authors)
+        self.tags.merge(other.tags)
+        self.pairs.merge(other.pairs)
+        self.sentiment_counts.merge(other.sentiment_counts)
+        self.distinct_authors.merge(other.distinct_authors)
+        self.distinct_tags.merge(other.distinct_tags)
+        self.compound.merge(other.compound)
+        return self
+
+    def sentiment_estimates(self, kind, names):
+        """(len(names), sentiments) estimated counts for authors, tags or pairs."""
+        keys = [KEY_SEPARATOR.join((kind, name, str(s))) for name in names for s in range(len(SENTIMENTS))]
+        return self.sentiment_counts.estimate(keys).reshape(-1, len(SENTIMENTS))
+
+    def summary(self, top=10):
+        return {
+            "quotes": self.quotes,
+            "sentiments": dict(zip(SENTIMENTS, map(int, self.sentiment_totals))),
+            "distinct_authors": self.distinct_authors.count(),
+            "distinct_tags": self.distinct_tags.count(),
+            "compound_quantiles": {str(q): self.compound.quantile(q) for q in (0.05, 0.25, 0.5, 0.75, 0.95)},
+            "top_authors": {a: self.authors.counts[a] for a in self.authors.top(top)},
+            "top_tags": {t: self.tags.counts[t] for t in self.tags.top(top)},
+        }
+
+    def save(self, path):
+        meta = {
+            "quotes": self.quotes,
+            "resolution": self.compound.resolution,
+            "heavy_hitters": {
+                name: {"capacity": summary.capacity, "counts": summary.counts, "errors": summary.errors}
+                for name, summary in (("authors", self.authors), ("tags", self.tags), ("pairs", self.pairs))
+            },
+        }
+        # Written aside and renamed, so a reader never sees a partial file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta, ensure_ascii=False)),
+                sentiment_totals=self.sentiment_totals,
+                tag_totals=self.tag_totals,
+                sentiment_counts=self.sentiment_counts.table,
+                distinct_authors=self.distinct_authors.registers,
+                distinct_tags=self.distinct_tags.registers,
+                compound=self.compound.counts,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            heavy = meta["heavy_hitters"]
+            table = data["sentiment_counts"]
+            stats = cls(
+                heavy_hitters=heavy["authors"]["capacity"],
+                pair_heavy_hitters=heavy["pairs"]["capacity"],
+                width=table.shape[1],
+                depth=table.shape[0],
+                precision=int(np.log2(len(data["distinct_authors"]))),
+            )
+            stats.quotes = meta["quotes"]
+            stats.sentiment_totals = data["sentiment_totals"]
+            stats.tag_totals = data["tag_totals"]
+            stats.sentiment_counts.table = table
+            stats.distinct_authors.registers = data["distinct_authors"]
+            stats.distinct_tags.registers = data["distinct_tags"]
+            stats.compound = ScoreQuantiles(meta["resolution"])
+            stats.compound.counts = data["compound"]
+
+        for name in ("authors", "tags", "pairs"):
+            summary = getattr(stats, name)
+            summary.counts = heavy[name]["counts"]
+            summary.errors = heavy[name]["errors"]
+        return stats
+
+
+class SketchAggregates(SentimentAggregates):
+    """The SentimentAggregates chart slices, estimated from a StreamingStats.
+
+    Only the heavy-hitter authors and tags appear by name. Quotes of every
+    other author (and tag occurrences of every other tag) are counted in
+    OTHER_AUTHORS and OTHER_TAGS rows, so sentiment totals stay exact.
+    Per-entity counts may be slightly overestimated.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.authors = stats.authors.top() + [OTHER_AUTHORS]
+        self.tags = stats.tags.top() + [OTHER_TAGS]
+        self.author_sentiment = self.with_remainder(
+            stats.sentiment_estimates("author", self.authors[:-1]), stats.sentiment_totals
+        )
+        self.tag_sentiment = self.with_remainder(
+            stats.sentiment_estimates("tag", self.tags[:-1]), stats.tag_totals
+        )
+        self.build_cube()
+        self.drop_empty_other()
+        self.author_counts = self.author_sentiment.sum(axis=1)
+
+    @classmethod
+    def load(cls, path):
+        return cls(StreamingStats.load(path))
+
+    def with_remainder(self, counts, totals):
+        # The last ("Other") row holds whatever the named rows do not cover
+        return np.vstack([counts, np.maximum(totals - counts.sum(axis=0), 0)])
+
+    def build_cube(self):
+        other_author, other_tag = len(self.authors) - 1, len(self.tags) - 1
+        author_codes = {name: code for code, name in enumerate(self.authors[:-1])}
+        tag_codes = {name: code for code, name in enumerate(self.tags[:-1])}
+        pairs = self.stats.pairs.top()
+
+        cells = {}
+        for pair, counts in zip(pairs, self.stats.sentiment_estimates("pair", pairs)):
+            author, tag = pair.split(KEY_SEPARATOR, 1)
+            key = (author_codes.get(author, other_author), tag_codes.get(tag, other_tag))
+            cells[key] = cells.get(key, 0) + counts
+
+        # Tag occurrences outside the kept pairs
+        covered = sum(cells.values(), np.zeros(len(SENTIMENTS), dtype=np.int64))
+        cells[(other_author, other_tag)] = (
+            cells.get((other_author, other_tag), 0) + np.maximum(self.stats.tag_totals - covered, 0)
+        )
+
+        cube = [(a, t, s, int(c)) for (a, t), counts in cells.items() for s, c in enumerate(counts) if c]
+        self.cube_authors, self.cube_tags, self.cube_sentiments, self.cube_counts = (
+            np.array(column, dtype=np.int64) for column in (zip(*cube) if cube else ([], [], [], []))
+        )
+
+    def drop_empty_other(self):
+        # Other is always the last code, so dropping it renumbers nothing
+        if not self.author_sentiment[-1].any() and not (self.cube_authors == len(self.authors) - 1).any():
+            self.authors.pop()
+            self.author_sentiment = self.author_sentiment[:-1]
+        if not self.tag_sentiment[-1].any() and not (self.cube_tags == len(self.tags) - 1).any():
+            self.tags.pop()
+            self.tag_sentiment = self.tag_sentiment[:-1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fixed-memory sketches of processed quotes, mergeable across shards.")
+    parser.add_argument("--input", nargs="+", default=[], help="Processed quotes (.json or .jsonl) to summarize")
+    parser.add_argument("--merge", nargs="+", default=[], metavar="SKETCH", help="Saved sketches to merge in")
+    parser.add_argument("--output", help="Save the (merged) sketch here")
+    parser.add_argument("--heavy-hitters", type=int, default=1000,
+                        help="Authors and tags tracked by name (author/tag pairs: 5x this)")
+    parser.add_argument("--top", type=int, default=10, help="Heavy hitters to print")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not args.input and not args.merge:
+        args.input = ["processed_quotes.json"]
+
+    stats = None
+    for path in args.input:
+        shard = StreamingStats.from_source(path, heavy_hitters=args.heavy_hitters,
+                                           pair_heavy_hitters=5 * args.heavy_hitters)
+        stats = shard if stats is None else stats.merge(shard)
+    for path in args.merge:
+        shard = StreamingStats.load(path)
+        stats = shard if stats is None else stats.merge(shard)
+
+    print(json.dumps(stats.summary(args.top), indent=4, ensure_ascii=False))
+    if args.output:
+        stats.save(args.output)
+        print(f"Sketch saved to {args.output}")
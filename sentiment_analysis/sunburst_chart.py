@@ -1,46 +1,23 @@
-import json
-import os
-from collections import defaultdict
 import plotly.express as px
+from aggregation import SentimentAggregates
+from chart_output import write_figure
+from instrumentation import RunMetrics
 
 class DataVisualization:
 
-    def __init__(self):
+    def __init__(self, aggregates=None, max_authors=100, max_tags_per_author=30):
         self.INPUT_JSON_PATH = "processed_quotes.json"
-        self.quotes = self.load_json()
+        # Leaves beyond these limits are folded into "Other authors" / "Other tags"
+        self.MAX_AUTHORS = max_authors
+        self.MAX_TAGS_PER_AUTHOR = max_tags_per_author
+        self.aggregates = aggregates or self.load_aggregates()
         self.plot_data = self.prepare_data()
 
-    def load_json(self):
-        if not os.path.exists(self.INPUT_JSON_PATH):
-            print(f"Processed JSON file not found: {self.INPUT_JSON_PATH}")
-            exit()
-
-        with open(self.INPUT_JSON_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data
+    def load_aggregates(self):
+        return SentimentAggregates.from_json(self.INPUT_JSON_PATH)
 
     def prepare_data(self):
-        agg_counts = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
-
-        for q in self.quotes:
-            author = q.get("author", "Unknown")
-            sentiment = q.get("sentiment", "Neutral")
-            for tag in q.get("tags", []):
-                agg_counts[author][tag][sentiment] += 1
-
-        # Flatten for Plotly
-        plot_data = []
-        for author, tags in agg_counts.items():
-            for tag, sentiments in tags.items():
-                for sentiment, count in sentiments.items():
-                    plot_data.append({
-                        "author": author,
-                        "tag": tag,
-                        "sentiment": sentiment,
-                        "count": count
-                    })
-        
-        return plot_data
+        return self.aggregates.author_tag_sentiment_records(self.MAX_AUTHORS, self.MAX_TAGS_PER_AUTHOR)
 
     def create_suburst_chart(self):
         fig = px.sunburst(
@@ -59,10 +36,12 @@ class DataVisualization:
         fig.update_traces(textinfo="label+percent parent")
 
         output_dir = "../visualizations/exploratory_charts/"
-        os.makedirs(output_dir, exist_ok=True)
-
-        fig.write_html(os.path.join(output_dir, "sunburst_chart.html"))        
+        write_figure(fig, output_dir, "sunburst_chart.html")
         print("Sunburst chart saved as HTML!")
 
 if __name__ == '__main__':
-    DataVisualization().create_suburst_chart()
+    with RunMetrics("sunburst_chart") as metrics:
+        with metrics.stage("prepare"):
+            chart = DataVisualization()
+        with metrics.stage("render"):
+            chart.create_suburst_chart()
@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import unicodedata
+import zlib
+import numpy as np
+from quote_store import QuoteStore
+
+# Duplicate quote texts: reposts of the same quote are scored once
+# (process_sentiment.py --dedup, only when VADER could not tell them apart)
+# and drawn once in the scatter plot (also when differently cased or wrapped
+# in curly quotes). Optionally, MinHash/LSH also finds near duplicates (a
+# word or two changed) and reports them as clusters:
+#
+#   python text_dedup.py --threshold 0.8 --output near_duplicates.json
+
+QUOTE_WRAPPERS = "“”\""
+
+
+def dedup_key(text):
+    """Key under which two texts count as the same quote.
+
+    Strips surrounding whitespace and quote marks, casefolds and collapses
+    runs of whitespace.
+    """
+    text = unicodedata.normalize("NFC", text).strip().strip(QUOTE_WRAPPERS)
+    return " ".join(text.casefold().split())
+
+
+def scoring_key(text):
+    """Key under which two texts get identical VADER scores.
+
+    Only NFC composition and whitespace runs are normalized: VADER splits
+    on whitespace, but case and quote marks change its scores.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def group_duplicates(texts, key=dedup_key):
+    """(owner, firsts): owner[i] is the group of texts[i]; firsts[g] is the first text of group g."""
+    groups = {}
+    owner = []
+    firsts = []
+    for i, text in enumerate(texts):
+        group = groups.setdefault(key(text), len(firsts))
+        if group == len(firsts):
+            firsts.append(i)
+        owner.append(group)
+    return np.array(owner, dtype=np.int64), np.array(firsts, dtype=np.int64)
+
+
+def distinct_text_rows(store):
+    """Store rows holding the first occurrence of each distinct text, cached next to the store."""
+    path = os.path.join(store.STORE_DIR, "distinct_text_rows.npy")
+    if not os.path.exists(path):
+        _, firsts = group_duplicates(store.texts())
+        # Written aside and renamed, as chart workers may read it concurrently
+        np.save(f"{path}.tmp.npy", firsts)
+        os.replace(f"{path}.tmp.npy", path)
+    return np.load(path, mmap_mode="r")
+
+
+class NearDuplicateDetector:
+    """Near-duplicate texts via MinHash signatures and LSH banding.
+
+    Each text is reduced to the hashes of its character shingles, and a signature
+    of num_perm minimums under random hash permutations; two signatures agree
+    in about Jaccard(shingles) of their positions. Signatures are cut into
+    bands, and texts sharing any band exactly are candidates. A candidate
+    joins the cluster of its bucket's first text when the signatures agree on
+    at least `threshold` of their positions.
+    """
+
+    PRIME = (1 << 31) - 1
+
+    def __init__(self, threshold=0.8, num_perm=128, bands=32, shingle_size=5, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, self.PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, self.PRIME, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text):
+        # Character shingles: quotes are short, so one changed word must not change most of them
+        key = dedup_key(text)
+        return {key[i:i + self.shingle_size] for i in range(max(len(key) - self.shingle_size + 1, 1))}
+
+    def signatures(self, texts):
+        """(len(texts), num_perm) MinHash signatures."""
+        hashes = []
+        counts = []
+        for text in texts:
+            shingles = self.shingles(text)
+            hashes.extend(zlib.crc32(s.encode("utf-8")) for s in shingles)
+            counts.append(len(shingles))
+        if not counts:
+            return np.empty((0, self.num_perm), dtype=np.uint64)
+
+        hashes = np.array(hashes, dtype=np.uint64) % np.uint64(self.PRIME)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        signatures = np.empty((len(counts), self.num_perm), dtype=np.uint64)
+        # One permutation at a time keeps the working set at one column of the shingle matrix
+        for p in range(self.num_perm):
+            permuted = (hashes * self.a[p] + self.b[p]) % np.uint64(self.PRIME)
+            signatures[:, p] = np.minimum.reduceat(permuted, starts)
+        return signatures
+
+    def clusters(self, texts):
+        """Groups of indices into texts (two or more each) that are near duplicates."""
+        signatures = self.signatures(texts)
+        parent = np.arange(len(texts))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        rows = self.num_perm // self.bands
+        for band in range(self.bands):
+            keys = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+            _, first, bucket = np.unique(keys.view(f"V{keys.shape[1] * 8}").ravel(),
+                                         return_index=True, return_inverse=True)
+            leaders = first[bucket]
+            candidates = np.flatnonzero(leaders != np.arange(len(texts)))
+            if not len(candidates):
+                continue
+
+            agreement = (signatures[candidates] == signatures[leaders[candidates]]).mean(axis=1)
+            close = candidates[agreement >= self.threshold]
+            for i, leader in zip(close.tolist(), leaders[close].tolist()):
+                root_i, root_leader = find(i), find(leader)
+                if root_i != root_leader:
+                    parent[max(root_i, root_leader)] = min(root_i, root_leader)
+
+        roots = np.array([find(i) for i in range(len(texts))], dtype=np.int64)
+        groups = {}
+        for i, root in enumerate(roots.tolist()):
+            groups.setdefault(root, []).append(i)
+        return [members for members in groups.values() if len(members) > 1]
+
+
+def describe_clusters(texts, owner, firsts, clusters, first_row=0, max_examples=5):
+    """Report entries for near-duplicate clusters of distinct texts (groups from group_duplicates)."""
+    # Rows sorted by cluster once, then sliced per cluster
+    cluster_of = np.full(len(firsts), -1, dtype=np.int64)
+    for c, members in enumerate(clusters):
+        cluster_of[members] = c
+    row_clusters = cluster_of[owner]
+    clustered = np.flatnonzero(row_clusters >= 0)
+    clustered = clustered[np.argsort(row_clusters[clustered], kind="stable")]
+    bounds = np.searchsorted(row_clusters[clustered], np.arange(len(clusters) + 1))
+
+    described = []
+    for c, members in enumerate(clusters):
+        rows = clustered[bounds[c]:bounds[c + 1]] + first_row
+        described.append({
+            "size": len(rows),
+            "variants": len(members),
+            "texts": [texts[firsts[m]] for m in members[:max_examples]],
+            "rows": rows.tolist(),
+        })
+    return described
+
+
+def duplicate_report(texts, detector=None):
+    """Exact duplicate groups and (with a detector) near-duplicate clusters, as a dict."""
+    owner, firsts = group_duplicates(texts)
+    sizes = np.bincount(owner, minlength=len(firsts))
+    report = {
+        "texts": len(texts),
+        "distinct": len(firsts),
+        "exact_duplicate_groups": int((sizes > 1).sum()),
+    }
+
+    if detector is not None:
+        clusters = detector.clusters([texts[i] for i in firsts.tolist()])
+        report["threshold"] = detector.threshold
+        report["near_duplicate_clusters"] = sorted(
+            describe_clusters(texts, owner, firsts, clusters), key=lambda c: -c["size"]
+        )
+    return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Report exact and near-duplicate quote texts.")
+    parser.add_argument("--input", default="processed_quotes.json", help="Processed quotes (.json or .jsonl)")
+    parser.add_argument("--threshold", type=float, default=0.8,
+                        help="Estimated Jaccard similarity of character shingles for near duplicates")
+    parser.add_argument("--exact-only", action="store_true", help="Skip the MinHash near-duplicate pass")
+    parser.add_argument("--output", help="Also write the report as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    texts = list(QuoteStore(args.input).load().texts())
+    detector = None if args.exact_only else NearDuplicateDetector(threshold=args.threshold)
+    report = duplicate_report(texts, detector)
+
+    print(f"{report['texts']} quotes, {report['distinct']} distinct texts "
+          f"({report['exact_duplicate_groups']} repeated)")
+    if detector is not None:
+        clusters = report["near_duplicate_clusters"]
+        print(f"{len(clusters)} near-duplicate clusters at threshold {args.threshold}")
+        for cluster in clusters[:10]:
+            print(f"  {cluster['size']} quotes, {cluster['variants']} variants: {cluster['texts'][0][:100]!r}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+        print(f"Report saved to {args.output}")
@@ -1,32 +1,22 @@
-import json
-import os
-from collections import defaultdict
 import plotly.express as px
+from aggregation import SentimentAggregates
+from chart_output import write_figure
+from instrumentation import RunMetrics
 
 class DataVisualization:
 
-    def __init__(self):
+    def __init__(self, aggregates=None, max_authors=500):
         self.INPUT_JSON_PATH = "processed_quotes.json"
-        self.quotes = self.load_json()
+        # Authors beyond this limit are folded into one "Other authors" rectangle
+        self.MAX_AUTHORS = max_authors
+        self.aggregates = aggregates or self.load_aggregates()
         self.plot_data = self.prepare_data()
 
-    def load_json(self):
-        if not os.path.exists(self.INPUT_JSON_PATH):
-            print(f"Processed JSON file not found: {self.INPUT_JSON_PATH}")
-            exit()
-
-        with open(self.INPUT_JSON_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data
+    def load_aggregates(self):
+        return SentimentAggregates.from_json(self.INPUT_JSON_PATH)
 
     def prepare_data(self):
-        author_counts = defaultdict(int)
-        for q in self.quotes:
-            author = q.get("author", "Unknown")
-            author_counts[author] += 1
-
-        plot_data = [{"author": author, "count": count} for author, count in author_counts.items()]
-        return plot_data 
+        return self.aggregates.author_count_records(self.MAX_AUTHORS)
 
     def create_treemap(self):
         fig = px.treemap(
@@ -39,11 +29,13 @@ class DataVisualization:
         )
 
         output_dir = "../visualizations/exploratory_charts/"
-        os.makedirs(output_dir, exist_ok=True)
-
-        fig.write_html(os.path.join(output_dir, "treemap.html"))        
+        write_figure(fig, output_dir, "treemap.html")
         print("Treemap saved as HTML!")
 
 if __name__ == '__main__':
-    DataVisualization().create_treemap()
+    with RunMetrics("treemap") as metrics:
+        with metrics.stage("prepare"):
+            chart = DataVisualization()
+        with metrics.stage("render"):
+            chart.create_treemap()
 
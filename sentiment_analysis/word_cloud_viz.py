@@ -1,66 +1,75 @@
-import json
+import html
 import os
 from wordcloud import WordCloud
-import plotly.express as px
-from PIL import Image
-import numpy as np
-from collections import defaultdict
+from chart_output import record_output
+from instrumentation import RunMetrics
+from quote_store import QuoteStore
+from word_frequencies import TokenizedCorpus
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>{title}</title>
+    <style>
+        body {{ margin: 0; font-family: sans-serif; text-align: center; }}
+        h2 {{ font-weight: normal; margin: 0.6rem 0; }}
+        img {{ max-width: 100%; height: auto; }}
+    </style>
+</head>
+<body>
+    <h2>{title}</h2>
+    <img src="{image}" alt="{title}" width="{width}" height="{height}">
+</body>
+</html>
+"""
 
 class DataVisualization:
 
-    def __init__(self):
+    def __init__(self, store=None):
         self.INPUT_JSON_PATH = "processed_quotes.json"
-        self.quotes = self.load_json()
-        self.sentiment_texts = self.prepare_data()
-
-    def load_json(self):
-        if not os.path.exists(self.INPUT_JSON_PATH):
-            print(f"Processed JSON file not found: {self.INPUT_JSON_PATH}")
-            exit()
+        self.store = store if store is not None else self.load_store()
+        self.sentiment_frequencies = self.prepare_data()
 
-        with open(self.INPUT_JSON_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data
+    def load_store(self):
+        return QuoteStore(self.INPUT_JSON_PATH).load()
 
     def prepare_data(self):
-        sentiment_texts = defaultdict(str)
-
-        for q in self.quotes:
-            sentiment = q.get("sentiment", "Neutral")
-            text = q.get("text", "")
-            sentiment_texts[sentiment] += " " + text
-        
-        return sentiment_texts
+        # Token frequency tables per sentiment from the cached tokenized corpus
+        return TokenizedCorpus(self.store).frequencies_by_sentiment()
 
     def create_word_cloud(self):
-        for sentiment, text in self.sentiment_texts.items():
-            if not text.strip():
+        for sentiment, frequencies in self.sentiment_frequencies.items():
+            if not frequencies:
                 continue
 
             # Generate word cloud using WordCloud library
             wc = WordCloud(width=800, height=400, background_color="white", colormap="tab10", max_words=200)
-            wc.generate(text)
-
-            # Convert to image array
-            img_array = np.array(wc.to_image())
-
-            # Plot using Plotly Express
-            fig = px.imshow(img_array)
-            fig.update_layout(
-                title=f"Word Cloud: {sentiment}",
-                xaxis_visible=False,
-                yaxis_visible=False,
-                margin=dict(l=0, r=0, t=40, b=0)
-            )
+            wc.generate_from_frequencies(frequencies)
 
             output_dir = os.path.join("..", "visualizations", "word_clouds")
             os.makedirs(output_dir, exist_ok=True)
-            
-            filename = f"word_cloud_2_{sentiment.lower()}.html"
-            output_path = os.path.join(output_dir, filename)
 
-            fig.write_html(output_path)
+            # Compressed image plus a light HTML page that references it
+            image_name = f"word_cloud_2_{sentiment.lower()}.png"
+            image_path = os.path.join(output_dir, image_name)
+            wc.to_image().save(image_path, optimize=True)
+            record_output(image_path)
+
+            title = f"Word Cloud: {sentiment}"
+            page = PAGE_TEMPLATE.format(
+                title=html.escape(title), image=image_name, width=wc.width, height=wc.height
+            )
+            page_path = os.path.join(output_dir, f"word_cloud_2_{sentiment.lower()}.html")
+            with open(page_path, "w", encoding="utf-8") as f:
+                f.write(page)
+            record_output(page_path)
+
             print(f"Word Cloud saved: {sentiment}")
 
 if __name__ == '__main__':
-    DataVisualization().create_word_cloud()
\ No newline at end of file
+    with RunMetrics("word_cloud_viz") as metrics:
+        with metrics.stage("prepare"):
+            chart = DataVisualization()
+        with metrics.stage("render"):
+            chart.create_word_cloud()
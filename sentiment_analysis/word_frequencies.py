@@ -0,0 +1,85 @@
+import json
+import os
+import re
+import numpy as np
+from wordcloud import STOPWORDS
+from quote_store import SENTIMENTS
+
+# Same word pattern and filtering WordCloud.process_text applies
+TOKEN_PATTERN = re.compile(r"\w[\w']*")
+STOPWORDS_LOWER = {w.lower() for w in STOPWORDS}
+
+
+def tokenize(text):
+    for word in TOKEN_PATTERN.findall(text):
+        word = word.lower()
+        if word.endswith("'s"):
+            word = word[:-2]
+        if word and not word.isdigit() and word not in STOPWORDS_LOWER:
+            yield word
+
+
+class TokenizedCorpus:
+    """Tokenized quote texts, cached as code arrays next to the QuoteStore.
+
+    Texts are tokenized in one streaming pass; tokens are stored like tags
+    (vocabulary + per-quote offsets + integer codes), so word frequencies for
+    any sentiment are a single bincount. The cache is rebuilt together with
+    the store.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.VOCAB_PATH = os.path.join(store.STORE_DIR, "token_vocab.json")
+        self.OFFSETS_PATH = os.path.join(store.STORE_DIR, "token_offsets.npy")
+        self.CODES_PATH = os.path.join(store.STORE_DIR, "token_codes.npy")
+
+        if not os.path.exists(self.CODES_PATH):
+            self.build()
+
+        with open(self.VOCAB_PATH, "r", encoding="utf-8") as f:
+            self.vocab = json.load(f)
+        self.token_offsets = np.load(self.OFFSETS_PATH, mmap_mode="r")
+        self.token_codes = np.load(self.CODES_PATH, mmap_mode="r")
+
+    def build(self):
+        vocab_index = {}
+        codes = []
+        offsets = [0]
+
+        for text in self.store.texts():
+            for token in tokenize(text):
+                codes.append(vocab_index.setdefault(token, len(vocab_index)))
+            offsets.append(len(codes))
+
+        with open(self.VOCAB_PATH, "w", encoding="utf-8") as f:
+            json.dump(list(vocab_index), f, ensure_ascii=False)
+        np.save(self.OFFSETS_PATH, np.array(offsets, dtype=np.int64))
+        # Codes last: their presence marks a complete cache
+        np.save(self.CODES_PATH, np.array(codes, dtype=np.int32))
+
+    def frequencies_by_sentiment(self):
+        """{sentiment: {word: count}} with plurals folded into their singular."""
+        n_vocab = len(self.vocab)
+        n_sentiments = len(SENTIMENTS)
+
+        rows = np.repeat(np.arange(len(self.store)), np.diff(self.token_offsets))
+        counts = np.bincount(
+            self.store.sentiment_codes[rows].astype(np.int64) * n_vocab + self.token_codes,
+            minlength=n_sentiments * n_vocab
+        ).reshape(n_sentiments, n_vocab)
+
+        return {
+            sentiment: self.fold_plurals(counts[s])
+            for s, sentiment in enumerate(SENTIMENTS)
+            if counts[s].any()
+        }
+
+    def fold_plurals(self, counts):
+        # Like WordCloud's normalize_plurals: "dreams" counts as "dream" when both occur
+        frequencies = {self.vocab[code]: int(counts[code]) for code in np.flatnonzero(counts)}
+        for word in list(frequencies):
+            singular = word[:-1]
+            if word.endswith("s") and not word.endswith("ss") and singular in frequencies:
+                frequencies[singular] += frequencies.pop(word)
+        return frequencies